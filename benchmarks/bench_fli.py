@@ -0,0 +1,326 @@
+"""Benchmarks for pyobs-fli against a simulated device.
+
+Measures the wall time of FliCamera._expose split by phase, the throughput of the row readout loop,
+the dispatch overhead of SDK calls, the cost of frame statistics and headers versus frame size and
+binning, the aggregate throughput of several cameras exposing in parallel, the time for starting an
+exposure with and without background flushing, and the spread of triggered starts of several cameras.
+Results are written as JSON, so they can be compared between releases.
+
+The driver is a compiled extension, so pyobs-fli has to be installed first, e.g. with `uv sync` or
+`pip install .`, before running the benchmarks from the repository:
+
+    uv run python benchmarks/bench_fli.py --output bench.json
+    uv run python benchmarks/bench_fli.py --only dispatch readout --repeat 20
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import sys
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from datetime import UTC, datetime
+from importlib import metadata
+from typing import Any
+
+import numpy as np
+from pyobs.utils.enums import ExposureStatus
+
+from pyobs_fli import FliCamera
+from pyobs_fli.flicamera import trigger_exposures
+from pyobs_fli.flidriver import DeviceType, FrameStats
+from pyobs_fli.flisim import SimulatedFliDriver
+
+# Driver calls attributed to each phase of an exposure, everything else counts as overhead.
+_PHASES = {
+    "set_binning": "configure",
+    "set_window": "configure",
+    "init_exposure": "configure",
+    "set_exposure_time": "configure",
+    "start_exposure": "start",
+    "wait_data_ready": "wait",
+    "is_data_ready": "wait",
+    "iter_row_blocks": "readout",
+    "get_temp": "headers",
+    "get_cooler_power": "headers",
+    "get_properties": "headers",
+}
+
+
+class _TimingDriver:
+    """Proxy for a driver that sums up the time spent in its calls per phase."""
+
+    def __init__(self, driver: SimulatedFliDriver):
+        self._driver = driver
+        self.times: dict[str, float] = defaultdict(float)
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._driver, name)
+        if name not in _PHASES:
+            return attr
+        phase = _PHASES[name]
+
+        if name == "iter_row_blocks":
+
+            def _timed_iter(*args: Any, **kwargs: Any) -> Iterator[Any]:
+                blocks = attr(*args, **kwargs)
+                while True:
+                    start = time.perf_counter()
+                    block = next(blocks, None)
+                    self.times[phase] += time.perf_counter() - start
+                    if block is None:
+                        return
+                    yield block
+
+            return _timed_iter
+
+        def _timed(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self.times[phase] += time.perf_counter() - start
+
+        return _timed
+
+
+def _result(name: str, unit: str, values: list[float], **params: Any) -> dict[str, Any]:
+    return {
+        "name": name,
+        "params": params,
+        "unit": unit,
+        "values": values,
+        "median": statistics.median(values),
+        "mean": statistics.fmean(values),
+        "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+    }
+
+
+async def _open_camera(camera_kwargs: dict[str, Any] | None = None, **simulation: Any) -> FliCamera:
+    camera = FliCamera(simulation=simulation, setpoint=None, **(camera_kwargs or {}))
+    await camera.open()
+    return camera
+
+
+async def bench_expose(repeat: int) -> list[dict[str, Any]]:
+    """Wall time of _expose per phase for a realistic simulated camera."""
+    camera = await _open_camera(width=2048, height=2048, row_time=2.5e-4)
+    try:
+        proxy = _TimingDriver(camera._driver)  # type: ignore[arg-type]
+        camera._driver = proxy  # type: ignore[assignment]
+        phases: dict[str, list[float]] = defaultdict(list)
+        for _ in range(repeat):
+            proxy.times.clear()
+            start = time.perf_counter()
+            await camera._expose(0.1, True, asyncio.Event())
+            total = time.perf_counter() - start
+            for phase in ("configure", "start", "wait", "readout", "headers"):
+                phases[phase].append(proxy.times[phase])
+            phases["overhead"].append(total - sum(proxy.times.values()))
+            phases["total"].append(total)
+        return [_result("expose", "s", values, phase=phase, exposure_time=0.1) for phase, values in phases.items()]
+    finally:
+        camera._driver = proxy._driver  # type: ignore[assignment]
+        await camera.close()
+
+
+async def bench_readout(repeat: int) -> list[dict[str, Any]]:
+    """Throughput of the row readout loop, without any simulated transfer time."""
+    results = []
+    driver = SimulatedFliDriver(SimulatedFliDriver.list_devices(DeviceType.CAMERA)[0], row_time=0.0, status_time=0.0)
+    driver.open()
+    for block_rows in (1, 16, 256):
+        for with_stats in (False, True):
+            out = np.empty((1024, 1024), dtype=np.uint16)
+            values = []
+            for _ in range(repeat):
+                stats = FrameStats() if with_stats else None
+                start = time.perf_counter()
+                for _block in driver.iter_row_blocks(out, block_rows, stats):
+                    pass
+                values.append(out.nbytes / (time.perf_counter() - start) / 1e6)
+            results.append(_result("readout", "MB/s", values, block_rows=block_rows, stats=with_stats))
+    driver.close()
+    return results
+
+
+async def bench_dispatch(repeat: int) -> list[dict[str, Any]]:
+    """Overhead of dispatching a no-op call to the SDK worker thread."""
+    camera = FliCamera(simulation={})
+    calls = 1000
+    results = []
+    try:
+        methods: dict[str, Callable[[Callable[[], Any]], Any]] = {
+            "_run_blocking": camera._run_blocking,
+            "_run_blocking_or_raise": camera._run_blocking_or_raise,
+        }
+        for name, method in methods.items():
+            values = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                for _ in range(calls):
+                    await method(lambda: None)
+                values.append((time.perf_counter() - start) / calls * 1e6)
+            results.append(_result("dispatch", "us/call", values, method=name))
+    finally:
+        await camera.close()
+    return results
+
+
+async def bench_headers(repeat: int) -> list[dict[str, Any]]:
+    """Per-frame software cost of _expose (statistics, headers, buffers) versus frame size and binning.
+
+    Transfer and query times of the simulated device are all zero, so only the cost on the host remains.
+    """
+    results = []
+    for size in (512, 1024, 2048, 4096):
+        camera = await _open_camera(width=size, height=size, row_time=0.0, status_time=0.0, readout_delay=0.0)
+        try:
+            for binning in (1, 2, 4):
+                await camera.set_binning(binning, binning)
+                values = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    await camera._expose(0.0, True, asyncio.Event())
+                    values.append(time.perf_counter() - start)
+                results.append(_result("frame_overhead", "s", values, size=size, binning=binning))
+        finally:
+            await camera.close()
+    return results
+
+
+async def bench_stats(repeat: int) -> list[dict[str, Any]]:
+    """Single-pass FrameStats versus separate numpy passes for min, max and mean."""
+    results = []
+    data = np.random.default_rng(0).integers(0, 65536, (4096, 4096), dtype=np.uint16)
+    methods: dict[str, Callable[[], Any]] = {
+        "numpy": lambda: (np.min(data), np.max(data), np.mean(data)),
+        "framestats": lambda: FrameStats().update(data),
+        "framestats_stride4": lambda: FrameStats(stride=4).update(data),
+    }
+    for name, func in methods.items():
+        values = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            values.append(time.perf_counter() - start)
+        results.append(_result("stats", "s", values, method=name, size=4096))
+    return results
+
+
+async def bench_multicamera(repeat: int) -> list[dict[str, Any]]:
+    """Aggregate throughput of several simulated cameras exposing concurrently in one process."""
+    results = []
+    for count in (1, 2, 4):
+        cameras = [await _open_camera(width=1024, height=1024, row_time=2.5e-4) for _ in range(count)]
+        try:
+            values = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                images = await asyncio.gather(*(camera._expose(0.0, True, asyncio.Event()) for camera in cameras))
+                nbytes = sum(image.data.nbytes for image in images)
+                values.append(nbytes / (time.perf_counter() - start) / 1e6)
+            results.append(_result("multicamera", "MB/s", values, cameras=count))
+        finally:
+            await asyncio.gather(*(camera.close() for camera in cameras))
+    return results
+
+
+async def bench_start(repeat: int) -> list[dict[str, Any]]:
+    """Time for starting an exposure with flushes before it versus starting from background flushing."""
+    results = []
+    for background_flush in (False, True):
+        camera = await _open_camera(
+            {"nflushes": 2, "background_flush": background_flush}, width=2048, height=2048, flush_row_time=2e-5
+        )
+        try:
+            values = []
+            for _ in range(repeat):
+                await camera._change_exposure_status(ExposureStatus.IDLE)
+                await camera._expose(0.0, True, asyncio.Event())
+                values.append(camera.get_metrics()["phases"]["start"]["last"])
+            results.append(_result("start", "s", values, background_flush=background_flush))
+        finally:
+            await camera.close()
+    return results
+
+
+async def bench_trigger(repeat: int) -> list[dict[str, Any]]:
+    """Spread of the start times of armed exposures of several cameras started by trigger_exposures()."""
+    results = []
+    for count in (2, 4):
+        cameras = [await _open_camera({"trigger": "low"}, width=256, height=256) for _ in range(count)]
+        try:
+            values = []
+            for _ in range(repeat):
+                exposures = [asyncio.create_task(camera._expose(0.0, True, asyncio.Event())) for camera in cameras]
+                while any(camera._trigger_armed_at is None for camera in cameras):
+                    await asyncio.sleep(0.001)
+                offsets = await trigger_exposures(cameras)
+                await asyncio.gather(*exposures)
+                values.append(max(offsets) * 1e6)
+            results.append(_result("trigger", "us", values, cameras=count))
+        finally:
+            await asyncio.gather(*(camera.close() for camera in cameras))
+    return results
+
+
+_BENCHMARKS = {
+    "expose": bench_expose,
+    "readout": bench_readout,
+    "dispatch": bench_dispatch,
+    "headers": bench_headers,
+    "stats": bench_stats,
+    "multicamera": bench_multicamera,
+    "start": bench_start,
+    "trigger": bench_trigger,
+}
+
+
+def _version() -> str:
+    try:
+        return metadata.version("pyobs-fli")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+async def run(names: list[str], repeat: int) -> dict[str, Any]:
+    results = []
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        results.extend(await _BENCHMARKS[name](repeat))
+    return {
+        "meta": {
+            "version": _version(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "system": platform.platform(),
+            "date": datetime.now(UTC).isoformat(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks for pyobs-fli against a simulated device.")
+    parser.add_argument("--only", nargs="+", choices=list(_BENCHMARKS), default=list(_BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5, help="Number of repetitions per measurement.")
+    parser.add_argument("--output", help="File to write JSON results to, defaults to stdout.")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args.only, args.repeat))
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
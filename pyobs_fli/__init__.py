@@ -1,2 +1,3 @@
 from .flicamera import FliCamera as FliCamera
 from .flifilterwheel import FliFilterWheel as FliFilterWheel
+from .flifocuser import FliFocuser as FliFocuser
@@ -0,0 +1,123 @@
+import logging
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+# Default upper limit for the memory held by a pool, enough for a handful of full 4k x 4k frames.
+_MAX_POOL_BYTES = 512 * 1024**2
+
+
+class _Lease:
+    """Exposes the memory of a pooled buffer to numpy. The array handed out for it, and every view on that, keep
+    this object alive, so the buffer is released exactly when the lease is garbage collected."""
+
+    def __init__(self, buf: np.ndarray):
+        self.__array_interface__ = buf.__array_interface__
+        self._buf = buf
+
+
+def _lease(buf: np.ndarray, leased: set[int]) -> np.ndarray:
+    """Returns a new array on the memory of buf and adds the id of buf to leased, until that array, all views on
+    it and the Image wrapping it are gone.
+
+    Args:
+        buf: Pooled buffer to hand out.
+        leased: Ids of all buffers of a pool that are in use.
+
+    Returns:
+        Array sharing the memory of buf.
+    """
+    lease = _Lease(buf)
+    leased.add(id(buf))
+    # the lease keeps buf alive, so its id can't be taken by another buffer before this runs
+    weakref.finalize(lease, leased.discard, id(buf))
+    return np.asarray(lease)
+
+
+class ImageBufferPool:
+    """A small pool of recycled uint16 image buffers, keyed by frame shape.
+
+    Buffers are handed out by acquire() as leases, which are returned as soon as they are garbage collected,
+    i.e. once the Image wrapping them (and every view on them) has been released, or the data has been
+    copied downstream. Shapes that haven't been requested for a while are evicted first once the pool would
+    grow beyond its memory cap.
+    """
+
+    def __init__(self, max_bytes: int = _MAX_POOL_BYTES):
+        """Initializes a new pool.
+
+        Args:
+            max_bytes: Maximum number of bytes held by the pool. 0 disables pooling.
+        """
+        self._max_bytes = max_bytes
+        self._buffers: OrderedDict[tuple[int, int], list[np.ndarray]] = OrderedDict()
+        self._leased: set[int] = set()
+
+    @property
+    def nbytes(self) -> int:
+        """Total number of bytes currently held by the pool."""
+        return sum(buf.nbytes for bufs in self._buffers.values() for buf in bufs)
+
+    def _in_use(self, buf: np.ndarray) -> bool:
+        return id(buf) in self._leased
+
+    def acquire(self, shape: tuple[int, int]) -> np.ndarray:
+        """Returns a buffer of the given shape, recycling a released one if possible.
+
+        The content of the returned buffer is undefined.
+
+        Args:
+            shape: Shape (height, width) of the requested buffer.
+
+        Returns:
+            C-contiguous uint16 array of the given shape.
+        """
+        bufs = self._buffers.get(shape)
+        if bufs is not None:
+            self._buffers.move_to_end(shape)
+            for buf in bufs:
+                if not self._in_use(buf):
+                    return _lease(buf, self._leased)
+
+        # need a new one, make room for it first
+        buf = np.empty(shape, dtype=np.uint16)
+        if not self._make_room(buf.nbytes):
+            log.debug("Image buffer pool is full, handing out unpooled %dx%d buffer.", shape[1], shape[0])
+            return buf
+        self._buffers.setdefault(shape, []).append(buf)
+        self._buffers.move_to_end(shape)
+        return _lease(buf, self._leased)
+
+    def _make_room(self, nbytes: int) -> bool:
+        """Evict released buffers, least recently used shapes first, until nbytes more fit into the pool.
+
+        Returns:
+            Whether the requested number of bytes fits into the pool now.
+        """
+        if nbytes > self._max_bytes:
+            return False
+        total = self.nbytes
+        for shape in list(self._buffers):
+            if total + nbytes <= self._max_bytes:
+                break
+            keep: list[np.ndarray] = []
+            for buf in self._buffers[shape]:
+                if total + nbytes > self._max_bytes and not self._in_use(buf):
+                    total -= buf.nbytes
+                else:
+                    keep.append(buf)
+            if keep:
+                self._buffers[shape] = keep
+            else:
+                del self._buffers[shape]
+        return total + nbytes <= self._max_bytes
+
+    def clear(self) -> None:
+        """Drop all buffers from the pool. Buffers still in use stay valid for their users."""
+        self._buffers.clear()
+
+
+__all__ = ["ImageBufferPool"]
@@ -0,0 +1,169 @@
+from collections.abc import Callable, Sequence
+
+# Assumed time for moving the wheel by one slot in seconds, until actual moves have been measured.
+_DEFAULT_SLOT_TIME = 0.5
+
+# Number of slots of a wheel. FliFilterWheel also encodes positions on the second wheel of a dual wheel as
+# multiples of this.
+_FILTER_COUNT = 7
+
+# Largest number of positions to plan exactly. The effort grows with 2^n * n^2, so for more positions a greedy
+# order is improved by swapping pairs instead.
+_EXACT_LIMIT = 10
+
+
+def _wheel_slot(position: int) -> tuple[int, int]:
+    """Returns wheel and slot of a position of FliFilterWheel, which encodes slot s of the second wheel as
+    7 * (s + 1)."""
+    div, mod = divmod(position, _FILTER_COUNT)
+    return (1, div - 1) if mod == 0 and div > 0 else (0, mod)
+
+
+class MoveTimeModel:
+    """Durations of filter wheel moves learned from measurements, per wheel and pair of slots.
+
+    Wheels are circular, so moves that haven't been measured yet are estimated from the shortest distance
+    around the wheel, times the mean time per slot of all measured moves, or a default time per slot, if there
+    are none. A move from one wheel of a dual wheel to the other is estimated as the first wheel going back to
+    its first slot, followed by the second one moving from there.
+    """
+
+    def __init__(self, slot_time: float = _DEFAULT_SLOT_TIME, filter_count: int = _FILTER_COUNT):
+        """Initializes a new model without any measurements.
+
+        Args:
+            slot_time: Assumed time for moving by one slot in seconds, until moves have been measured.
+            filter_count: Number of slots of a wheel.
+        """
+        self._slot_time = slot_time
+        self._filter_count = filter_count
+        self._sums: dict[tuple[int, int, int], float] = {}
+        self._counts: dict[tuple[int, int, int], int] = {}
+        self._total_time = 0.0
+        self._total_slots = 0
+
+    def _distance(self, start: int, end: int) -> int:
+        """Shortest number of slots between two slots of a wheel, in either direction."""
+        delta = abs(end - start) % self._filter_count
+        return min(delta, self._filter_count - delta)
+
+    @staticmethod
+    def _legs(start: int, end: int) -> list[tuple[int, int, int]]:
+        """Splits a move into moves of single wheels, given as wheel, start slot and end slot."""
+        (start_wheel, start_slot), (end_wheel, end_slot) = _wheel_slot(start), _wheel_slot(end)
+        if start_wheel == end_wheel:
+            legs = [(start_wheel, start_slot, end_slot)]
+        else:
+            legs = [(start_wheel, start_slot, 0), (end_wheel, 0, end_slot)]
+        return [leg for leg in legs if leg[1] != leg[2]]
+
+    def observe(self, start: int, end: int, seconds: float) -> None:
+        """Add a measured move from position start to end."""
+        legs = self._legs(start, end)
+        if not legs:
+            return
+        self._total_time += seconds
+        self._total_slots += sum(self._distance(a, b) for _, a, b in legs)
+
+        # a move of both wheels can't be split between them, so it only counts towards the time per slot
+        if len(legs) == 1:
+            key = legs[0]
+            self._sums[key] = self._sums.get(key, 0.0) + seconds
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def estimate(self, start: int, end: int) -> float:
+        """Returns the expected duration of a move from position start to end in seconds."""
+        rate = self._total_time / self._total_slots if self._total_slots > 0 else self._slot_time
+        total = 0.0
+        for wheel, a, b in self._legs(start, end):
+            if (wheel, a, b) in self._counts:
+                total += self._sums[wheel, a, b] / self._counts[wheel, a, b]
+            else:
+                total += rate * self._distance(a, b)
+        return total
+
+    def snapshot(self) -> dict[tuple[int, int, int], tuple[int, float]]:
+        """Returns number of measurements and mean duration per wheel, start slot and end slot."""
+        return {key: (count, self._sums[key] / count) for key, count in sorted(self._counts.items())}
+
+
+def _total(start: int | None, order: Sequence[int], cost: Callable[[int, int], float]) -> float:
+    path = order if start is None else [start, *order]
+    return sum(cost(a, b) for a, b in zip(path, path[1:], strict=False))
+
+
+def _plan_exact(start: int | None, targets: list[int], cost: Callable[[int, int], float]) -> list[int]:
+    """Shortest path through all targets via dynamic programming over subsets."""
+    n = len(targets)
+    costs = [[cost(a, b) for b in targets] for a in targets]
+
+    # best[mask][j] is the shortest time for visiting the targets in mask, ending at target j
+    best = [[float("inf")] * n for _ in range(1 << n)]
+    previous = [[-1] * n for _ in range(1 << n)]
+    for j in range(n):
+        best[1 << j][j] = 0.0 if start is None else cost(start, targets[j])
+    for mask in range(1, 1 << n):
+        for j in range(n):
+            if not mask & (1 << j) or best[mask][j] == float("inf"):
+                continue
+            for k in range(n):
+                if mask & (1 << k):
+                    continue
+                time = best[mask][j] + costs[j][k]
+                if time < best[mask | (1 << k)][k]:
+                    best[mask | (1 << k)][k] = time
+                    previous[mask | (1 << k)][k] = j
+
+    # walk back from the best end
+    mask = (1 << n) - 1
+    j = min(range(n), key=lambda i: best[mask][i])
+    order = []
+    while j >= 0:
+        order.append(targets[j])
+        mask, j = mask & ~(1 << j), previous[mask][j]
+    return order[::-1]
+
+
+def _plan_greedy(start: int | None, targets: list[int], cost: Callable[[int, int], float]) -> list[int]:
+    """Nearest neighbour order, improved by swapping pairs as long as that helps."""
+    remaining = list(targets)
+    order: list[int] = []
+    current = start
+    while remaining:
+        nearest = remaining[0] if current is None else min(remaining, key=lambda p: cost(current, p))
+        remaining.remove(nearest)
+        order.append(nearest)
+        current = nearest
+
+    improved = True
+    while improved:
+        improved = False
+        for i in range(len(order) - 1):
+            for j in range(i + 1, len(order)):
+                candidate = list(order)
+                candidate[i], candidate[j] = candidate[j], candidate[i]
+                if _total(start, candidate, cost) < _total(start, order, cost) - 1e-9:
+                    order, improved = candidate, True
+    return order
+
+
+def plan_order(start: int | None, positions: Sequence[int], cost: Callable[[int, int], float]) -> list[int]:
+    """Returns the given positions in the order that minimizes the total time for moving through all of them.
+
+    Args:
+        start: Current position, or None if unknown.
+        positions: Positions to visit, duplicates are visited only once.
+        cost: Function returning the time for moving between two positions, e.g. MoveTimeModel.estimate.
+
+    Returns:
+        Positions in the order to visit them.
+    """
+    targets = list(dict.fromkeys(positions))
+    if len(targets) <= 1:
+        return targets
+    if len(targets) <= _EXACT_LIMIT:
+        return _plan_exact(start, targets, cost)
+    return _plan_greedy(start, targets, cost)
+
+
+__all__ = ["MoveTimeModel", "plan_order"]
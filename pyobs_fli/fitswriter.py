@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from astropy.io import fits
+
+from .metrics import PhaseMetrics
+
+log = logging.getLogger(__name__)
+
+# Keywords describing the layout of the original HDU, astropy sets them for the compressed HDU itself.
+_STRUCTURAL_KEYWORDS = (
+    "SIMPLE",
+    "XTENSION",
+    "BITPIX",
+    "NAXIS",
+    "NAXIS1",
+    "NAXIS2",
+    "EXTEND",
+    "PCOUNT",
+    "GCOUNT",
+    "BZERO",
+    "BSCALE",
+)
+
+# Default number of frames that may be waiting for or being compressed at the same time.
+_MAX_PENDING = 4
+
+
+def _write_compressed(
+    path: str, header: str, data: np.ndarray | tuple[str, int, tuple[int, ...], str], compression_type: str
+) -> tuple[float, int, int]:
+    """Compress a frame into a tile-compressed FITS file. Runs in a worker process.
+
+    Args:
+        path: Name of the file to write.
+        header: FITS header of the frame as string.
+        data: Pixel data, or filename, offset, shape and dtype of a memory-mapped frame, so that frames in a
+            spool don't need to be sent to the worker.
+        compression_type: Compression algorithm, e.g. RICE_1.
+
+    Returns:
+        Encode time in seconds, size of raw data and size of written file in bytes.
+    """
+    start = time.perf_counter()
+    if isinstance(data, tuple):
+        filename, offset, shape, dtype = data
+        data = np.memmap(filename, dtype=dtype, mode="r", offset=offset, shape=shape)
+    hdr = fits.Header.fromstring(header)
+    for keyword in _STRUCTURAL_KEYWORDS:
+        hdr.remove(keyword, ignore_missing=True)
+    hdu = fits.CompImageHDU(data, header=hdr, compression_type=compression_type)
+
+    # write to a temporary file first, so that nobody picks up a partial file
+    partial = path + ".part"
+    hdu.writeto(partial, overwrite=True)
+    os.replace(partial, path)
+    return time.perf_counter() - start, data.nbytes, os.path.getsize(path)
+
+
+class CompressedFitsWriter:
+    """Writes frames as tile-compressed FITS files in the background, using a pool of worker processes.
+
+    If too many frames are still pending, submit() waits for a free slot, so that a slow disk or CPU slows down
+    the caller instead of piling up frames in memory. With drop_when_full, the new frame is dropped and counted
+    instead, so that the caller never has to wait. Encode time and compression ratio are logged for every frame
+    and collected in snapshot().
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        workers: int = 1,
+        max_pending: int = _MAX_PENDING,
+        compression_type: str = "RICE_1",
+        drop_when_full: bool = False,
+    ):
+        """Initializes a new writer. Worker processes are only started with the first frame.
+
+        Args:
+            directory: Directory to write files to.
+            workers: Number of worker processes.
+            max_pending: Maximum number of frames waiting for or being compressed.
+            compression_type: Tile compression algorithm, one of RICE_1, GZIP_1, GZIP_2, HCOMPRESS_1 or PLIO_1.
+            drop_when_full: Whether to drop frames while max_pending frames are pending, instead of waiting.
+        """
+        self._directory = Path(directory)
+        self._workers = workers
+        self._max_pending = max_pending
+        self._compression_type = compression_type
+        self._drop_when_full = drop_when_full
+        self._pool: ProcessPoolExecutor | None = None
+        self._pending: dict[asyncio.Future[tuple[float, int, int]], np.ndarray] = {}
+        self._metrics = PhaseMetrics()
+        self._raw_bytes = 0
+        self._compressed_bytes = 0
+        self._last_ratio = 0.0
+
+    @property
+    def pending(self) -> int:
+        """Number of frames waiting for or being compressed."""
+        return len(self._pending)
+
+    @property
+    def full(self) -> bool:
+        """Whether the next frame would have to wait or be dropped."""
+        return len(self._pending) >= self._max_pending
+
+    async def submit(self, data: np.ndarray, header: fits.Header, filename: str) -> bool:
+        """Queue a frame for writing, waiting for a free slot first, if too many frames are pending.
+
+        The frame is referenced until it has been written, so a buffer from a pool or spool isn't reused before.
+
+        Args:
+            data: Pixel data of the frame.
+            header: FITS header of the frame.
+            filename: Name of the file in the output directory.
+
+        Returns:
+            Whether the frame has been queued, False if it has been dropped.
+        """
+        if self.full:
+            if self._drop_when_full:
+                log.warning("Compressed FITS writer is busy, dropping frame %s.", filename)
+                self._metrics.increment("dropped")
+                return False
+            log.warning("Compressed FITS writer is busy, waiting to queue frame %s.", filename)
+            start = time.monotonic()
+            while self.full:
+                await asyncio.wait(list(self._pending), return_when=asyncio.FIRST_COMPLETED)
+            self._metrics.observe("wait", time.monotonic() - start)
+        if self._pool is None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            # worker processes are spawned, since forking a process with running SDK threads isn't safe
+            self._pool = ProcessPoolExecutor(self._workers, mp_context=multiprocessing.get_context("spawn"))
+
+        # frames in a spool are mapped by the worker instead of being sent to it
+        payload: np.ndarray | tuple[str, int, tuple[int, ...], str] = data
+        if isinstance(data, np.memmap) and data.filename is not None and data.flags.c_contiguous:
+            payload = (str(data.filename), data.offset, data.shape, data.dtype.str)
+
+        path = str(self._directory / filename)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(
+            self._pool, _write_compressed, path, header.tostring(), payload, self._compression_type
+        )
+        self._pending[future] = data
+        submitted = time.monotonic()
+        future.add_done_callback(lambda f: self._done(f, path, submitted))
+        return True
+
+    def _done(self, future: asyncio.Future[tuple[float, int, int]], path: str, submitted: float) -> None:
+        del self._pending[future]
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            log.error("Could not write %s: %s", path, future.exception())
+            self._metrics.increment("errors")
+            return
+
+        encode_time, raw_bytes, compressed_bytes = future.result()
+        self._last_ratio = raw_bytes / compressed_bytes
+        self._raw_bytes += raw_bytes
+        self._compressed_bytes += compressed_bytes
+        self._metrics.observe("encode", encode_time)
+        self._metrics.observe("latency", time.monotonic() - submitted)
+        self._metrics.increment("written")
+        log.info("Wrote %s in %.3fs with compression ratio %.2f.", path, encode_time, self._last_ratio)
+
+    async def drain(self) -> None:
+        """Wait for all pending frames to be written."""
+        if self._pending:
+            await asyncio.wait(list(self._pending))
+
+    async def close(self) -> None:
+        """Write all pending frames and shut down the worker processes."""
+        await self.drain()
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns counters, wait, encode and latency statistics, and compression ratios of the last and all
+        frames."""
+        return {
+            **self._metrics.snapshot(),
+            "pending": self.pending,
+            "ratio": {
+                "last": self._last_ratio,
+                "total": self._raw_bytes / self._compressed_bytes if self._compressed_bytes else 0.0,
+            },
+        }
+
+
+__all__ = ["CompressedFitsWriter"]
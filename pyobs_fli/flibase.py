@@ -1,20 +1,28 @@
 import asyncio
+import contextlib
 import logging
-import threading
+import time
 from collections.abc import Callable
 from typing import Any, TypeVar, cast
 
 from pyobs_fli.flidriver import DeviceType
+from pyobs_fli.registry import DeviceRegistry
+from pyobs_fli.sdkworker import SdkWorker, SdkWorkerStats
 
 log = logging.getLogger(__name__)
 
 _T = TypeVar("_T")
 
-# FLI SDK calls are blocking and are made directly on the event loop thread (see _run_blocking).
+# FLI SDK calls are blocking and are run on a per-device worker thread (see _run_blocking).
 # If the device has gone unresponsive, they can hang indefinitely, so they're bounded with a
 # timeout rather than let a single dead device freeze the whole module.
 _SDK_CALL_TIMEOUT = 5.0
 
+# Seconds to wait before trying again to reopen a lost device, doubled after every failed attempt up to the
+# maximum, so that an unplugged device isn't hammered with open calls.
+_RECONNECT_DELAY = 1.0
+_RECONNECT_MAX_DELAY = 60.0
+
 
 class FliBaseMixin:
     """A base class for pyobs module for FLI devices."""
@@ -26,20 +34,27 @@ class FliBaseMixin:
         dev_type: DeviceType,
         dev_name: str | None = None,
         dev_path: str | None = None,
+        dev_serial: str | None = None,
         keep_alive_ping: int = 10,
         sdk_call_timeout: float = _SDK_CALL_TIMEOUT,
+        simulation: dict[str, Any] | None = None,
         **kwargs: Any,
     ):
         """Initializes a new FLI device mixin.
 
-        If neither dev_name nor dev_path are given, the first found device is used.
+        If dev_serial is given, the device with that serial is used, otherwise the one matching dev_name or
+        dev_path. If none of them are given, the first found device is used.
 
         Args:
             dev_type: Device type.
             dev_name: Optional name for device.
             dev_path: Optional path to device.
-            keep_alive_ping: Interval for keep alive ping.
+            dev_serial: Optional serial of device.
+            keep_alive_ping: Interval for keep alive ping. The device is only pinged, if there hasn't been any
+                other successful SDK call within this interval, and never while it is busy.
             sdk_call_timeout: Default timeout for blocking FLI SDK calls.
+            simulation: If given, a simulated device is used instead of real hardware, configured with these
+                parameters (see SimulatedFliDriver).
         """
         from .flidriver import FliDriver  # type: ignore
 
@@ -47,10 +62,15 @@ class FliBaseMixin:
         self._dev_type = dev_type
         self._dev_name = dev_name
         self._dev_path = dev_path
+        self._dev_serial = dev_serial
         self._keep_alive_ping = keep_alive_ping
         self._sdk_call_timeout = sdk_call_timeout
+        self._simulation = simulation
         self._driver: FliDriver | None = None
         self._device: Any | None = None
+        self._serial: str | None = None
+        self._last_success = 0.0
+        self._sdk_worker = SdkWorker(name=f"fli-sdk-{dev_name or dev_path or dev_type.name.lower()}")
 
         # keep alive
         self.add_background_task(self._keep_alive)  # type: ignore[attr-defined]
@@ -61,41 +81,27 @@ class FliBaseMixin:
         super().__init__(**kwargs)  # type: ignore[call-arg]
 
     async def _run_blocking(self, func: Callable[[], None], timeout: float | None = None) -> bool:
-        """Run a blocking FLI SDK call in a daemon thread, so a hung call can't freeze the module.
+        """Run a blocking FLI SDK call on the device's worker thread, so a hung call can't freeze the module.
 
-        A plain executor isn't used here, since its worker threads are non-daemon and Python joins
-        them on interpreter shutdown -- a hung call would then just move the freeze to process exit.
+        All calls for the device are queued on a single long-lived daemon thread. A plain executor isn't used
+        here, since its worker threads are non-daemon and Python joins them on interpreter shutdown -- a hung
+        call would then just move the freeze to process exit.
 
         Args:
             func: Blocking callable to run off the event loop.
-            timeout: Seconds to wait for completion. Defaults to sdk_call_timeout.
+            timeout: Seconds the call may run, not counting the time it waits for earlier calls. Defaults
+                to sdk_call_timeout.
 
         Returns:
             True if func completed within timeout, False if it's still running in the background.
         """
         timeout = self._sdk_call_timeout if timeout is None else timeout
-        loop = asyncio.get_running_loop()
-        future: asyncio.Future[None] = loop.create_future()
+        return await self._sdk_worker.run(func, timeout)
 
-        def _complete() -> None:
-            # The worker thread may outlive the timeout (wait_for cancels the future on
-            # timeout), so guard against a late set_result on an already-completed future --
-            # otherwise the loop callback raises InvalidStateError.
-            if not future.done():
-                future.set_result(None)
-
-        def _wrapper() -> None:
-            try:
-                func()
-            finally:
-                loop.call_soon_threadsafe(_complete)
-
-        threading.Thread(target=_wrapper, daemon=True).start()
-        try:
-            await asyncio.wait_for(future, timeout=timeout)
-            return True
-        except TimeoutError:
-            return False
+    @property
+    def sdk_stats(self) -> SdkWorkerStats:
+        """Counters for the SDK calls of this device: queue depth, call latency and stuck calls."""
+        return self._sdk_worker.stats
 
     async def _run_blocking_or_raise(self, func: Callable[[], _T], timeout: float | None = None) -> _T:
         """Run a blocking FLI SDK call in a thread, returning its result or re-raising what it raised.
@@ -123,42 +129,55 @@ class FliBaseMixin:
         value = outcome[0]
         if isinstance(value, BaseException):
             raise value
+        self._last_success = time.monotonic()
         return cast(_T, value)
 
-    async def open(self) -> None:
-        """Open module."""
+    def _is_busy(self) -> bool:
+        """Whether the device is busy, e.g. exposing or moving, and must not be disturbed by keep-alive pings."""
+        return False
+
+    def _driver_class(self) -> Any:
+        """Returns the driver class to use, i.e. FliDriver or SimulatedFliDriver."""
         from .flidriver import FliDriver
 
-        def _open() -> None:
-            # list devices
-            devices = FliDriver.list_devices(self._dev_type)
-            if len(devices) == 0:
-                raise ValueError("No FLI device found.")
-
-            # do we have a device name or path given?
-            if self._dev_name is not None or self._dev_path is not None:
-                # yes, find matching device
-                for dev in devices:
-                    if dev.name.decode("utf-8") == self._dev_name or dev.filename.decode("utf-8") == self._dev_path:
-                        self._device = dev
-                        break
-                else:
-                    raise ValueError("No matching device found, check dev_name/dev_path.")
-
-            else:
-                # no, just pick first one
-                self._device = devices[0]
-
-            # open driver
-            log.info(
-                'Opening connection to "%s" at %s...',
-                self._device.name.decode("utf-8"),
-                self._device.filename.decode("utf-8"),
-            )
-            self._driver = FliDriver(self._device)
-            self._driver.open()
-
-        await self._run_blocking_or_raise(_open)
+        if self._simulation is None:
+            return FliDriver
+
+        from .flisim import SimulatedFliDriver
+
+        return SimulatedFliDriver
+
+    def _new_driver(self, device: Any) -> Any:
+        """Create a new (unopened) driver for the given device."""
+        if self._simulation is None:
+            return self._driver_class()(device)
+        return self._driver_class()(device, **self._simulation)
+
+    def _registry(self) -> DeviceRegistry:
+        """Returns the device registry shared by all modules using the same driver class."""
+        return DeviceRegistry.shared(self._driver_class())
+
+    def _open_device(self, serial: str | None) -> None:
+        """Find the device in the registry and open a new driver for it, blocking."""
+        registry = self._registry()
+        self._device = registry.find(self._dev_type, name=self._dev_name, path=self._dev_path, serial=serial)
+
+        # open driver
+        log.info(
+            'Opening connection to "%s" at %s...',
+            self._device.name.decode("utf-8"),
+            self._device.filename.decode("utf-8"),
+        )
+        self._driver = self._new_driver(self._device)
+        self._driver.open()
+
+        # remember serial, so that the device can be found again, even if its path changes after a replug
+        self._serial = self._driver.get_properties().serial
+        registry.remember_serial(self._device, self._serial)
+
+    async def open(self) -> None:
+        """Open module."""
+        await self._run_blocking_or_raise(lambda: self._open_device(self._dev_serial))
 
     async def close(self) -> None:
         # not open?
@@ -169,29 +188,46 @@ class FliBaseMixin:
                 log.error("Timed out closing FLI device after %.1fs.", _SDK_CALL_TIMEOUT)
             self._driver = None
 
-    async def _keep_alive(self) -> None:
-        """Keep connection to camera alive."""
-        from .flidriver import FliDriver
+        # let the worker thread finish whatever is still queued and exit
+        self._sdk_worker.stop()
 
+    async def _keep_alive(self) -> None:
+        """Keep connection to device alive."""
         while True:
-            # is there a valid driver?
-            if self._driver is not None:
-                # then we should be able to call it
-                driver = self._driver
+            # ping the device, unless another call has recently succeeded or it's busy
+            driver = self._driver
+            idle = time.monotonic() - self._last_success
+            if driver is not None and idle >= self._keep_alive_ping and not self._is_busy():
                 try:
-                    await self._run_blocking_or_raise(driver.get_serial_string)
+                    await self._run_blocking_or_raise(driver.ping)
                 except (ValueError, OSError):
                     # no? then reopen driver
-                    log.warning("Lost connection to camera, reopening it.")
+                    log.warning("Lost connection to device, reopening it.")
+                    await self._reconnect()
 
-                    def _reopen() -> None:
-                        driver.close()
-                        self._driver = FliDriver(self._device)
-                        self._driver.open()
+            await asyncio.sleep(self._keep_alive_ping)
 
-                    await self._run_blocking_or_raise(_reopen)
+    async def _reconnect(self) -> None:
+        """Reopen the device until it succeeds, waiting exponentially longer after every failed attempt."""
+        delay = _RECONNECT_DELAY
+        while True:
 
-            await asyncio.sleep(self._keep_alive_ping)
+            def _reopen() -> None:
+                # the old driver may be gone already, and the new driver queries the static properties again
+                if self._driver is not None:
+                    with contextlib.suppress(ValueError):
+                        self._driver.close()
+                    self._driver = None
+                self._open_device(self._dev_serial or self._serial)
+
+            try:
+                await self._run_blocking_or_raise(_reopen)
+                log.info("Reconnected to device.")
+                return
+            except (ValueError, OSError) as e:
+                log.warning("Could not reopen device, trying again in %.0fs: %s", delay, e)
+            await asyncio.sleep(delay)
+            delay = min(2 * delay, _RECONNECT_MAX_DELAY)
 
 
 __all__ = ["FliBaseMixin"]
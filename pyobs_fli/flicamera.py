@@ -1,27 +1,84 @@
 import asyncio
+import contextlib
 import logging
 import math
+import os
+import threading
 import time
-from datetime import UTC, datetime
-from typing import Any
+from collections.abc import AsyncGenerator, Callable, Sequence
+from datetime import UTC, datetime, timedelta
+from typing import Any, NamedTuple
 
 import numpy as np
 from pyobs.images import Image
-from pyobs.interfaces import IAbortable, IBinning, ICamera, ICooling, ITemperatures, IWindow
+from pyobs.interfaces import (
+    IAbortable,
+    IBinning,
+    ICamera,
+    ICooling,
+    IExposure,
+    IFitsHeaderBefore,
+    ITemperatures,
+    IWindow,
+)
 from pyobs.interfaces.IBinning import Binning, BinningCapabilities, BinningState
 from pyobs.interfaces.ICooling import CoolingState
+from pyobs.interfaces.IExposure import ExposureState
 from pyobs.interfaces.ITemperatures import SensorReading, TemperaturesState
 from pyobs.interfaces.IWindow import WindowCapabilities, WindowState
 from pyobs.modules.camera.basecamera import BaseCamera
 from pyobs.utils import exceptions as exc
 from pyobs.utils.enums import ExposureStatus
 
+from .bufferpool import _MAX_POOL_BYTES, ImageBufferPool
+from .fitswriter import _MAX_PENDING, CompressedFitsWriter
 from .flibase import FliBaseMixin
-from .flidriver import DeviceType
+from .flidriver import DeviceProperties, DeviceType, ExternalTrigger, FrameStats
+from .metrics import PhaseMetrics
+from .spool import _MAX_SPOOL_BYTES, FrameSpool
+from .telemetry import TelemetryHistory, TelemetrySample
+from .videobuffer import VideoFrame, VideoRingBuffer
 
 log = logging.getLogger(__name__)
 
-_READOUT_TIMEOUT = 60.0
+# Readout is done in blocks of rows, each of which has to arrive within this time.
+_READOUT_BLOCK_TIMEOUT = 10.0
+
+# Longest single wait for the end of an exposure in seconds, the SDK worker is blocked for that long.
+_WAIT_CHUNK = 0.5
+
+# While the CCD temperature is further than this from the setpoint, or changed by more than this since the last
+# sample, cooling is considered to be settling and telemetry gets polled more often.
+_SETTLED_TOLERANCE = 0.5
+
+# Flushes before an exposure that doesn't start from background flushing, if nflushes isn't set. One flush clears
+# the sensor, after background flushing was disabled for a lower number of flushes.
+_DEFAULT_NFLUSHES = 1
+
+# A readout consumer gets called with the index of the first row and a view on each block of rows.
+ReadoutConsumer = Callable[[int, np.ndarray], None]
+
+
+class _ArmedExposure(NamedTuple):
+    """An exposure that was already started for the next frame of a sequence."""
+
+    settings: tuple[Any, ...]
+    date_obs: str
+    dead_time: float
+    started: float
+    start_duration: float
+
+
+# FITS keywords for the timing of the phases of an exposure, if enabled.
+_TIMING_HEADERS = {
+    "prepare": ("TIM-PREP", "Time for configuring camera [s]"),
+    "start": ("TIM-STRT", "Time for starting exposure [s]"),
+    "wait": ("TIM-WAIT", "Time waiting for end of exposure [s]"),
+    "latency": ("TIM-LAT", "Delay of detecting end of exposure [s]"),
+    "readout": ("TIM-READ", "Time for readout [s]"),
+    "headers": ("TIM-HDR", "Time for querying header values [s]"),
+    "statistics": ("TIM-STAT", "Time for creating image and headers [s]"),
+}
 
 
 class FliCamera(BaseCamera, FliBaseMixin, ICamera, IWindow, IBinning, ICooling, ITemperatures, IAbortable):
@@ -29,11 +86,73 @@ class FliCamera(BaseCamera, FliBaseMixin, ICamera, IWindow, IBinning, ICooling,
 
     __module__ = "pyobs_fli"
 
-    def __init__(self, setpoint: float = -20.0, **kwargs: Any):
+    def __init__(
+        self,
+        setpoint: float | None = -20.0,
+        buffer_pool_bytes: int = _MAX_POOL_BYTES,
+        readout_block_rows: int = 256,
+        pipeline_sequences: bool = True,
+        saturation_level: int | None = None,
+        histogram_bins: int = 0,
+        stats_stride: int = 1,
+        telemetry_history: int = 360,
+        temp_deadband: float = 0.1,
+        power_deadband: float = 1.0,
+        poll_interval_fast: float = 2.0,
+        poll_interval_slow: float = 10.0,
+        timing_headers: bool = False,
+        spool_dir: str | None = None,
+        spool_bytes: int = _MAX_SPOOL_BYTES,
+        fits_dir: str | None = None,
+        fits_workers: int = 1,
+        fits_max_pending: int = _MAX_PENDING,
+        fits_drop_when_full: bool = False,
+        fits_compression: str = "RICE_1",
+        nflushes: int | None = None,
+        background_flush: bool = False,
+        background_nflushes: int = 0,
+        trigger: str | None = None,
+        trigger_timeout: float = 60.0,
+        **kwargs: Any,
+    ):
         """Initializes a new FliCamera.
 
         Args:
-            setpoint: Cooling temperature setpoint.
+            setpoint: Cooling temperature setpoint, None to leave cooling alone.
+            buffer_pool_bytes: Memory cap for recycled image buffers, 0 to allocate a new one for every frame.
+            readout_block_rows: Number of rows read out per block, each of which is passed to readout consumers.
+            pipeline_sequences: Whether to start the next exposure of a sequence right after the readout of
+                the current one, so that post-processing overlaps with it. Since BaseCamera only requests FITS
+                headers from other modules after that, sequences aren't pipelined while any module provides
+                headers from before an exposure.
+            saturation_level: If set, pixels at or above this value are counted as saturated in NSATPIX.
+            histogram_bins: Number of bins for the histogram of each frame, 0 for none.
+            stats_stride: Compute frame statistics only from every n-th pixel of every n-th row.
+            telemetry_history: Number of telemetry samples to keep in memory.
+            temp_deadband: Temperature change in degrees Celsius that triggers publishing a new state.
+            power_deadband: Cooler power change in percent that triggers publishing a new state.
+            poll_interval_fast: Telemetry poll interval in seconds while the CCD temperature is settling.
+            poll_interval_slow: Telemetry poll interval in seconds once the CCD temperature is stable.
+            timing_headers: Whether to add the durations of the phases of each exposure to its FITS header.
+            spool_dir: If given, frames are read out into memory-mapped files in this directory, e.g. on a local
+                SSD or tmpfs, instead of into RAM. buffer_pool_bytes is ignored then.
+            spool_bytes: Maximum size of all frames in the spool directory.
+            fits_dir: If given, every finished frame is also written to this directory as tile-compressed FITS
+                file by a pool of worker processes.
+            fits_workers: Number of worker processes for compressing frames.
+            fits_max_pending: Maximum number of frames waiting for compression, before the next finished frame
+                has to wait for a free slot.
+            fits_drop_when_full: Whether frames that would have to wait for compression are not written to
+                fits_dir instead, so that the exposure loop never has to wait.
+            fits_compression: Tile compression algorithm, e.g. RICE_1 or GZIP_2.
+            nflushes: Number of times the CCD is flushed before each exposure, None for the camera's default.
+                Fewer flushes give higher cadences, e.g. for guiding.
+            background_flush: Whether to keep the CCD clean by flushing it continuously while the camera is idle.
+            background_nflushes: Number of flushes before an exposure that starts from background flushing, so
+                that exposures start with as little latency as possible.
+            trigger: If set, exposures are armed and only start on the given edge ("low" or "high") of the
+                external trigger input, or from trigger_exposure().
+            trigger_timeout: Seconds to wait for the trigger of an armed exposure.
         """
         super().__init__(dev_type=DeviceType.CAMERA, **kwargs)
 
@@ -42,6 +161,68 @@ class FliCamera(BaseCamera, FliBaseMixin, ICamera, IWindow, IBinning, ICooling,
         self._full_frame = (0, 0, 0, 0)
         self._window = (0, 0, 0, 0)
         self._binning = (1, 1)
+        self._buffer_pool: ImageBufferPool | FrameSpool = (
+            ImageBufferPool(max_bytes=buffer_pool_bytes)
+            if spool_dir is None
+            else FrameSpool(spool_dir, max_bytes=spool_bytes)
+        )
+        self._fits_writer = (
+            None
+            if fits_dir is None
+            else CompressedFitsWriter(
+                fits_dir,
+                workers=fits_workers,
+                max_pending=fits_max_pending,
+                compression_type=fits_compression,
+                drop_when_full=fits_drop_when_full,
+            )
+        )
+        self._readout_block_rows = readout_block_rows
+        self._readout_consumers: list[ReadoutConsumer] = []
+
+        # flushing of the CCD
+        self._nflushes = nflushes
+        self._background_flush = background_flush
+        self._background_nflushes = background_nflushes
+        self._background_flushing = False
+
+        # armed exposures, started by a trigger
+        if trigger is not None and trigger.upper() not in ExternalTrigger.__members__:
+            raise ValueError(f"Unknown trigger edge {trigger}, must be low or high.")
+        self._trigger = None if trigger is None else ExternalTrigger[trigger.upper()]
+        self._trigger_timeout = trigger_timeout
+        self._trigger_armed_at: float | None = None
+        self._triggered_at: tuple[float, datetime] | None = None
+
+        # frame statistics, accumulated during readout
+        self._saturation_level = saturation_level
+        self._histogram_bins = histogram_bins
+        self._stats_stride = stats_stride
+        self._frame_stats: FrameStats | None = None
+
+        # telemetry
+        self._telemetry = TelemetryHistory(size=telemetry_history)
+        self._temp_deadband = temp_deadband
+        self._power_deadband = power_deadband
+        self._poll_interval_fast = poll_interval_fast
+        self._poll_interval_slow = poll_interval_slow
+        self._published_telemetry: tuple[float, bool, TelemetrySample] | None = None
+
+        # timing of exposure phases
+        self._metrics = PhaseMetrics()
+        self._timing_headers = timing_headers
+
+        # video mode
+        self._video_ring: VideoRingBuffer | None = None
+        self._video_thread: threading.Thread | None = None
+        self._video_stop = threading.Event()
+        self._video_exposure_time = 0.0
+
+        # pipelined sequences
+        self._pipeline_sequences = pipeline_sequences
+        self._sequence_delay = 0.0
+        self._armed: _ArmedExposure | None = None
+        self._dead_time: float | None = None
 
         self.add_background_task(self._poll_cooling)
 
@@ -55,14 +236,13 @@ class FliCamera(BaseCamera, FliBaseMixin, ICamera, IWindow, IBinning, ICooling,
 
         driver = self._driver
 
-        def _get_info() -> tuple[str, tuple[int, int, int, int], tuple[int, int], tuple[int, int, int, int]]:
-            serial = driver.get_serial_string()
+        def _get_info() -> tuple[DeviceProperties, tuple[int, int, int, int], tuple[int, int]]:
             window, binning = driver.get_window_binning()
-            full_frame = driver.get_full_frame()
-            return serial, window, binning, full_frame
+            return driver.get_properties(), window, binning
 
-        serial, self._window, self._binning, self._full_frame = await self._run_blocking_or_raise(_get_info)
-        log.info("Connected to camera with serial number: %s", serial)
+        properties, self._window, self._binning = await self._run_blocking_or_raise(_get_info)
+        self._full_frame = properties.full_frame
+        log.info("Connected to %s camera with serial number: %s", properties.model, properties.serial)
 
         if self._temp_setpoint is not None:
             await self.set_cooling(True, self._temp_setpoint)
@@ -92,11 +272,27 @@ class FliCamera(BaseCamera, FliBaseMixin, ICamera, IWindow, IBinning, ICooling,
         )
         await self.comm.set_state(IBinning, BinningState(x=self._binning[0], y=self._binning[1]))
         await self.comm.set_state(ITemperatures, TemperaturesState())
+        await self._start_background_flush()
 
     async def close(self) -> None:
         """Close the module."""
+        await self.stop_video()
         await BaseCamera.close(self)
         await FliBaseMixin.close(self)
+        if self._fits_writer is not None:
+            await self._fits_writer.close()
+        self._buffer_pool.clear()
+
+    async def _reconnect(self) -> None:
+        """Reopen the camera, background flushing has to be started again on the new connection."""
+        self._background_flushing = False
+        await FliBaseMixin._reconnect(self)
+        if self._camera_status == ExposureStatus.IDLE and self._video_thread is None:
+            await self._start_background_flush()
+
+    def _is_busy(self) -> bool:
+        """Whether the camera is exposing, reading out or in video mode, so keep-alive pings must wait."""
+        return self._video_thread is not None or self._camera_status != ExposureStatus.IDLE
 
     async def set_window(self, left: int, top: int, width: int, height: int, **kwargs: Any) -> None:
         """Set the camera window."""
@@ -115,6 +311,8 @@ class FliCamera(BaseCamera, FliBaseMixin, ICamera, IWindow, IBinning, ICooling,
 
         if self._driver is None:
             raise ValueError("No camera driver.")
+        if self._video_thread is not None:
+            raise exc.DeviceBusyError("Cannot expose while camera is in video mode.")
         driver = self._driver
 
         log.info("Set binning to %dx%d.", self._binning[0], self._binning[1])
@@ -131,49 +329,141 @@ class FliCamera(BaseCamera, FliBaseMixin, ICamera, IWindow, IBinning, ICooling,
             self._window[1],
         )
 
-        def _prepare() -> None:
-            driver.set_binning(*self._binning)
-            driver.set_window(self._window[0], self._window[1], width, height)
-            driver.init_exposure(open_shutter)
-            driver.set_exposure_time(int(exposure_time * 1000.0))
+        # has this exposure already been started right after the readout of the previous frame of a sequence?
+        settings = (self._window, self._binning, exposure_time, open_shutter)
+        timings: dict[str, float] = {}
+        armed, self._armed = self._armed, None
+        if armed is not None and armed.settings == settings:
+            log.info("Exposure was already started %.3fs after the previous readout.", armed.dead_time)
+            date_obs = armed.date_obs
+            self._dead_time = armed.dead_time
+            timings["prepare"], timings["start"] = 0.0, armed.start_duration
+            exposure_start = armed.started
+        else:
+            if armed is not None:
+                log.info("Settings changed during sequence, restarting exposure...")
+                await self._abort_exposure()
 
-        await self._run_blocking_or_raise(_prepare)
+            # starting the exposure stops background flushing, if it's running
+            clean, self._background_flushing = self._background_flushing, False
 
-        log.info(
-            "Starting exposure with %s shutter for %.2f seconds...", "open" if open_shutter else "closed", exposure_time
-        )
-        date_obs = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%S.%f")
+            def _prepare() -> None:
+                self._configure(driver, width, height, exposure_time, open_shutter, clean=clean, armed=True)
+
+            phase_start = time.monotonic()
+            await self._run_blocking_or_raise(_prepare)
+            timings["prepare"] = time.monotonic() - phase_start
+
+            log.info(
+                "Starting exposure with %s shutter for %.2f seconds...",
+                "open" if open_shutter else "closed",
+                exposure_time,
+            )
+            date_obs = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%S.%f")
+            phase_start = time.monotonic()
+            await self._run_blocking_or_raise(driver.start_exposure)
+            exposure_start = time.monotonic()
+            timings["start"] = exposure_start - phase_start
+            if clean:
+                self._metrics.observe("start_background_flush", timings["start"])
+            self._dead_time = None
+            if self._trigger is not None:
+                self._arm_trigger(exposure_start)
+
+        phase_start = time.monotonic()
+        try:
+            await self._wait_exposure(abort_event, exposure_time, open_shutter)
+        except exc.AbortedError:
+            self._metrics.increment("aborted")
+            self._trigger_armed_at = None
+            raise
+        timings["wait"] = time.monotonic() - phase_start
 
-        await self._run_blocking_or_raise(driver.start_exposure)
-        await self._wait_exposure(abort_event, exposure_time, open_shutter)
+        # an armed exposure only started with its trigger
+        trigger_source: str | None = None
+        if self._trigger is not None:
+            armed_at, self._trigger_armed_at = self._trigger_armed_at, None
+            triggered, self._triggered_at = self._triggered_at, None
+            if triggered is not None:
+                trigger_source = "software"
+                exposure_start, start_time = triggered
+                if armed_at is not None:
+                    timings["trigger_wait"] = exposure_start - armed_at
+            else:
+                # the edge on the trigger input can only be inferred from the end of the exposure, so there's no
+                # latency to measure either
+                trigger_source = "external"
+                start_time = datetime.now(UTC) - timedelta(seconds=exposure_time)
+            date_obs = start_time.strftime("%Y-%m-%dT%H:%M:%S.%f")
+        if trigger_source != "external":
+            timings["latency"] = max(0.0, time.monotonic() - exposure_start - exposure_time)
 
         log.info("Exposure finished, reading out...")
         await self._change_exposure_status(ExposureStatus.READOUT)
+        exposure_end = time.monotonic()
         width = int(math.floor(self._window[2] / self._binning[0]))
         height = int(math.floor(self._window[3] / self._binning[1]))
 
-        def _readout() -> np.ndarray:
-            img = np.zeros((height, width), dtype=np.uint16)
-            for row in range(height):
-                img[row, :] = driver.grab_row(width)
-            return img
+        # every row gets overwritten by the readout, so a recycled buffer doesn't need to be zeroed first, and
+        # with a spool, the frame is read out straight into its file and handed on without copying
+        img = self._buffer_pool.acquire((height, width))
+        stats = FrameStats(
+            saturation=self._saturation_level, histogram_bins=self._histogram_bins, stride=self._stats_stride
+        )
 
         try:
-            img = await self._run_blocking_or_raise(_readout, timeout=_READOUT_TIMEOUT)
+            async with contextlib.aclosing(self._readout_blocks(img, stats)) as blocks:
+                async for first_row, block in blocks:
+                    for consumer in self._readout_consumers:
+                        try:
+                            consumer(first_row, block)
+                        except Exception:
+                            log.exception("Readout consumer failed.")
         except Exception:
-            log.error("Readout failed, cancelling exposure.")
-            await self._abort_exposure()
+            # the exposure has already been cancelled by _readout_blocks()
+            log.error("Readout failed.")
+            self._metrics.increment("readout_errors")
             raise
+        timings["readout"] = time.monotonic() - exposure_end
+
+        # more frames to come in this sequence? then start the next exposure right away, so that querying the
+        # headers and statistics below -- and everything BaseCamera does with this frame -- overlaps with it
+        if (
+            self._pipeline_sequences
+            and self._sequence_count_left > 1
+            and self._sequence_delay == 0
+            and not await self.comm.clients_with_interface(IFitsHeaderBefore)
+        ):
+            nflushes = self._nflushes_for(clean=False)
+
+            def _start_next() -> None:
+                # the sensor hasn't been kept clean in the meantime
+                if nflushes is not None:
+                    driver.set_nflushes(nflushes)
+                driver.start_exposure()
+
+            next_date_obs = datetime.now(UTC).strftime("%Y-%m-%dT%H:%M:%S.%f")
+            phase_start = time.monotonic()
+            await self._run_blocking_or_raise(_start_next)
+            started = time.monotonic()
+            self._armed = _ArmedExposure(
+                settings, next_date_obs, started - exposure_end, started, started - phase_start
+            )
+            if self._trigger is not None:
+                self._arm_trigger(started)
 
         def _get_headers() -> tuple[float, float, tuple[int, int, int, int]]:
             return (
                 driver.get_temp(FliTemperature.CCD),
                 driver.get_cooler_power(),
-                driver.get_visible_frame(),
+                driver.get_properties().visible_frame,
             )
 
+        phase_start = time.monotonic()
         ccd_temp, cooler_power, visible_frame = await self._run_blocking_or_raise(_get_headers)
+        timings["headers"] = time.monotonic() - phase_start
 
+        phase_start = time.monotonic()
         image = Image(img)  # type: ignore[arg-type]
         image.header["DATE-OBS"] = (date_obs, "Date and time of start of exposure")
         image.header["EXPTIME"] = (exposure_time, "Exposure time [s]")
@@ -185,37 +475,420 @@ class FliCamera(BaseCamera, FliBaseMixin, ICamera, IWindow, IBinning, ICooling,
         image.header["YBINNING"] = image.header["DET-BIN2"] = (self._binning[1], "Binning factor used on Y axis")
         image.header["XORGSUBF"] = (self._window[0], "Subframe origin on X axis")
         image.header["YORGSUBF"] = (self._window[1], "Subframe origin on Y axis")
-        image.header["DATAMIN"] = (float(np.min(img)), "Minimum data value")
-        image.header["DATAMAX"] = (float(np.max(img)), "Maximum data value")
-        image.header["DATAMEAN"] = (float(np.mean(img)), "Mean data value")
+        # an empty window has no statistics, and a FITS header can't hold a NaN mean
+        if stats.count > 0:
+            image.header["DATAMIN"] = (float(stats.min), "Minimum data value")
+            image.header["DATAMAX"] = (float(stats.max), "Maximum data value")
+            image.header["DATAMEAN"] = (stats.mean, "Mean data value")
+        if self._stats_stride > 1:
+            image.header["STATSTEP"] = (self._stats_stride, "Pixel stride used for data statistics")
+        if self._saturation_level is not None:
+            image.header["NSATPIX"] = (stats.saturated, "Number of saturated pixels")
+        self._frame_stats = stats
+        if trigger_source is not None:
+            image.header["TRIGGER"] = (trigger_source, "Source of trigger that started exposure")
+        if self._dead_time is not None:
+            image.header["DEADTIME"] = (self._dead_time, "Time since end of previous exposure [s]")
 
         self.set_biassec_trimsec(image.header, *visible_frame)
+        timings["statistics"] = time.monotonic() - phase_start
+
+        # record timings
+        for phase, duration in timings.items():
+            self._metrics.observe(phase, duration)
+        self._metrics.increment("frames")
+        if self._timing_headers:
+            for phase, (key, comment) in _TIMING_HEADERS.items():
+                if phase in timings:
+                    image.header[key] = (round(timings[phase], 6), comment)
 
         log.info("Readout finished.")
         return image
 
-    async def _wait_exposure(self, abort_event: asyncio.Event, exposure_time: float, open_shutter: bool) -> None:
+    async def _run_data_pipeline(self, image: Image, pipeline: str | None) -> Image:
+        """Run the data pipeline on a frame and pass the result on to _frame_finished().
+
+        BaseCamera runs the pipeline after all headers have been added and right before storing the frame, so
+        this is where the finished frame is available.
+        """
+        image = await super()._run_data_pipeline(image, pipeline)
+        await self._frame_finished(image)
+        return image
+
+    async def _frame_finished(self, image: Image) -> None:
+        """Called with every finished frame, before BaseCamera stores it. Queues the frame for the compressed
+        FITS writer, if any, which may wait for a free slot and so slow down a running sequence.
+
+        Args:
+            image: Finished frame with all headers.
+        """
+        if self._fits_writer is None or image.data is None:
+            return
+        # same name as the stored frame, BaseCamera formats it again right after with the same result
+        filename = self.format_filename(image)
+        name = os.path.basename(filename) if filename else image.header["DATE-OBS"].replace(":", "-") + ".fits"
+        name = name.removesuffix(".gz").removesuffix(".fz")
+        await self._fits_writer.submit(image.data, image.header, name + ".fz")
+
+    def _nflushes_for(self, clean: bool) -> int | None:
+        """Number of flushes before the next exposure, or None for the camera's default.
+
+        Args:
+            clean: Whether the CCD has been kept clean by background flushing until now.
+        """
+        if clean:
+            return self._background_nflushes
+        if self._nflushes is None and self._background_flush:
+            return _DEFAULT_NFLUSHES
+        return self._nflushes
+
+    async def _change_exposure_status(self, status: ExposureStatus) -> None:
+        """Change exposure status and, when the camera gets idle, start background flushing, if enabled."""
+        await super()._change_exposure_status(status)
+        if status == ExposureStatus.IDLE and self._armed is None and self._video_thread is None:
+            await self._start_background_flush()
+
+    async def _start_background_flush(self) -> None:
+        """Keep the CCD clean until the next exposure, if background flushing is enabled."""
+        if not self._background_flush or self._background_flushing or self._driver is None:
+            return
+        driver = self._driver
+        try:
+            await self._run_blocking_or_raise(lambda: driver.set_background_flush(True))
+        except Exception as e:
+            # the next exposure simply does the usual number of flushes then
+            log.warning("Could not start background flushing: %s", e)
+            return
+        self._background_flushing = True
+
+    def _configure(
+        self,
+        driver: Any,
+        width: int,
+        height: int,
+        exposure_time: float,
+        open_shutter: bool,
+        clean: bool = False,
+        armed: bool = False,
+    ) -> None:
+        """Apply binning, window, frame type and exposure time for the next exposure. The driver only sends
+        settings that changed since the last exposure. Blocking, so run it via _run_blocking_or_raise().
+
+        Args:
+            driver: Driver to configure.
+            width: Binned width of window.
+            height: Binned height of window.
+            exposure_time: Exposure time in seconds.
+            open_shutter: Whether to open the shutter.
+            clean: Whether the CCD has been kept clean by background flushing until now.
+            armed: Whether the exposure should wait for a trigger, if a trigger is configured.
+        """
+        driver.set_binning(*self._binning)
+        driver.set_window(self._window[0], self._window[1], width, height)
+        nflushes = self._nflushes_for(clean)
+        if nflushes is not None:
+            driver.set_nflushes(nflushes)
+        if self._trigger is not None:
+            driver.set_external_trigger(self._trigger if armed else None)
+        driver.init_exposure(open_shutter)
+        driver.set_exposure_time(int(exposure_time * 1000.0))
+
+    async def start_video(self, exposure_time: float | None = None, slots: int = 4) -> None:
+        """Start continuous video acquisition with the current window and binning.
+
+        Frames are grabbed on a background thread into a fixed-size, preallocated ring buffer, from which
+        get_video_frame() returns the latest one. Frames nobody fetched before the next one arrived are
+        dropped. If grabbing a frame fails, video mode is stopped.
+
+        Args:
+            exposure_time: Exposure time per frame in seconds, defaults to the current exposure time.
+            slots: Number of frames in the ring buffer.
+
+        Raises:
+            DeviceBusyError: If the camera is exposing or already in video mode.
+            ValueError: If the camera doesn't support video mode.
+        """
         if self._driver is None:
             raise ValueError("No camera driver.")
+        if self._video_thread is not None or self._camera_status != ExposureStatus.IDLE:
+            raise exc.DeviceBusyError("Cannot start video mode because camera is not idle.")
+        driver = self._driver
+
+        exposure_time = self._exposure_time if exposure_time is None else exposure_time
+        width = int(math.floor(self._window[2] / self._binning[0]))
+        height = int(math.floor(self._window[3] / self._binning[1]))
+        ring = VideoRingBuffer((height, width), slots=slots)
+
+        background_flushing, self._background_flushing = self._background_flushing, False
+
+        def _start() -> None:
+            if background_flushing:
+                driver.set_background_flush(False)
+            self._configure(driver, width, height, exposure_time, True)
+            driver.start_video_mode()
+
+        log.info("Starting video mode with %dx%d frames of %.3f seconds...", width, height, exposure_time)
+        await self._run_blocking_or_raise(_start)
+
+        self._video_ring = ring
+        self._video_exposure_time = exposure_time
+        self._video_stop.clear()
+        loop = asyncio.get_running_loop()
+        self._video_thread = threading.Thread(target=self._video_loop, args=(driver, ring, loop), daemon=True)
+        self._video_thread.start()
+
+    def _video_loop(self, driver: Any, ring: VideoRingBuffer, loop: asyncio.AbstractEventLoop) -> None:
+        """Background thread: grab video frames into the ring buffer until stopped.
+
+        Frames are grabbed directly on this thread, not on the SDK worker, so that other SDK calls don't wait
+        behind every frame. Grabs are therefore neither bounded by sdk_call_timeout nor counted in sdk_stats.
+        Video mode is also stopped on this thread, once the last grab has finished, since the driver holds
+        the device for the whole grab.
+        """
+        try:
+            while not self._video_stop.is_set():
+                driver.grab_video_frame(ring.write_slot())
+                ring.commit()
+        except ValueError:
+            log.exception("Could not grab video frame, stopping video mode.")
+        finally:
+            try:
+                driver.stop_video_mode()
+            except ValueError:
+                log.exception("Could not stop video mode.")
+            try:
+                asyncio.run_coroutine_threadsafe(self._video_stopped(threading.current_thread()), loop)
+            except RuntimeError:
+                # event loop is closed already
+                pass
+
+    async def _video_stopped(self, thread: threading.Thread) -> None:
+        """Clears the video state after the grab thread has finished, and lets the camera go back to idle."""
+        if self._video_thread is not thread:
+            return
+        self._video_thread = None
+        if self._video_ring is not None:
+            log.info(
+                "Video mode stopped after %d frames, %d of which were dropped.",
+                self._video_ring.frame_count,
+                self._video_ring.dropped,
+            )
+        await self._start_background_flush()
+
+    async def stop_video(self) -> None:
+        """Stop video mode, if running. If the current frame takes longer than expected, the camera stays busy
+        until the grab thread has stopped video mode after it."""
+        thread = self._video_thread
+        if thread is None:
+            return
+
+        # the grab thread only checks for the stop signal between frames, so wait for it on a plain thread,
+        # not on the SDK worker, which would count a slow frame as a stuck call
+        log.info("Stopping video mode...")
+        self._video_stop.set()
+        await asyncio.to_thread(thread.join, self._video_exposure_time + _READOUT_BLOCK_TIMEOUT)
+        if thread.is_alive():
+            log.error("Timed out waiting for video frame grab to finish.")
+            return
+        await self._video_stopped(thread)
+
+    def get_video_frame(self, newer_than: int = 0, out: np.ndarray | None = None) -> VideoFrame | None:
+        """Returns a copy of the latest video frame.
+
+        Args:
+            newer_than: Only return a frame with a number larger than this, e.g. the one of the last frame.
+            out: Optional array to copy the frame into.
+
+        Returns:
+            The latest frame, or None if there is no (new) frame.
+        """
+        return None if self._video_ring is None else self._video_ring.latest(out=out, newer_than=newer_than)
+
+    def get_metrics(self) -> dict[str, Any]:
+        """Returns metrics for scraping: counters and duration histograms for each phase of an exposure, and
+        the statistics of the SDK worker.
+
+        Returns:
+            Dictionary with "counters", "phases" and "sdk", and "fits_writer" with encode times and compression
+            ratios, if enabled.
+        """
+        metrics = {**self._metrics.snapshot(), "sdk": vars(self.sdk_stats)}
+        if self._fits_writer is not None:
+            metrics["fits_writer"] = self._fits_writer.snapshot()
+        return metrics
+
+    @property
+    def frame_stats(self) -> FrameStats | None:
+        """Statistics of the last frame read out, including saturation count and histogram, if enabled."""
+        return self._frame_stats
+
+    def add_readout_consumer(self, consumer: ReadoutConsumer) -> None:
+        """Register a callable that gets every block of rows as soon as it has been read out.
+
+        Consumers run on the event loop while the next block is coming off the camera, so they can do
+        work like statistics, quick-look or spooling to disk before the readout finishes. The block is a
+        view on the frame buffer, which gets recycled for later frames, so copy whatever needs to be kept.
+
+        Args:
+            consumer: Callable taking the index of the first row and the block itself.
+        """
+        self._readout_consumers.append(consumer)
+
+    def remove_readout_consumer(self, consumer: ReadoutConsumer) -> None:
+        """Unregister a readout consumer added with add_readout_consumer()."""
+        self._readout_consumers.remove(consumer)
+
+    async def _readout_blocks(
+        self, img: np.ndarray, stats: FrameStats | None = None
+    ) -> AsyncGenerator[tuple[int, np.ndarray]]:
+        """Read out the frame into img block by block, yielding each finished block.
+
+        The next block is already being read out while the current one is yielded. Readout progress is
+        published as IExposure progress while in READOUT status. If the readout stops before the last block,
+        e.g. because it failed or was cancelled, it is aborted on the device and the exposure is cancelled.
+
+        Args:
+            img: Buffer to read the frame into.
+            stats: If given, frame statistics are accumulated in here during readout.
+
+        Yields:
+            Tuples with index of first row and a view on the block in img.
+        """
         driver = self._driver
+        if driver is None:
+            raise ValueError("No camera driver.")
+        blocks = driver.iter_row_blocks(img, self._readout_block_rows, stats)
+        height = img.shape[0]
+        finished = False
+
+        def _next_block() -> tuple[int, np.ndarray] | None:
+            return next(blocks, None)
 
-        def _wait() -> bool:
+        pending = asyncio.ensure_future(self._run_blocking_or_raise(_next_block, timeout=_READOUT_BLOCK_TIMEOUT))
+        try:
             while True:
-                if driver.is_data_ready():
-                    return not abort_event.is_set()
+                block = await pending
+                if block is None:
+                    finished = True
+                    break
+                pending = asyncio.ensure_future(
+                    self._run_blocking_or_raise(_next_block, timeout=_READOUT_BLOCK_TIMEOUT)
+                )
+
+                first_row, rows = block
+                await self.comm.set_state(
+                    IExposure,
+                    ExposureState(
+                        status=ExposureStatus.READOUT,
+                        progress=100.0 * (first_row + len(rows)) / height,
+                        exposure_time_left=0.0,
+                    ),
+                )
+                yield first_row, rows
+        finally:
+            if not finished:
+                # stopped early, e.g. by a failed readout, an abort or a consumer: stop the readout of the next
+                # block on the SDK worker after its current row, so nothing writes into img anymore, and cancel
+                # the exposure, which is queued behind that call even if it's still running for a cancelled caller
+                driver.abort_readout()
+                await asyncio.gather(pending, return_exceptions=True)
+                await self._abort_exposure()
+
+    def _arm_trigger(self, armed_at: float) -> None:
+        self._trigger_armed_at = armed_at
+        self._triggered_at = None
+        log.info("Exposure armed, waiting for trigger...")
+
+    def _fire_trigger(self) -> tuple[float, float]:
+        """Trigger the armed exposure right away from the calling thread. The SDK worker can't be used for
+        this, since it is busy waiting for the end of the exposure.
+
+        Returns:
+            Monotonic time of the trigger call and its duration in seconds.
+
+        Raises:
+            ValueError: If no exposure is waiting for a trigger, or triggering failed.
+        """
+        driver = self._driver
+        if driver is None or self._trigger_armed_at is None:
+            raise ValueError("No exposure waiting for trigger.")
+        started = datetime.now(UTC)
+        start = time.monotonic()
+        driver.trigger_exposure()
+        duration = time.monotonic() - start
+        self._triggered_at = (start, started)
+        return start, duration
+
+    async def trigger_exposure(self) -> None:
+        """Start the armed exposure, as if the external trigger fired. See trigger_exposures() for starting
+        several cameras together.
+
+        Only ProLine cameras with software trigger support can be triggered like this, MaxCam cameras can only
+        be started on the external trigger input.
+
+        Raises:
+            ValueError: If no exposure is waiting for a trigger, the camera doesn't support software triggers,
+                or triggering failed.
+        """
+        await trigger_exposures([self])
+
+    async def _wait_exposure(self, abort_event: asyncio.Event, exposure_time: float, open_shutter: bool) -> None:
+        if self._driver is None:
+            raise ValueError("No camera driver.")
+        driver = self._driver
+
+        # an abort releases a running wait right away, without going through the SDK worker
+        abort_watch = asyncio.create_task(abort_event.wait())
+        abort_watch.add_done_callback(lambda task: task.cancelled() or driver.abort_wait())
+
+        # wait natively in chunks, so other calls for the device (e.g. cooling) can run in between
+        deadline = time.monotonic() + exposure_time + 30
+        if self._trigger_armed_at is not None:
+            deadline += self._trigger_timeout
+        try:
+            while not await self._run_blocking_or_raise(
+                lambda: driver.wait_data_ready(_WAIT_CHUNK), timeout=_WAIT_CHUNK + self._sdk_call_timeout
+            ):
                 if abort_event.is_set():
-                    return False
-                time.sleep(0.01)
+                    break
+                if time.monotonic() > deadline:
+                    raise TimeoutError("Timed out waiting for exposure to finish.")
+        finally:
+            abort_watch.cancel()
 
-        if not await self._run_blocking_or_raise(_wait, timeout=exposure_time + 30):
+        if abort_event.is_set():
             await self._change_exposure_status(ExposureStatus.IDLE)
             raise exc.AbortedError("Aborted exposure.")
 
     async def _abort_exposure(self) -> None:
         if self._driver is None:
             raise ValueError("No camera driver.")
+        self._armed = None
+        self._trigger_armed_at = None
         await self._run_blocking_or_raise(self._driver.cancel_exposure)
 
+    async def grab_sequence(self, count: int, broadcast: bool = True, delay: float = 0, **kwargs: Any) -> None:
+        """Start a sequence of count grabs. Without a delay, the next exposure is started right after the
+        readout of the current frame, so the dead time between frames is only the readout itself.
+
+        Args:
+            count: Number of grabs to take.
+            broadcast: Broadcast existence of each grab.
+            delay: Seconds to wait between the end of one grab and the start of the next.
+        """
+        self._sequence_delay = delay
+        await BaseCamera.grab_sequence(self, count, broadcast=broadcast, delay=delay, **kwargs)
+
+    async def _run_sequence(self, count_total: int, broadcast: bool, delay: float) -> None:
+        try:
+            await BaseCamera._run_sequence(self, count_total, broadcast, delay)
+        finally:
+            # sequence was aborted or a grab failed while the next exposure was already running?
+            if self._armed is not None:
+                log.info("Cancelling exposure started for next frame of sequence.")
+                await self._abort_exposure()
+                await self._start_background_flush()
+
     async def set_cooling(self, enabled: bool, setpoint: float, **kwargs: Any) -> None:
         """Enables/disables cooling and sets setpoint."""
         if self._driver is None:
@@ -238,39 +911,119 @@ class FliCamera(BaseCamera, FliBaseMixin, ICamera, IWindow, IBinning, ICooling,
             ICooling, CoolingState(setpoint=setpoint if setpoint is not None else 20.0, power=None, enabled=enabled)
         )
 
-    async def _poll_cooling(self) -> None:
-        """Background task: periodically reads cooling and temperature state."""
-        from .flidriver import FliTemperature
+    def get_telemetry_history(self, since: float | None = None) -> list[TelemetrySample]:
+        """Returns the sampled temperatures and cooler power from the in-memory history.
+
+        Args:
+            since: Only return samples taken after this UNIX timestamp.
 
+        Returns:
+            List of samples in chronological order.
+        """
+        return self._telemetry.samples(since)
+
+    async def _poll_cooling(self) -> None:
+        """Background task: periodically samples cooling and temperature state."""
         while True:
+            interval = self._poll_interval_slow
             try:
-                if self._driver is not None:
-                    driver = self._driver
-
-                    def _poll() -> tuple[float, float, float]:
-                        return (
-                            driver.get_temp(FliTemperature.CCD),
-                            driver.get_temp(FliTemperature.BASE),
-                            driver.get_cooler_power(),
-                        )
-
-                    t_ccd, t_base, power = await self._run_blocking_or_raise(_poll)
-                    setpoint = self._temp_setpoint if self._temp_setpoint is not None else 20.0
-                    await self.comm.set_state(
-                        ICooling, CoolingState(setpoint=setpoint, power=round(power), enabled=self._cooling_enabled)
-                    )
-                    await self.comm.set_state(
-                        ITemperatures,
-                        TemperaturesState(
-                            readings=[
-                                SensorReading(name="CCD", value=t_ccd),
-                                SensorReading(name="Base", value=t_base),
-                            ]
-                        ),
-                    )
+                # the driver holds the device for every video frame, so sampling would only run into timeouts
+                if self._driver is not None and self._video_thread is None:
+                    interval = await self._sample_telemetry(self._driver)
             except Exception:
                 pass
-            await asyncio.sleep(10)
+            await asyncio.sleep(interval)
+
+    async def _sample_telemetry(self, driver: Any) -> float:
+        """Take one telemetry sample and publish it, if it changed by more than the deadbands.
+
+        Args:
+            driver: Driver to sample from.
+
+        Returns:
+            Seconds until the next sample should be taken, short while the CCD temperature is still settling.
+        """
+        ccd, base, power = await self._run_blocking_or_raise(driver.get_telemetry)
+        sample = TelemetrySample(time=time.time(), ccd_temp=ccd, base_temp=base, cooler_power=power)
+        previous = self._telemetry.latest
+        self._telemetry.append(sample)
+
+        # publish only changes beyond the deadbands, or a changed cooling setting
+        setpoint = self._temp_setpoint if self._temp_setpoint is not None else 20.0
+        published = self._published_telemetry
+        if (
+            published is None
+            or published[:2] != (setpoint, self._cooling_enabled)
+            or abs(power - published[2].cooler_power) >= self._power_deadband
+            or abs(ccd - published[2].ccd_temp) >= self._temp_deadband
+            or abs(base - published[2].base_temp) >= self._temp_deadband
+        ):
+            await self.comm.set_state(
+                ICooling, CoolingState(setpoint=setpoint, power=round(power), enabled=self._cooling_enabled)
+            )
+            await self.comm.set_state(
+                ITemperatures,
+                TemperaturesState(
+                    readings=[
+                        SensorReading(name="CCD", value=ccd),
+                        SensorReading(name="Base", value=base),
+                    ]
+                ),
+            )
+            self._published_telemetry = (setpoint, self._cooling_enabled, sample)
+
+        # still cooling down (or warming up)?
+        settling = (self._cooling_enabled and abs(ccd - setpoint) > _SETTLED_TOLERANCE) or (
+            previous is not None and abs(ccd - previous.ccd_temp) > _SETTLED_TOLERANCE
+        )
+        return self._poll_interval_fast if settling else self._poll_interval_slow
+
+
+async def trigger_exposures(cameras: Sequence[FliCamera]) -> list[float]:
+    """Start the armed exposures of several cameras as close together as possible.
+
+    The triggers are sent back to back from a single thread, so neither the event loop nor the SDK workers of
+    the cameras add any jitter in between. The duration of each trigger call is recorded as "trigger" phase in
+    the metrics of its camera.
+
+    Args:
+        cameras: Cameras with exposures waiting for a trigger.
+
+    Returns:
+        Time of each trigger relative to the first one in seconds.
+
+    Raises:
+        ValueError: If a camera had no exposure waiting for a trigger, doesn't support software triggers, or
+            triggering failed. All other cameras are still triggered.
+    """
+
+    def _fire() -> list[tuple[float, float] | ValueError]:
+        results: list[tuple[float, float] | ValueError] = []
+        for camera in cameras:
+            try:
+                results.append(camera._fire_trigger())
+            except ValueError as e:
+                results.append(e)
+        return results
+
+    # a daemon thread, like the SDK workers, so a hung trigger call can't block the interpreter from exiting
+    loop = asyncio.get_running_loop()
+    future: asyncio.Future[list[tuple[float, float] | ValueError]] = loop.create_future()
+
+    def _run() -> None:
+        results = _fire()
+        loop.call_soon_threadsafe(lambda: future.done() or future.set_result(results))
+
+    threading.Thread(target=_run, name="fli-trigger", daemon=True).start()
+    results = await future
+    fired = [result for result in results if not isinstance(result, ValueError)]
+    for camera, result in zip(cameras, results, strict=True):
+        if not isinstance(result, ValueError):
+            camera._metrics.observe("trigger", result[1])
+    errors = [result for result in results if isinstance(result, ValueError)]
+    if errors:
+        raise errors[0]
+    return [start - fired[0][0] for start, _ in fired]
 
 
-__all__ = ["FliCamera"]
+__all__ = ["FliCamera", "trigger_exposures"]
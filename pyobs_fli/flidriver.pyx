@@ -2,18 +2,175 @@
 
 from collections import namedtuple
 from enum import Enum
-from typing import Tuple, List
+from typing import Iterator, Tuple, List
 
 import numpy as np
 cimport numpy as np
+cimport cython
 np.import_array()
 
+from cpython.pythread cimport PyThread_type_lock, PyThread_allocate_lock, PyThread_free_lock, \
+    PyThread_acquire_lock, PyThread_release_lock, WAIT_LOCK
+from libc.errno cimport EINVAL
 from libc.string cimport memset
+from posix.time cimport clock_gettime, timespec, CLOCK_MONOTONIC
+from posix.unistd cimport usleep
 
 from .libfli cimport *
 
 
 DeviceInfo = namedtuple('DeviceInfo', ['domain', 'filename', 'name'])
+DeviceProperties = namedtuple('DeviceProperties', ['serial', 'model', 'hw_revision', 'fw_revision',
+                                                   'full_frame', 'visible_frame', 'pixel_size'])
+
+
+# The SDK keeps the table of open devices and the device list for enumeration in global state, so opening,
+# closing and listing devices is serialized process-wide. All other calls only lock their own device.
+cdef PyThread_type_lock _global_lock = PyThread_allocate_lock()
+
+
+cdef double _monotonic() noexcept nogil:
+    """Returns a monotonic clock in seconds."""
+    cdef timespec ts
+    clock_gettime(CLOCK_MONOTONIC, &ts)
+    return ts.tv_sec + ts.tv_nsec * 1e-9
+
+
+cdef class FrameStats:
+    """Statistics of a frame, accumulated row by row in a single pass during readout.
+
+    Minimum, maximum and mean are always computed, the number of saturated pixels and a histogram only
+    if requested. For very large frames, only every stride-th pixel of every stride-th row may be used.
+    """
+
+    cdef readonly unsigned short min
+    cdef readonly unsigned short max
+    cdef readonly unsigned long long count
+    cdef readonly unsigned long long saturated
+    cdef unsigned long long _sum
+    cdef unsigned int _saturation
+    cdef bint _check_saturation
+    cdef Py_ssize_t _stride
+    cdef Py_ssize_t _bins
+    cdef np.ndarray _histogram
+    cdef np.int64_t* _hist
+
+    def __init__(self, saturation: int | None = None, histogram_bins: int = 0, stride: int = 1):
+        """Create new, empty statistics.
+
+        Args:
+            saturation: Pixels at or above this value are counted as saturated, None to not count them.
+            histogram_bins: Number of bins of a histogram over the full 16 bit range, 0 for none.
+            stride: Only use every stride-th pixel in every stride-th row.
+
+        Raises:
+            ValueError: If stride or number of histogram bins are out of range.
+        """
+        if stride < 1:
+            raise ValueError('Stride must be at least 1.')
+        if histogram_bins < 0 or histogram_bins > 65536:
+            raise ValueError('Number of histogram bins must be between 0 and 65536.')
+        self._stride = stride
+        self._check_saturation = saturation is not None
+        self._saturation = saturation if saturation is not None else 0
+        self._bins = histogram_bins
+        self._histogram = np.zeros(histogram_bins, dtype=np.int64)
+        self._hist = <np.int64_t*> self._histogram.data
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear all statistics for a new frame."""
+        self.min = 65535
+        self.max = 0
+        self.count = 0
+        self.saturated = 0
+        self._sum = 0
+        self._histogram[:] = 0
+
+    @property
+    def mean(self) -> float:
+        """Mean pixel value, NaN if no pixel was added."""
+        return self._sum / self.count if self.count > 0 else float('nan')
+
+    @property
+    def histogram(self) -> np.ndarray | None:
+        """Copy of the histogram with evenly spaced bins over 0..65535, None if not requested."""
+        return self._histogram.copy() if self._bins > 0 else None
+
+    @cython.cdivision(True)
+    cdef void add_row(self, unsigned short* row, Py_ssize_t width, Py_ssize_t index) noexcept nogil:
+        """Add a single row with the given index in the frame."""
+        cdef Py_ssize_t x
+        cdef Py_ssize_t stride = self._stride
+        cdef unsigned short value
+        cdef unsigned short lo = self.min
+        cdef unsigned short hi = self.max
+        cdef unsigned int row_total = 0
+        cdef unsigned long long total = 0
+        cdef unsigned long long saturated = 0
+        cdef unsigned int saturation = self._saturation
+        cdef Py_ssize_t bins = self._bins
+        cdef np.int64_t* hist = self._hist
+        if index % stride != 0:
+            return
+
+        # min/max/sum in a tight loop on locals, which the compiler can vectorize; a row of up to 65537 pixels
+        # can't overflow a 32 bit sum, which takes twice as many pixels per vector as a 64 bit one
+        if stride == 1 and width <= 65537:
+            for x in range(width):
+                value = row[x]
+                lo = value if value < lo else lo
+                hi = value if value > hi else hi
+                row_total += value
+            total = row_total
+        elif stride == 1:
+            for x in range(width):
+                value = row[x]
+                lo = value if value < lo else lo
+                hi = value if value > hi else hi
+                total += value
+        else:
+            x = 0
+            while x < width:
+                value = row[x]
+                lo = value if value < lo else lo
+                hi = value if value > hi else hi
+                total += value
+                x += stride
+
+        # saturation and histogram are optional, the row is still in cache for them
+        if self._check_saturation:
+            x = 0
+            while x < width:
+                saturated += row[x] >= saturation
+                x += stride
+        if bins > 0:
+            x = 0
+            while x < width:
+                hist[(row[x] * bins) >> 16] += 1
+                x += stride
+
+        self.min = lo
+        self.max = hi
+        self._sum += total
+        self.saturated += saturated
+        self.count += (width + stride - 1) // stride
+
+    def update(self, np.ndarray[unsigned short, ndim=2, mode="c"] rows, first_row: int = 0) -> None:
+        """Add rows of a frame that have been read out already.
+
+        Args:
+            rows: C-contiguous uint16 array with rows to add.
+            first_row: Index of the first of the rows in the frame.
+        """
+        cdef unsigned short* data = <unsigned short*> rows.data
+        cdef Py_ssize_t width = rows.shape[1]
+        cdef Py_ssize_t height = rows.shape[0]
+        cdef Py_ssize_t first = first_row
+        cdef Py_ssize_t y
+        with nogil:
+            for y in range(height):
+                self.add_row(data + y * width, width, first + y)
 
 
 class FliTemperature(Enum):
@@ -24,9 +181,16 @@ class FliTemperature(Enum):
     BASE = FLI_TEMPERATURE_BASE
 
 
+class ExternalTrigger(Enum):
+    """Edge of the external trigger input, on which an armed exposure starts."""
+    LOW = FLI_SHUTTER_EXTERNAL_TRIGGER_LOW
+    HIGH = FLI_SHUTTER_EXTERNAL_TRIGGER_HIGH
+
+
 class DeviceType(Enum):
     CAMERA = FLIDEVICE_CAMERA
     FILTERWHEEL = FLIDEVICE_FILTERWHEEL
+    FOCUSER = FLIDEVICE_FOCUSER
 
 
 cdef class FliDriver:
@@ -48,35 +212,41 @@ cdef class FliDriver:
         cdef long res
         cdef bint have_first
 
-        # create list of USB camera
-        with nogil:
-            res = FLICreateList(list_domain)
-        if res != 0:
-            raise ValueError('Could not create list of FLI cameras.')
-
-        # init list of devices
-        devices = []
-
-        # get first camera
+        # the device list is global in the SDK
         with nogil:
-            have_first = FLIListFirst(&domain, <char*>filename, 1024, <char*>name, 1024) == 0
-        if have_first:
-            # store first device
-            devices.append(DeviceInfo(domain=domain, filename=filename, name=name))
-
-            # loop other devices
-            while True:
-                with nogil:
-                    res = FLIListNext(&domain, <char*>filename, 1024, <char*>name, 1024)
-                if res != 0:
-                    break
-                # store device
+            PyThread_acquire_lock(_global_lock, WAIT_LOCK)
+        try:
+            # create list of USB camera
+            with nogil:
+                res = FLICreateList(list_domain)
+            if res != 0:
+                raise ValueError('Could not create list of FLI cameras.')
+
+            # init list of devices
+            devices = []
+
+            # get first camera
+            with nogil:
+                have_first = FLIListFirst(&domain, <char*>filename, 1024, <char*>name, 1024) == 0
+            if have_first:
+                # store first device
                 devices.append(DeviceInfo(domain=domain, filename=filename, name=name))
 
-        # clean up and return
-        with nogil:
-            FLIDeleteList()
-        return devices
+                # loop other devices
+                while True:
+                    with nogil:
+                        res = FLIListNext(&domain, <char*>filename, 1024, <char*>name, 1024)
+                    if res != 0:
+                        break
+                    # store device
+                    devices.append(DeviceInfo(domain=domain, filename=filename, name=name))
+
+            # clean up and return
+            with nogil:
+                FLIDeleteList()
+            return devices
+        finally:
+            PyThread_release_lock(_global_lock)
 
     """Storage for the device info."""
     cdef object _device_info
@@ -84,6 +254,39 @@ cdef class FliDriver:
     """Storage for link to device."""
     cdef flidev_t _device
 
+    """Set from another thread to abort a running wait_data_ready()."""
+    cdef volatile bint _abort_wait
+
+    """Set from another thread to stop a running grab_rows() after the current row."""
+    cdef volatile bint _abort_readout
+
+    """Cached static properties of the device, only valid while it's open."""
+    cdef object _properties
+
+    """Last configuration applied to the camera, so unchanged settings aren't sent again."""
+    cdef dict _config
+
+    """Whether a trigger has been set, kept apart from _config, since clearing it also closes the shutter."""
+    cdef bint _trigger_set
+
+    """Serializes calls for this device from different threads, the SDK's file lock doesn't do that."""
+    cdef PyThread_type_lock _device_lock
+
+    def __cinit__(self, *args, **kwargs):
+        self._device_lock = PyThread_allocate_lock()
+        if self._device_lock == NULL:
+            raise MemoryError('Could not allocate device lock.')
+
+    def __dealloc__(self):
+        if self._device_lock != NULL:
+            PyThread_free_lock(self._device_lock)
+
+    cdef inline void _lock(self) noexcept nogil:
+        PyThread_acquire_lock(self._device_lock, WAIT_LOCK)
+
+    cdef inline void _unlock(self) noexcept nogil:
+        PyThread_release_lock(self._device_lock)
+
     def __init__(self, device_info: DeviceInfo):
         """Create a new driver object for the given device.
 
@@ -91,6 +294,8 @@ cdef class FliDriver:
             device_info: A DeviceInfo obtained from list_devices.
         """
         self._device_info = device_info
+        self._config = {}
+        self._trigger_set = False
 
     def open(self) -> None:
         """Open driver.
@@ -102,8 +307,14 @@ cdef class FliDriver:
         cdef char* filename = filename_bytes
         cdef flidomain_t domain = self._device_info.domain
         cdef long res
+        self._properties = None
+        self._config.clear()
         with nogil:
+            PyThread_acquire_lock(_global_lock, WAIT_LOCK)
+            self._lock()
             res = FLIOpen(&self._device, filename, domain)
+            self._unlock()
+            PyThread_release_lock(_global_lock)
         if res != 0:
             raise ValueError('Could not open device.')
 
@@ -114,11 +325,85 @@ cdef class FliDriver:
             ValueError: If closing failed.
         """
         cdef long res
+        self._properties = None
+        self._config.clear()
         with nogil:
+            PyThread_acquire_lock(_global_lock, WAIT_LOCK)
+            self._lock()
             res = FLIClose(self._device)
+            self._unlock()
+            PyThread_release_lock(_global_lock)
         if res != 0:
             raise ValueError('Could not open device.')
 
+    def ping(self) -> None:
+        """Cheap liveness probe, which only queries the device status and doesn't build any Python objects.
+
+        Raises:
+            ValueError: If the device didn't respond.
+        """
+        cdef long status
+        cdef long res
+        with nogil:
+            self._lock()
+            res = FLIGetDeviceStatus(self._device, &status)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not fetch device status.')
+
+    def get_properties(self) -> DeviceProperties:
+        """Returns the static properties of the device, which are only queried once per connection.
+
+        Frames and pixel size are only available for cameras and None for other devices.
+
+        Returns:
+            DeviceProperties with serial, model, hardware/firmware revision, full and visible frame, and
+            pixel size in meters.
+
+        Raises:
+            ValueError: If querying a property failed.
+        """
+        if self._properties is not None:
+            return self._properties
+
+        # variables
+        cdef long hw_rev, fw_rev
+        cdef double pixel_x, pixel_y
+        cdef long res
+
+        # revisions
+        with nogil:
+            self._lock()
+            res = FLIGetHWRevision(self._device, &hw_rev)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not fetch hardware revision.')
+        with nogil:
+            self._lock()
+            res = FLIGetFWRevision(self._device, &fw_rev)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not fetch firmware revision.')
+
+        # frames and pixel size for cameras only, FLIDEVICE_RAW masks the device type in the domain
+        full_frame, visible_frame, pixel_size = None, None, None
+        if self._device_info.domain & FLIDEVICE_RAW == FLIDEVICE_CAMERA:
+            full_frame = self.get_full_frame()
+            visible_frame = self.get_visible_frame()
+            with nogil:
+                self._lock()
+                res = FLIGetPixelSize(self._device, &pixel_x, &pixel_y)
+                self._unlock()
+            if res != 0:
+                raise ValueError('Could not fetch pixel size.')
+            pixel_size = (pixel_x, pixel_y)
+
+        # store and return
+        self._properties = DeviceProperties(serial=self.get_serial_string(), model=self.get_model(),
+                                            hw_revision=hw_rev, fw_revision=fw_rev, full_frame=full_frame,
+                                            visible_frame=visible_frame, pixel_size=pixel_size)
+        return self._properties
+
     @property
     def name(self) -> str:
         """Returns the name of the connected device."""
@@ -140,7 +425,9 @@ cdef class FliDriver:
 
         # get dimensions
         with nogil:
+            self._lock()
             res = FLIGetReadoutDimensions(self._device, &width, &hoffset, &hbin, &height, &voffset, &vbin)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not query readout dimensions.')
 
@@ -163,7 +450,9 @@ cdef class FliDriver:
 
         # get area
         with nogil:
+            self._lock()
             res = FLIGetVisibleArea(self._device, &ul_x, &ul_y, &lr_x, &lr_y)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not query visible area.')
 
@@ -186,15 +475,25 @@ cdef class FliDriver:
 
         # get area
         with nogil:
+            self._lock()
             res = FLIGetArrayArea(self._device, &ul_x, &ul_y, &lr_x, &lr_y)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not query total area.')
 
         # return it
         return ul_x, ul_y, lr_x -  ul_x, lr_y - ul_y
 
+    def invalidate_config(self) -> None:
+        """Forget the last applied configuration, so that all settings are sent to the camera again."""
+        self._config.clear()
+
+    cdef bint _config_changed(self, str key, object value):
+        """Whether value differs from the last one applied for key."""
+        return self._config.get(key) != value
+
     def set_binning(self, x: int, y: int) -> None:
-        """Set the binning.
+        """Set the binning. Does nothing, if it's unchanged since the last call.
 
         Args:
             x: Binning in x direction.
@@ -208,20 +507,35 @@ cdef class FliDriver:
         cdef long y_c = y
         cdef long res
 
+        # unchanged?
+        if not self._config_changed('binning', (x, y)):
+            return
+
+        # the SDK derives the row width of the window from the binning, so the window needs to be sent again
+        self._config.pop('binning', None)
+        self._config.pop('window', None)
+
         # set x binning
         with nogil:
+            self._lock()
             res = FLISetHBin(self._device, x_c)
+            self._unlock()
         if res != 0:
+            self._config.clear()
             raise ValueError('Could not set x binning.')
 
         # set y binning
         with nogil:
+            self._lock()
             res = FLISetVBin(self._device, y_c)
+            self._unlock()
         if res != 0:
+            self._config.clear()
             raise ValueError('Could not set y binning.')
+        self._config['binning'] = (x, y)
 
     def set_window(self, left: int, top: int, width: int, height: int) -> None:
-        """Sets the window.
+        """Sets the window. Does nothing, if it's unchanged since the last call.
 
         Args:
             left: X offset of window.
@@ -239,14 +553,22 @@ cdef class FliDriver:
         cdef long bottom_c = top + height
         cdef long res
 
+        # unchanged?
+        if not self._config_changed('window', (left, top, width, height)):
+            return
+
         # set window
         with nogil:
+            self._lock()
             res = FLISetImageArea(self._device, left_c, top_c, right_c, bottom_c)
+            self._unlock()
         if res != 0:
+            self._config.clear()
             raise ValueError('Could not set window.')
+        self._config['window'] = (left, top, width, height)
 
     def init_exposure(self, open_shutter: bool) -> None:
-        """Initializes an exposure.
+        """Initializes an exposure. Does nothing, if the frame type is unchanged since the last call.
 
         Args:
             open_shutter: Whether the shutter should be opened for exposure.
@@ -258,20 +580,31 @@ cdef class FliDriver:
         cdef fliframe_t frame_type = FLI_FRAME_TYPE_NORMAL if open_shutter else FLI_FRAME_TYPE_DARK
         cdef long res
 
+        # unchanged?
+        if not self._config_changed('frame_type', frame_type):
+            return
+
         # set TDI
         with nogil:
+            self._lock()
             res = FLISetTDI(self._device, 0, 0)
+            self._unlock()
         if res != 0:
+            self._config.clear()
             raise ValueError('Could not set TDI.')
 
         # set frame type
         with nogil:
+            self._lock()
             res = FLISetFrameType(self._device, frame_type)
+            self._unlock()
         if res != 0:
+            self._config.clear()
             raise ValueError('Could not set frame type.')
+        self._config['frame_type'] = frame_type
 
     def set_exposure_time(self, exptime: int) -> None:
-        """Sets the exposure time.
+        """Sets the exposure time. Does nothing, if it's unchanged since the last call.
 
         Args:
             exptime: Exposure time in ms.
@@ -283,11 +616,19 @@ cdef class FliDriver:
         cdef long exptime_c = exptime
         cdef long res
 
+        # unchanged?
+        if not self._config_changed('exposure_time', exptime):
+            return
+
         # set exptime
         with nogil:
+            self._lock()
             res = FLISetExposureTime(self._device, exptime_c)
+            self._unlock()
         if res != 0:
+            self._config.clear()
             raise ValueError('Could not set exposure time.')
+        self._config['exposure_time'] = exptime
 
     def start_exposure(self) -> None:
         """Start a new exposure.
@@ -299,9 +640,14 @@ cdef class FliDriver:
         cdef long res
 
         # expose
+        self._abort_wait = False
+        self._abort_readout = False
         with nogil:
+            self._lock()
             res = FLIExposeFrame(self._device)
+            self._unlock()
         if res != 0:
+            self._config.clear()
             raise ValueError('Could not start exposure.')
 
     def is_data_ready(self) -> bool:
@@ -320,11 +666,15 @@ cdef class FliDriver:
 
         # get status
         with nogil:
+            self._lock()
             res = FLIGetDeviceStatus(self._device, &status)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not fetch device status.')
         with nogil:
+            self._lock()
             res = FLIGetExposureStatus(self._device, &timeleft)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not fetch remaining exposure time.')
 
@@ -332,6 +682,81 @@ cdef class FliDriver:
         return (status == FLI_CAMERA_STATUS_UNKNOWN and timeleft == 0) or \
                (status != FLI_CAMERA_STATUS_UNKNOWN and status & FLI_CAMERA_DATA_READY)
 
+    cdef long _check_data_ready(self, bint* ready, long* timeleft) noexcept nogil:
+        """Same as is_data_ready(), but without the GIL. Also returns the remaining exposure time in ms."""
+        cdef long status
+        cdef long res
+        self._lock()
+        res = FLIGetDeviceStatus(self._device, &status)
+        if res == 0:
+            res = FLIGetExposureStatus(self._device, timeleft)
+        self._unlock()
+        if res != 0:
+            return res
+        ready[0] = (status == FLI_CAMERA_STATUS_UNKNOWN and timeleft[0] == 0) or \
+                   (status != FLI_CAMERA_STATUS_UNKNOWN and (status & FLI_CAMERA_DATA_READY) != 0)
+        return 0
+
+    def wait_data_ready(self, max_wait: float, poll_interval: float = 0.001, guard: float = 0.05) -> bool:
+        """Waits without the GIL until the image data is ready to be read out, for at most max_wait seconds.
+
+        While the exposure is still running, this sleeps until shortly before its expected end without
+        talking to the camera, and only then polls the camera status every poll_interval seconds. A wait can
+        be aborted from another thread via abort_wait().
+
+        Args:
+            max_wait: Maximum time to wait in seconds.
+            poll_interval: Interval for polling the camera status near the end of the exposure in seconds.
+            guard: Time before the expected end of the exposure at which polling starts in seconds.
+
+        Returns:
+            bool: Whether data is ready, False if max_wait passed or the wait was aborted.
+
+        Raises:
+            ValueError: If fetching device or exposure status failed.
+        """
+
+        # variables
+        cdef double deadline = _monotonic() + max_wait
+        cdef double poll_c = poll_interval
+        cdef double guard_c = guard
+        cdef double now, sleep_until
+        cdef bint ready = False
+        cdef long timeleft = 0
+        cdef long res = 0
+
+        with nogil:
+            while not self._abort_wait:
+                # ask camera
+                res = self._check_data_ready(&ready, &timeleft)
+                if res != 0 or ready:
+                    break
+                now = _monotonic()
+                if now >= deadline:
+                    break
+
+                # far from the end? then sleep until shortly before it, only checking for an abort
+                sleep_until = min(now + timeleft / 1000. - guard_c, deadline)
+                if sleep_until > now + poll_c:
+                    while not self._abort_wait and now < sleep_until:
+                        usleep(<unsigned int>(min(sleep_until - now, 0.01) * 1e6))
+                        now = _monotonic()
+                else:
+                    usleep(<unsigned int>(poll_c * 1e6))
+
+        if res != 0:
+            raise ValueError('Could not fetch exposure status.')
+        return ready
+
+    def abort_wait(self) -> None:
+        """Aborts a running wait_data_ready(). Can be called from any thread and doesn't talk to the camera."""
+        self._abort_wait = True
+
+    def abort_readout(self) -> None:
+        """Stops a running grab_rows() after the current row, and all further ones until the next exposure is
+        started. Can be called from any thread and doesn't talk to the camera."""
+        self._abort_readout = True
+
     def get_temp(self, channel: FliTemperature) -> float:
         """Returns the temperature of the given sensor.
 
@@ -352,7 +777,9 @@ cdef class FliDriver:
 
         # get it
         with nogil:
+            self._lock()
             res = FLIReadTemperature(self._device, channel_c, &temp)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not fetch temperature.')
 
@@ -375,13 +802,44 @@ cdef class FliDriver:
 
         # get it
         with nogil:
+            self._lock()
             res = FLIGetCoolerPower(self._device, &power)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not fetch cooler power.')
 
         # return it
         return power
 
+    def get_telemetry(self) -> Tuple[float, float, float]:
+        """Samples both temperature sensors and the cooler power in a single call without the GIL.
+
+        Returns:
+            Tuple with CCD temperature, base temperature and cooling power in percent.
+
+        Raises:
+            ValueError: If fetching a value failed.
+        """
+
+        # variables
+        cdef double ccd, base, power
+        cdef long res
+
+        # get all
+        with nogil:
+            self._lock()
+            res = FLIReadTemperature(self._device, FLI_TEMPERATURE_CCD, &ccd)
+            if res == 0:
+                res = FLIReadTemperature(self._device, FLI_TEMPERATURE_BASE, &base)
+            if res == 0:
+                res = FLIGetCoolerPower(self._device, &power)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not fetch telemetry.')
+
+        # return them
+        return ccd, base, power
+
     def grab_row(self, width: int) -> np.ndarray:
         """Reads out a row from the camera.
 
@@ -405,13 +863,97 @@ cdef class FliDriver:
 
         # call library
         with nogil:
+            self._lock()
             res = FLIGrabRow(self._device, row_data, width_c)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not grab row from camera.')
 
         # return row
         return row
 
+    def grab_frame(self, np.ndarray[unsigned short, ndim=2, mode="c"] out) -> None:
+        """Reads out a whole frame from the camera into a preallocated array.
+
+        All rows are grabbed in a single loop without the GIL, directly into the memory of the given
+        array, so no per-row allocation or copy is needed.
+
+        Args:
+            out: C-contiguous uint16 array of shape (height, width) to read the frame into.
+
+        Raises:
+            ValueError: If reading a row failed.
+        """
+        self.grab_rows(out, 0, out.shape[0])
+
+    def grab_rows(self, np.ndarray[unsigned short, ndim=2, mode="c"] out, first: int, count: int,
+                  FrameStats stats = None) -> None:
+        """Reads out the next rows from the camera into rows first..first+count of a preallocated array.
+
+        Rows always come off the camera in order, so consecutive calls must continue where the last one
+        stopped.
+
+        Args:
+            out: C-contiguous uint16 array of shape (height, width) the frame is read into.
+            first: Index of first row in out to write to.
+            count: Number of rows to read.
+            stats: If given, each row is added to these statistics right after it has been read.
+
+        Raises:
+            ValueError: If the rows are outside of out, reading a row failed, or the readout was aborted.
+        """
+
+        # check range
+        if first < 0 or count < 0 or first + count > out.shape[0]:
+            raise ValueError('Rows %d..%d are outside of frame with %d rows.' % (first, first + count, out.shape[0]))
+
+        # get pointer to data and dimensions
+        cdef unsigned short* data = <unsigned short*> out.data
+        cdef size_t width = out.shape[1]
+        cdef Py_ssize_t row = first
+        cdef Py_ssize_t last = first + count
+        cdef long res = 0
+
+        # call library for every row, and update statistics while the row is still in cache; the device stays
+        # locked for the whole block, so no other call gets in between rows
+        with nogil:
+            self._lock()
+            while row < last and not self._abort_readout:
+                res = FLIGrabRow(self._device, <void*>(data + row * width), width)
+                if res != 0:
+                    break
+                if stats is not None:
+                    stats.add_row(data + row * width, width, row)
+                row += 1
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not grab row %d from camera.' % row)
+        if row < last:
+            raise ValueError('Readout aborted at row %d.' % row)
+
+    def iter_row_blocks(self, out: np.ndarray, block_rows: int,
+                        stats: FrameStats = None) -> Iterator[Tuple[int, np.ndarray]]:
+        """Reads out a frame into a preallocated array block by block, yielding each block once it's complete.
+
+        Args:
+            out: C-contiguous uint16 array of shape (height, width) to read the frame into.
+            block_rows: Number of rows per block.
+            stats: If given, all rows are added to these statistics during readout.
+
+        Yields:
+            Tuples with the index of the first row of the block and a view on the block in out.
+
+        Raises:
+            ValueError: If reading a row failed.
+        """
+        if block_rows < 1:
+            raise ValueError('Need at least one row per block.')
+        height = out.shape[0]
+        for first in range(0, height, block_rows):
+            count = min(block_rows, height - first)
+            self.grab_rows(out, first, count, stats)
+            yield first, out[first:first + count]
+
     def cancel_exposure(self) -> None:
         """Cancel an exposure.
 
@@ -421,10 +963,185 @@ cdef class FliDriver:
         """
         cdef long res
         with nogil:
+            self._lock()
             res = FLICancelExposure(self._device)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not cancel exposure.')
 
+    def set_nflushes(self, nflushes: int) -> None:
+        """Sets the number of times the CCD array is flushed before each exposure. Does nothing, if it's
+        unchanged since the last call.
+
+        Args:
+            nflushes: Number of flushes, fewer flushes start exposures faster.
+
+        Raises:
+            ValueError: If setting the number of flushes failed.
+        """
+
+        cdef long nflushes_c = nflushes
+        cdef long res
+
+        # unchanged?
+        if not self._config_changed('nflushes', nflushes):
+            return
+
+        # set flushes
+        with nogil:
+            self._lock()
+            res = FLISetNFlushes(self._device, nflushes_c)
+            self._unlock()
+        if res != 0:
+            self._config.clear()
+            raise ValueError('Could not set number of flushes.')
+        self._config['nflushes'] = nflushes
+
+    def set_background_flush(self, enabled: bool) -> None:
+        """Starts or stops flushing the CCD continuously in the background, to keep it clean between exposures.
+        Starting an exposure stops background flushing.
+
+        Args:
+            enabled: Whether to start or stop background flushing.
+
+        Raises:
+            ValueError: If controlling background flushing failed.
+        """
+
+        cdef flibgflush_t bgflush = FLI_BGFLUSH_START if enabled else FLI_BGFLUSH_STOP
+        cdef long res
+
+        # start/stop
+        with nogil:
+            self._lock()
+            res = FLIControlBackgroundFlush(self._device, bgflush)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not control background flush.')
+
+    def set_external_trigger(self, trigger: ExternalTrigger | None) -> None:
+        """Sets, whether exposures started with start_exposure() are armed and only start on a trigger, either
+        on the external trigger input or from trigger_exposure(). Does nothing, if it's unchanged since the last
+        call.
+
+        The SDK clears the trigger by closing the shutter, so this is only sent to the camera, if a trigger has
+        been set before.
+
+        Args:
+            trigger: Edge of the trigger input to start exposures on, or None to start them right away.
+
+        Raises:
+            ValueError: If setting the trigger mode failed.
+        """
+
+        cdef flishutter_t shutter = FLI_SHUTTER_CLOSE if trigger is None else trigger.value
+        cdef long res
+
+        # unchanged? clearing the trigger closes the shutter, so only do that, if a trigger was actually set
+        if trigger is None:
+            if not self._trigger_set:
+                return
+        elif self._trigger_set and not self._config_changed('trigger', trigger):
+            return
+
+        # set shutter mode
+        with nogil:
+            self._lock()
+            res = FLIControlShutter(self._device, shutter)
+            self._unlock()
+        if res != 0:
+            self._config.clear()
+            raise ValueError('Could not set trigger mode.')
+        self._config['trigger'] = trigger
+        self._trigger_set = trigger is not None
+
+    def trigger_exposure(self) -> None:
+        """Starts an armed exposure that is waiting for a trigger. Can be called from any thread, even while
+        another thread is in wait_data_ready().
+
+        Only ProLine cameras with software trigger support implement this, the SDK rejects it for all others,
+        e.g. MaxCam cameras, which can only be triggered on the external trigger input.
+
+        Raises:
+            ValueError: If the camera doesn't support software triggers, or triggering failed.
+        """
+
+        cdef long res
+
+        # trigger
+        with nogil:
+            self._lock()
+            res = FLITriggerExposure(self._device)
+            self._unlock()
+        if res == -EINVAL:
+            raise ValueError('Could not trigger exposure, camera does not support software triggers.')
+        if res != 0:
+            raise ValueError('Could not trigger exposure.')
+
+    def end_exposure(self) -> None:
+        """Ends the running exposure early, its data can then be read out as usual.
+
+        Raises:
+            ValueError: If ending the exposure failed.
+        """
+
+        cdef long res
+
+        # end
+        with nogil:
+            self._lock()
+            res = FLIEndExposure(self._device)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not end exposure.')
+
+    def start_video_mode(self) -> None:
+        """Start continuous video mode with the current window, binning and exposure time.
+
+        Raises:
+            ValueError: If starting video mode failed, e.g. because the camera doesn't support it.
+        """
+        cdef long res
+        with nogil:
+            self._lock()
+            res = FLIStartVideoMode(self._device)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not start video mode.')
+
+    def stop_video_mode(self) -> None:
+        """Stop continuous video mode.
+
+        Raises:
+            ValueError: If stopping video mode failed.
+        """
+        cdef long res
+        with nogil:
+            self._lock()
+            res = FLIStopVideoMode(self._device)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not stop video mode.')
+
+    def grab_video_frame(self, np.ndarray[unsigned short, ndim=2, mode="c"] out) -> None:
+        """Grab the next frame in video mode into a preallocated array.
+
+        Args:
+            out: C-contiguous uint16 array of shape (height, width) to read the frame into.
+
+        Raises:
+            ValueError: If grabbing the frame failed.
+        """
+        cdef void* data = <void*> out.data
+        cdef size_t size = out.nbytes
+        cdef long res
+        with nogil:
+            self._lock()
+            res = FLIGrabVideoFrame(self._device, data, size)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not grab video frame.')
+
     def set_temperature(self, setpoint: float) -> None:
         """Set cooling emperature setpoint.
 
@@ -437,7 +1154,9 @@ cdef class FliDriver:
         cdef double setpoint_c = setpoint
         cdef long res
         with nogil:
+            self._lock()
             res = FLISetTemperature(self._device, setpoint_c)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not set temperature.')
 
@@ -459,7 +1178,9 @@ cdef class FliDriver:
 
         # get it
         with nogil:
+            self._lock()
             res = FLIGetModel(self._device, <char*>model, 1024)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not fetch model.')
 
@@ -478,7 +1199,9 @@ cdef class FliDriver:
 
         # get it
         with nogil:
+            self._lock()
             res = FLIGetSerialString(self._device, <char*>serial, 1024)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not fetch serial string.')
 
@@ -498,7 +1221,9 @@ cdef class FliDriver:
 
         # get it
         with nogil:
+            self._lock()
             res = FLIGetFilterPos(self._device, &pos)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not fetch filter position.')
 
@@ -517,7 +1242,9 @@ cdef class FliDriver:
 
         # set filter pos
         with nogil:
+            self._lock()
             res = FLISetFilterPos(self._device, pos_c)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not set filter position.')
 
@@ -533,7 +1260,9 @@ cdef class FliDriver:
 
         # set active filter wheel
         with nogil:
+            self._lock()
             res = FLISetActiveWheel(self._device, wheel_c)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not set active filter wheel.')
 
@@ -550,7 +1279,9 @@ cdef class FliDriver:
 
         # get active filter wheel
         with nogil:
+            self._lock()
             res = FLIGetActiveWheel(self._device, &wheel)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not fetch active filter wheel.')
         return wheel
@@ -568,7 +1299,9 @@ cdef class FliDriver:
 
         # get active filter wheel
         with nogil:
+            self._lock()
             res = FLIGetFilterCount(self._device, &count)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not fetch filter count.')
         return count
@@ -589,9 +1322,144 @@ cdef class FliDriver:
 
         # get it
         with nogil:
+            self._lock()
             res = FLIGetFilterName(self._device, pos_c, <char*>name, 100)
+            self._unlock()
         if res != 0:
             raise ValueError('Could not fetch filter name.')
 
         # return it
         return bytes(name).decode('utf-8')
+
+    def step_motor_async(self, steps: int) -> None:
+        """Start moving the stepper of a focuser by the given number of steps and return right away.
+
+        Only focusers with firmware before revision 0x43 halt on a move by zero steps, others ignore it.
+
+        Args:
+            steps: Number of steps to move, negative values move inwards.
+        """
+
+        cdef long steps_c = steps
+        cdef long res
+
+        # start move
+        with nogil:
+            self._lock()
+            res = FLIStepMotorAsync(self._device, steps_c)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not move stepper.')
+
+    def get_stepper_position(self) -> int:
+        """Returns the current position of the stepper of a focuser.
+
+        Returns:
+            Stepper position.
+        """
+
+        # variables
+        cdef long pos
+        cdef long res
+
+        # get it
+        with nogil:
+            self._lock()
+            res = FLIGetStepperPosition(self._device, &pos)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not fetch stepper position.')
+
+        # return it
+        return pos
+
+    def get_steps_remaining(self) -> int:
+        """Returns the number of steps remaining in the current move of the stepper.
+
+        Returns:
+            Remaining steps.
+        """
+
+        # variables
+        cdef long steps
+        cdef long res
+
+        # get it
+        with nogil:
+            self._lock()
+            res = FLIGetStepsRemaining(self._device, &steps)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not fetch remaining steps.')
+
+        # return it
+        return steps
+
+    def is_moving(self) -> bool:
+        """Whether the stepper of a focuser is moving or homing.
+
+        Besides the device status, this also checks the remaining steps, since older devices don't report a
+        status and newer ones may not report moving right after a move has been started.
+
+        Returns:
+            bool: Whether the stepper is moving.
+        """
+
+        # variables
+        cdef long status
+        cdef long steps = 0
+        cdef long res
+
+        # get status and remaining steps
+        with nogil:
+            self._lock()
+            res = FLIGetDeviceStatus(self._device, &status)
+            if res == 0:
+                res = FLIGetStepsRemaining(self._device, &steps)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not fetch stepper status.')
+
+        # moving?
+        if steps > 0:
+            return True
+        return status != FLI_FOCUSER_STATUS_UNKNOWN and not (status & FLI_FOCUSER_STATUS_LEGACY) and \
+               (status & FLI_FOCUSER_STATUS_MOVING_MASK) != 0
+
+    def home_device(self) -> None:
+        """Start homing a focuser and return right away, use is_moving() to wait for it.
+
+        Older devices only return once homing has finished.
+        """
+
+        cdef long res
+
+        # start homing
+        with nogil:
+            self._lock()
+            res = FLIHomeDevice(self._device)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not home device.')
+
+    def get_focuser_extent(self) -> int:
+        """Returns the maximum position of the stepper of a focuser.
+
+        Returns:
+            Maximum stepper position.
+        """
+
+        # variables
+        cdef long extent
+        cdef long res
+
+        # get it
+        with nogil:
+            self._lock()
+            res = FLIGetFocuserExtent(self._device, &extent)
+            self._unlock()
+        if res != 0:
+            raise ValueError('Could not fetch focuser extent.')
+
+        # return it
+        return extent
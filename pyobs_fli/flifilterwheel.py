@@ -1,4 +1,8 @@
+import asyncio
+import contextlib
 import logging
+import time
+from collections.abc import Awaitable, Callable
 from itertools import chain
 from typing import Any
 
@@ -11,6 +15,7 @@ from pyobs.mixins import MotionStatusMixin
 from pyobs.modules import Module
 from pyobs.utils.enums import MotionStatus
 
+from pyobs_fli.filterplan import MoveTimeModel, plan_order
 from pyobs_fli.flibase import FliBaseMixin
 from pyobs_fli.flidriver import DeviceType
 
@@ -22,6 +27,15 @@ log = logging.getLogger(__name__)
 _FILTER_MOVE_TIMEOUT = 120.0
 
 
+class _FilterMove:
+    """A filter move started by FliFilterWheel.start_move()."""
+
+    def __init__(self, filter_name: str, position: int):
+        self.filter_name = filter_name
+        self.position = position
+        self.task: asyncio.Task[None] | None = None
+
+
 class FliFilterWheel(Module, FliBaseMixin, MotionStatusMixin, IFilters, IFitsHeaderBefore):
     """A pyobs module for FLI filter wheels."""
 
@@ -31,6 +45,7 @@ class FliFilterWheel(Module, FliBaseMixin, MotionStatusMixin, IFilters, IFitsHea
         self,
         filter_names: list[str] | list[list[str]],
         filter_move_timeout: float = _FILTER_MOVE_TIMEOUT,
+        slot_move_time: float = 0.5,
         **kwargs: Any,
     ):
         """Initializes a new FliFilterWheel.
@@ -38,6 +53,8 @@ class FliFilterWheel(Module, FliBaseMixin, MotionStatusMixin, IFilters, IFitsHea
         Args:
             filter_names: Names of filters.
             filter_move_timeout: Seconds to wait for a filter move to complete.
+            slot_move_time: Assumed time for moving the wheel by one slot in seconds, until moves have been
+                measured. Used for planning filter sequences.
         """
         super().__init__(dev_type=DeviceType.FILTERWHEEL, motion_status_interfaces=["IFilters"], **kwargs)
 
@@ -47,6 +64,10 @@ class FliFilterWheel(Module, FliBaseMixin, MotionStatusMixin, IFilters, IFitsHea
 
         self._filter_move_timeout = filter_move_timeout
         self._current_filter = ""
+        self._move: _FilterMove | None = None
+        self._position: int | None = None
+        self._slot_move_time = slot_move_time
+        self._move_model = MoveTimeModel(slot_move_time)
 
     async def open(self) -> None:
         """Open module."""
@@ -58,8 +79,12 @@ class FliFilterWheel(Module, FliBaseMixin, MotionStatusMixin, IFilters, IFitsHea
             raise ValueError("No driver found.")
 
         driver = self._driver
-        serial = await self._run_blocking_or_raise(driver.get_serial_string)
-        log.info("Connected to filter wheel with serial number: %s", serial)
+        properties = await self._run_blocking_or_raise(driver.get_properties)
+        log.info("Connected to %s filter wheel with serial number: %s", properties.model, properties.serial)
+
+        # move times depend on the distance around the wheel
+        filter_count = await self._run_blocking_or_raise(driver.get_filter_count)
+        self._move_model = MoveTimeModel(self._slot_move_time, filter_count)
 
         await self._change_motion_status(MotionStatus.IDLE)
 
@@ -70,15 +95,22 @@ class FliFilterWheel(Module, FliBaseMixin, MotionStatusMixin, IFilters, IFitsHea
         await self.comm.set_capabilities(IFilters, FiltersCapabilities(filters=all_filters))
 
         pos = await self._run_blocking_or_raise(driver.get_filter_pos)
+        self._position = pos
         self._current_filter = self._resolve_filter_name(pos)
         await self.comm.set_state(IFilters, FilterState(filter=self._current_filter))
         await self.comm.set_state(IReady, ReadyState(ready=True))
 
     async def close(self) -> None:
         """Close the module."""
+        if self._move is not None and self._move.task is not None:
+            self._move.task.cancel()
         await Module.close(self)
         await FliBaseMixin.close(self)
 
+    def _is_busy(self) -> bool:
+        """Whether the wheel is moving, a keep-alive ping would only queue up behind the move."""
+        return self.motion_status() == MotionStatus.SLEWING
+
     def _resolve_filter_name(self, pos: int) -> str:
         div, mod = divmod(pos, 7)
         try:
@@ -89,45 +121,151 @@ class FliFilterWheel(Module, FliBaseMixin, MotionStatusMixin, IFilters, IFitsHea
         except IndexError:
             return ""
 
-    async def set_filter(self, filter_name: str, **kwargs: Any) -> None:
-        """Set the current filter."""
+    def _filter_position(self, filter_name: str) -> int:
+        """Returns the wheel position of the given filter."""
         if filter_name in self._filter_names[0]:
             p = self._filter_names[0].index(filter_name)
-            pos = 0 if p == 0 else 7 - p
-        elif filter_name in self._filter_names[1]:
+            return 0 if p == 0 else 7 - p
+        elif len(self._filter_names) > 1 and filter_name in self._filter_names[1]:
             p = self._filter_names[1].index(filter_name)
-            pos = 7 * (p + 1)
+            return 7 * (p + 1)
         else:
             raise exc.ModuleError("Filter not found")
 
+    async def set_filter(self, filter_name: str, **kwargs: Any) -> None:
+        """Set the current filter."""
+        await self.start_move(filter_name)
+        await self.wait_for_move()
+
+    async def start_move(self, filter_name: str) -> None:
+        """Start moving to the given filter and return right away, e.g. to prepare a camera in the meantime.
+
+        If another move is still running, the new one starts after it. libfli has no asynchronous positioning
+        command for filter wheels, so the move itself is a single SDK call, which can neither report progress
+        nor be stopped.
+
+        Args:
+            filter_name: Name of filter to move to.
+
+        Raises:
+            ModuleError: If the filter is unknown.
+        """
+        pos = self._filter_position(filter_name)
         log.info("Setting filter to %s at position %d...", filter_name, pos)
         await self._change_motion_status(MotionStatus.SLEWING)
-        driver = self._driver
 
-        def _set() -> None:
-            driver.set_filter_pos(pos)
+        previous = self._move
+        move = _FilterMove(filter_name, pos)
+        move.task = asyncio.create_task(self._run_move(move, previous))
+        move.task.add_done_callback(self._move_done)
+        self._move = move
+
+    @staticmethod
+    def _move_done(task: asyncio.Task[None]) -> None:
+        # retrieve the error of a failed move here, since nobody might be waiting for it
+        if not task.cancelled() and task.exception() is not None:
+            log.error("Filter move failed: %s", task.exception())
+
+    async def _run_move(self, move: _FilterMove, previous: _FilterMove | None) -> None:
+        """Run a move after the previous one has finished on the hardware."""
+        if previous is not None and previous.task is not None:
+            with contextlib.suppress(Exception):
+                await previous.task
 
+        driver = self._driver
+        if driver is None:
+            raise ValueError("No driver found.")
+        start = self._position
+        self._position = None
+        started = time.monotonic()
         try:
-            # A physical filter move can legitimately take far longer than a typical SDK
-            # call, so bound it with a dedicated, configurable move timeout rather than the
-            # short SDK-call default -- which cut off long rotations mid-move.
-            await self._run_blocking_or_raise(_set, timeout=self._filter_move_timeout)
+            # The SDK has no asynchronous positioning command, so this is a single blocking call, which polls
+            # the wheel internally until it has arrived. A physical filter move can legitimately take far
+            # longer than a typical SDK call, so bound it with a dedicated, configurable move timeout.
+            await self._run_blocking_or_raise(lambda: driver.set_filter_pos(move.position), self._filter_move_timeout)
+            if start is not None:
+                self._move_model.observe(start, move.position, time.monotonic() - started)
 
             # Confirm the wheel actually reports the requested position before declaring
             # success, so an SDK call that returned without the wheel having arrived can't
             # leave the published filter state silently wrong.
             actual = await self._run_blocking_or_raise(driver.get_filter_pos)
-            if actual != pos:
-                raise exc.MoveError(f"Filter wheel reported position {actual} after moving to {pos}.")
+            if actual != move.position:
+                raise exc.MoveError(f"Filter wheel reported position {actual} after moving to {move.position}.")
         except Exception:
             # Don't leave the wheel stuck reporting "slewing" after a failed move.
             await self._change_motion_status(MotionStatus.ERROR)
             raise
 
-        self._current_filter = filter_name
-        await self._change_motion_status(MotionStatus.POSITIONED)
-        await self.comm.send_event(FilterChangedEvent(filter_name))
-        await self.comm.set_state(IFilters, FilterState(filter=filter_name))
+        self._position = move.position
+        self._current_filter = move.filter_name
+        if self._move is move:
+            await self._change_motion_status(MotionStatus.POSITIONED)
+        await self.comm.send_event(FilterChangedEvent(move.filter_name))
+        await self.comm.set_state(IFilters, FilterState(filter=move.filter_name))
+
+    async def wait_for_move(self) -> None:
+        """Wait for the current filter move to finish.
+
+        Raises:
+            MoveError: If the wheel didn't arrive at the requested position.
+        """
+        move = self._move
+        if move is None or move.task is None:
+            return
+        await asyncio.shield(move.task)
+
+    def _final_position(self) -> int | None:
+        """Returns the position the wheel is at, or will be at once the running move has finished."""
+        move = self._move
+        if move is not None and move.task is not None and not move.task.done():
+            return move.position
+        return self._position
+
+    def plan_filters(self, filter_names: list[str]) -> list[str]:
+        """Returns the given filters in the order that minimizes the total time for moving through all of them.
+
+        Move times are estimated from the durations of previous moves, starting at the position the wheel is at
+        once the running move, if any, has finished.
+
+        Args:
+            filter_names: Filters to visit, duplicates are visited only once.
+
+        Returns:
+            Filter names in the order to visit them.
+
+        Raises:
+            ModuleError: If a filter is unknown.
+        """
+        positions = {self._filter_position(name): name for name in filter_names}
+        order = plan_order(self._final_position(), list(positions), self._move_model.estimate)
+        return [positions[pos] for pos in order]
+
+    def estimate_move_time(self, filter_names: list[str]) -> float:
+        """Returns the estimated time for moving through the given filters in that order, starting at the current
+        position, in seconds."""
+        path = [self._filter_position(name) for name in filter_names]
+        start = self._final_position()
+        if start is not None:
+            path.insert(0, start)
+        return sum(self._move_model.estimate(a, b) for a, b in zip(path, path[1:], strict=False))
+
+    async def run_filter_sequence(self, filter_names: list[str], step: Callable[[str], Awaitable[None]]) -> list[str]:
+        """Moves through the given filters in the fastest order and runs step for each of them once arrived.
+
+        Args:
+            filter_names: Filters to visit, duplicates are visited only once.
+            step: Coroutine function called with the filter name after each move, e.g. for taking exposures.
+
+        Returns:
+            Filter names in the order they were visited.
+        """
+        order = self.plan_filters(filter_names)
+        log.info("Running filter sequence %s...", ", ".join(order))
+        for filter_name in order:
+            await self.set_filter(filter_name)
+            await step(filter_name)
+        return order
 
     async def init(self, **kwargs: Any) -> None:
         pass
@@ -136,6 +274,7 @@ class FliFilterWheel(Module, FliBaseMixin, MotionStatusMixin, IFilters, IFitsHea
         pass
 
     async def stop_motion(self, device: str | None = None, **kwargs: Any) -> None:
+        """Does nothing, since the SDK has no command for stopping a filter wheel."""
         pass
 
     async def get_fits_header_before(
@@ -0,0 +1,304 @@
+import asyncio
+import contextlib
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+import pyobs.utils.exceptions as exc
+from pyobs.interfaces import FitsHeaderEntry, IFitsHeaderBefore, IFocuser, IReady
+from pyobs.interfaces.IFocuser import FocuserState
+from pyobs.interfaces.IReady import ReadyState
+from pyobs.mixins import MotionStatusMixin
+from pyobs.modules import Module
+from pyobs.utils.enums import MotionStatus
+
+from pyobs_fli.flibase import FliBaseMixin
+from pyobs_fli.flidriver import DeviceType
+
+log = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# A move across the whole range or homing can take much longer than a typical SDK call, so moves get their own
+# deadline, after which they are considered failed.
+_FOCUS_MOVE_TIMEOUT = 120.0
+
+
+class FliFocuser(Module, FliBaseMixin, MotionStatusMixin, IFocuser, IFitsHeaderBefore):
+    """A pyobs module for FLI focusers."""
+
+    __module__ = "pyobs_fli"
+
+    def __init__(
+        self,
+        steps_per_mm: float,
+        poll_interval: float = 0.1,
+        focus_move_timeout: float = _FOCUS_MOVE_TIMEOUT,
+        **kwargs: Any,
+    ):
+        """Initializes a new FliFocuser.
+
+        Args:
+            steps_per_mm: Number of stepper steps per millimeter of focus.
+            poll_interval: Interval for polling the stepper status during moves in seconds.
+            focus_move_timeout: Seconds to wait for a move or homing to complete.
+        """
+        super().__init__(dev_type=DeviceType.FOCUSER, motion_status_interfaces=["IFocuser"], **kwargs)
+
+        self._steps_per_mm = steps_per_mm
+        self._poll_interval = poll_interval
+        self._focus_move_timeout = focus_move_timeout
+        self._extent = 0
+        self._position: int | None = None
+        self._focus = 0.0
+        self._focus_offset = 0.0
+        self._move_task: asyncio.Task[None] | None = None
+        self._move_aborted = asyncio.Event()
+
+    async def open(self) -> None:
+        """Open module."""
+        await Module.open(self)
+        await FliBaseMixin.open(self)
+        await MotionStatusMixin.open(self)
+
+        if self._driver is None:
+            raise ValueError("No driver found.")
+
+        driver = self._driver
+        properties = await self._run_blocking_or_raise(driver.get_properties)
+        log.info("Connected to %s focuser with serial number: %s", properties.model, properties.serial)
+
+        self._extent = await self._run_blocking_or_raise(driver.get_focuser_extent)
+        self._position = await self._run_blocking_or_raise(driver.get_stepper_position)
+        self._focus = self._position / self._steps_per_mm
+        await self._change_motion_status(MotionStatus.IDLE)
+        await self._publish_state()
+        await self.comm.set_state(IReady, ReadyState(ready=True))
+
+    async def close(self) -> None:
+        """Close the module."""
+        if self._move_task is not None:
+            self._move_task.cancel()
+        await Module.close(self)
+        await FliBaseMixin.close(self)
+
+    def _is_busy(self) -> bool:
+        """Whether the focuser is moving or homing, it is polled anyway then."""
+        return self.motion_status() in (MotionStatus.SLEWING, MotionStatus.INITIALIZING)
+
+    @property
+    def position(self) -> int | None:
+        """Cached position of the stepper, or None while moving or if unknown."""
+        return self._position
+
+    async def _publish_state(self) -> None:
+        await self.comm.set_state(IFocuser, FocuserState(focus=self._focus, focus_offset=self._focus_offset))
+
+    async def set_focus(self, focus: float, **kwargs: Any) -> None:
+        """Sets new focus.
+
+        Args:
+            focus: New focus value in mm.
+
+        Raises:
+            InvalidArgumentError: If given value is invalid.
+            AbortedError: If movement was aborted.
+            MoveError: If focuser cannot be moved.
+        """
+        await self.start_focus_move(focus)
+        await self.wait_for_move()
+
+    async def set_focus_offset(self, offset: float, **kwargs: Any) -> None:
+        """Sets focus offset.
+
+        Args:
+            offset: New focus offset in mm.
+
+        Raises:
+            InvalidArgumentError: If given value is invalid.
+            MoveError: If focuser cannot be moved.
+        """
+        await self._start_move(self._focus, offset)
+        await self.wait_for_move()
+
+    async def start_focus_move(self, focus: float) -> None:
+        """Start moving to the given focus and return right away, use wait_for_move() to wait for it.
+
+        A move that is still running gets aborted and has to arrive first.
+
+        Args:
+            focus: New focus value in mm.
+
+        Raises:
+            InvalidArgumentError: If given value is outside the range of the focuser.
+        """
+        await self._start_move(focus, self._focus_offset)
+
+    async def _start_move(self, focus: float, offset: float) -> None:
+        target = round((focus + offset) * self._steps_per_mm)
+        if not 0 <= target <= self._extent:
+            raise exc.InvalidArgumentError(
+                f"Focus {focus + offset:.3f}mm is outside of range 0..{self._extent / self._steps_per_mm:.3f}mm."
+            )
+        await self._finish_running_move()
+        driver = self._driver
+        if driver is None:
+            raise ValueError("No driver found.")
+
+        # the cached position is unknown after a failed move
+        position = self._position
+        if position is None:
+            position = await self._run_blocking_or_raise(driver.get_stepper_position)
+
+        log.info("Moving focus to %.3fmm with offset %.3fmm...", focus, offset)
+        await self._change_motion_status(MotionStatus.SLEWING)
+        try:
+            await self._run_blocking_or_raise(lambda: driver.step_motor_async(target - position))
+        except Exception:
+            await self._change_motion_status(MotionStatus.ERROR)
+            raise
+        self._position = None
+        self._focus, self._focus_offset = focus, offset
+        self._move_aborted = asyncio.Event()
+        self._move_task = asyncio.create_task(self._track_move(target))
+
+    async def _track_move(self, target: int | None) -> None:
+        """Poll the stepper until it stops, then update the cached position and publish the new state."""
+        driver = self._driver
+        if driver is None:
+            raise ValueError("No driver found.")
+        deadline = time.monotonic() + self._focus_move_timeout
+        try:
+            while await self._run_blocking_or_raise(driver.is_moving):
+                if time.monotonic() > deadline:
+                    raise exc.MoveError(f"Focuser still moving after {self._focus_move_timeout}s.")
+                await asyncio.sleep(self._poll_interval)
+            self._position = await self._run_blocking_or_raise(driver.get_stepper_position)
+            if not self._move_aborted.is_set() and target is not None and self._position != target:
+                raise exc.MoveError(f"Focuser reported position {self._position} after moving to {target}.")
+        except Exception:
+            # Don't leave the focuser stuck reporting "slewing" after a failed move.
+            await self._change_motion_status(MotionStatus.ERROR)
+            raise
+
+        # after an abort, the focus is wherever the stepper has stopped
+        aborted = self._move_aborted.is_set()
+        if aborted:
+            self._focus = self._position / self._steps_per_mm - self._focus_offset
+        await self._change_motion_status(MotionStatus.IDLE if aborted else MotionStatus.POSITIONED)
+        await self._publish_state()
+
+    async def wait_for_move(self) -> None:
+        """Wait for the current move to finish.
+
+        Raises:
+            AbortedError: If the move has been aborted via stop_motion().
+            MoveError: If the focuser didn't arrive at the requested position.
+        """
+        task = self._move_task
+        if task is None:
+            return
+        aborted = self._move_aborted
+        waiter = asyncio.ensure_future(aborted.wait())
+        try:
+            await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        if aborted.is_set():
+            raise exc.AbortedError("Focuser move has been aborted.")
+        await task
+
+    async def _finish_running_move(self) -> None:
+        """Abort a running move and wait for the stepper to arrive, before the next move can start."""
+        task = self._move_task
+        if task is None or task.done():
+            return
+        await self.stop_motion()
+        with contextlib.suppress(Exception):
+            await asyncio.shield(task)
+
+    async def focus_sweep(
+        self, focus_values: list[float], step: Callable[[float, asyncio.Event], Awaitable[_T]]
+    ) -> list[_T]:
+        """Runs step at each of the given focus values, e.g. for taking the exposures of an autofocus run.
+
+        step is called with the focus value and an event, which it should set as soon as the focuser may move
+        again, i.e. when the exposure has ended and the camera starts reading out. The move to the next focus
+        value then overlaps with the rest of step, e.g. readout and analysis. If step never sets the event,
+        moves and steps simply alternate.
+
+        Args:
+            focus_values: Focus values in mm to visit in this order.
+            step: Coroutine function to run at each focus value.
+
+        Returns:
+            Results of step for all focus values.
+        """
+        results: list[_T] = []
+        if len(focus_values) == 0:
+            return results
+        await self.set_focus(focus_values[0])
+        for focus, following in zip(focus_values, [*focus_values[1:], None], strict=True):
+            exposed = asyncio.Event()
+            task = asyncio.ensure_future(step(focus, exposed))
+            waiter = asyncio.ensure_future(exposed.wait())
+            try:
+                await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                waiter.cancel()
+
+            if following is None:
+                results.append(await task)
+            elif task.done():
+                results.append(task.result())
+                await self.set_focus(following)
+            else:
+                await self.start_focus_move(following)
+                results.append(await task)
+                await self.wait_for_move()
+        return results
+
+    async def init(self, **kwargs: Any) -> None:
+        """Home the focuser."""
+        await self._finish_running_move()
+        driver = self._driver
+        if driver is None:
+            raise ValueError("No driver found.")
+        log.info("Homing focuser...")
+        await self._change_motion_status(MotionStatus.INITIALIZING)
+        self._position = None
+        self._move_aborted = asyncio.Event()
+        await self._run_blocking_or_raise(driver.home_device, self._focus_move_timeout)
+        self._move_task = asyncio.create_task(self._track_move(None))
+        await self.wait_for_move()
+        self._focus = self._position / self._steps_per_mm - self._focus_offset if self._position is not None else 0.0
+        await self._publish_state()
+
+    async def park(self, **kwargs: Any) -> None:
+        pass
+
+    async def stop_motion(self, device: str | None = None, **kwargs: Any) -> None:
+        """Abort the current move.
+
+        The SDK can't reliably halt the stepper, a move by zero steps only does on old firmware, so this only
+        releases everyone waiting for the move. The stepper still arrives at its target, after which its
+        position is published as usual.
+        """
+        task = self._move_task
+        if task is None or task.done() or self._move_aborted.is_set():
+            return
+        log.info("Aborting focuser move...")
+        self._move_aborted.set()
+
+    async def get_fits_header_before(
+        self, namespaces: list[str] | None = None, **kwargs: Any
+    ) -> dict[str, FitsHeaderEntry]:
+        """Returns FITS header for the current status of this module."""
+        return {
+            "TEL-FOCU": FitsHeaderEntry(self._focus, "Focus position [mm]"),
+            "TEL-FOCO": FitsHeaderEntry(self._focus_offset, "Focus offset [mm]"),
+        }
+
+
+__all__ = ["FliFocuser"]
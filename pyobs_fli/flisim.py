@@ -0,0 +1,549 @@
+import math
+import threading
+import time
+from collections import Counter
+from collections.abc import Iterator
+from typing import Any
+
+import numpy as np
+
+from .flidriver import DeviceInfo, DeviceProperties, DeviceType, ExternalTrigger, FliTemperature, FrameStats
+
+# Device type bits in the domain of a DeviceInfo, like FLIDEVICE_RAW in the SDK.
+_DEVICE_TYPE_MASK = 0x0F00
+
+# Domain bit for USB devices, like FLIDOMAIN_USB in the SDK.
+_DOMAIN_USB = 0x02
+
+# Serializes access to the device list and to opening and closing devices, like the global lock of the real driver.
+_global_lock = threading.Lock()
+
+
+class SimulatedFliDriver:
+    """Drop-in replacement for FliDriver that simulates a camera, filter wheel or focuser without any hardware.
+
+    Timings for row transfers, status queries, exposures and filter moves are modelled with sleeps, so the
+    whole module stack can be run and profiled on any machine. Sleeps release the GIL, just like the nogil
+    SDK calls of the real driver, and calls on the same device are serialized by a per-device lock, so several
+    simulated devices run in parallel. Every simulated SDK call is counted in calls.
+    """
+
+    @staticmethod
+    def list_devices(device_type: DeviceType = DeviceType.CAMERA) -> list[DeviceInfo]:
+        """List the simulated devices of the given type, which is always exactly one.
+
+        Returns:
+            List of DeviceInfo tuples.
+        """
+        with _global_lock:
+            return SimulatedFliDriver._list_devices(device_type)
+
+    @staticmethod
+    def _list_devices(device_type: DeviceType) -> list[DeviceInfo]:
+        name = {
+            DeviceType.CAMERA: b"FLI Simulated Camera",
+            DeviceType.FILTERWHEEL: b"FLI Simulated Filter Wheel",
+            DeviceType.FOCUSER: b"FLI Simulated Focuser",
+        }
+        return [
+            DeviceInfo(
+                domain=_DOMAIN_USB | device_type.value,
+                filename=b"sim-" + device_type.name.lower().encode("utf-8"),
+                name=name.get(device_type, b"FLI Simulated Device"),
+            )
+        ]
+
+    def __init__(
+        self,
+        device_info: DeviceInfo,
+        width: int = 1024,
+        height: int = 1024,
+        pixel_size: float = 9e-6,
+        row_time: float = 5e-4,
+        flush_row_time: float = 2e-5,
+        status_time: float = 5e-4,
+        readout_delay: float = 0.05,
+        ambient_temp: float = 20.0,
+        cooling_rate: float = 1.0,
+        max_cooling: float = 50.0,
+        filter_count: int = 7,
+        filter_wheels: int = 1,
+        filter_move_time: float = 0.3,
+        focuser_extent: int = 10000,
+        focuser_speed: float = 1000.0,
+        software_trigger: bool = True,
+    ):
+        """Create a new simulated device.
+
+        Args:
+            device_info: A DeviceInfo obtained from list_devices.
+            width: Width of the sensor in pixels.
+            height: Height of the sensor in pixels.
+            pixel_size: Size of a pixel in meters.
+            row_time: Time to transfer a single row of the full frame width in seconds.
+            flush_row_time: Time to flush a single row before an exposure in seconds.
+            status_time: Time for a single status or settings query in seconds.
+            readout_delay: Time after the end of an exposure before data is ready in seconds.
+            ambient_temp: Ambient temperature in degrees Celsius.
+            cooling_rate: Rate at which the CCD temperature approaches its setpoint in degrees per second.
+            max_cooling: Maximum temperature difference to ambient the cooler can reach in degrees.
+            filter_count: Number of filters in the wheel.
+            filter_wheels: Number of filter wheels, 2 for a dual wheel. Like in FliFilterWheel, filter s of the
+                second wheel is at position filter_count * (s + 1).
+            filter_move_time: Time to move the wheel by one slot in seconds.
+            focuser_extent: Maximum position of the focuser in steps.
+            focuser_speed: Speed of the focuser in steps per second.
+            software_trigger: Whether the camera supports software triggers, like ProLine cameras with recent
+                firmware.
+        """
+        self._device_info = device_info
+        self._width = width
+        self._height = height
+        self._pixel_size = pixel_size
+        self._row_time = row_time
+        self._flush_row_time = flush_row_time
+        self._status_time = status_time
+        self._readout_delay = readout_delay
+        self._ambient_temp = ambient_temp
+        self._cooling_rate = cooling_rate
+        self._max_cooling = max_cooling
+        self._filter_count = filter_count
+        self._filter_wheels = filter_wheels
+        self._filter_move_time = filter_move_time
+        self._focuser_extent = focuser_extent
+        self._focuser_speed = focuser_speed
+        self._software_trigger = software_trigger
+
+        self.calls: Counter[str] = Counter()
+        self._device_lock = threading.Lock()
+        self._is_open = False
+        self._properties: DeviceProperties | None = None
+        self._config: dict[str, Any] = {}
+        self._abort_wait = threading.Event()
+        self._abort_readout = threading.Event()
+
+        # camera state
+        self._binning = (1, 1)
+        self._window = (0, 0, width, height)
+        self._dark = False
+        self._exposure_time = 0
+        self._exposure_end: float | None = None
+        self._nflushes = 1
+        self._background_flush = False
+        self._trigger: ExternalTrigger | None = None
+        self._video = False
+        self._temp = ambient_temp
+        self._temp_time = time.monotonic()
+        self._setpoint = ambient_temp
+
+        # filter wheel state
+        self._filter_pos = 0
+        self._filter_wheel_slot = (0, 0)
+        self._active_wheel = 0
+
+        # focuser state, a move goes from _stepper_from to _stepper_to, starting at _stepper_time
+        self._stepper_from = 0
+        self._stepper_to = 0
+        self._stepper_time = time.monotonic()
+
+        # a fixed noise pattern makes frames cheap to produce but still non-trivial
+        self._pattern = np.random.default_rng(0).integers(990, 1010, width, dtype=np.uint16)
+
+    def _call(self, name: str, duration: float = 0.0) -> None:
+        """Simulate an SDK call, which fails, if the device isn't open."""
+        self.calls[name] += 1
+        if not self._is_open:
+            raise ValueError("Device is not open.")
+        if duration > 0:
+            with self._device_lock:
+                time.sleep(duration)
+
+    @property
+    def _is_camera(self) -> bool:
+        return bool(self._device_info.domain & _DEVICE_TYPE_MASK == DeviceType.CAMERA.value)
+
+    def open(self) -> None:
+        """Open driver."""
+        with _global_lock:
+            self._properties = None
+            self._config.clear()
+            self._is_open = True
+            self._call("open", self._status_time)
+
+    def close(self) -> None:
+        """Close driver."""
+        with _global_lock:
+            self._properties = None
+            self._config.clear()
+            self._call("close")
+            self._is_open = False
+
+    @property
+    def name(self) -> str:
+        """Returns the name of the connected device."""
+        return str(self._device_info.name.decode("utf-8"))
+
+    def ping(self) -> None:
+        """Cheap liveness probe, which only queries the device status."""
+        self._call("ping", self._status_time)
+
+    def get_properties(self) -> DeviceProperties:
+        """Returns the static properties of the device, which are only queried once per connection."""
+        if self._properties is None:
+            self._call("get_properties", 6 * self._status_time)
+            camera = self._is_camera
+            self._properties = DeviceProperties(
+                serial=self.get_serial_string(),
+                model=self.get_model(),
+                hw_revision=1,
+                fw_revision=1,
+                full_frame=(0, 0, self._width, self._height) if camera else None,
+                visible_frame=(0, 0, self._width, self._height) if camera else None,
+                pixel_size=(self._pixel_size, self._pixel_size) if camera else None,
+            )
+        return self._properties
+
+    def get_window_binning(self) -> tuple[tuple[int, int, int, int], tuple[int, int]]:
+        """Get tuple of window and binning."""
+        self._call("get_window_binning", self._status_time)
+        return self._window, self._binning
+
+    def get_visible_frame(self) -> tuple[int, int, int, int]:
+        """Returns the visible frame of the connected camera."""
+        self._call("get_visible_frame", self._status_time)
+        return 0, 0, self._width, self._height
+
+    def get_full_frame(self) -> tuple[int, int, int, int]:
+        """Returns the full frame of the connected camera."""
+        self._call("get_full_frame", self._status_time)
+        return 0, 0, self._width, self._height
+
+    def invalidate_config(self) -> None:
+        """Forget the last applied configuration, so that all settings are sent to the camera again."""
+        self._config.clear()
+
+    def _apply(self, key: str, value: Any, calls: int = 1) -> bool:
+        """Simulate sending a setting, unless it's unchanged. Returns whether it was sent."""
+        if self._config.get(key) == value:
+            return False
+        try:
+            self._call("set_" + key, calls * self._status_time)
+        except ValueError:
+            self._config.clear()
+            raise
+        self._config[key] = value
+        return True
+
+    def set_binning(self, x: int, y: int) -> None:
+        """Set the binning."""
+        if not 1 <= x <= 16 or not 1 <= y <= 16:
+            self._config.clear()
+            raise ValueError("Could not set x binning." if not 1 <= x <= 16 else "Could not set y binning.")
+        if self._apply("binning", (x, y), calls=2):
+            self._config.pop("window", None)
+            self._binning = (x, y)
+
+    def set_window(self, left: int, top: int, width: int, height: int) -> None:
+        """Sets the window."""
+        if left < 0 or top < 0 or left + width > self._width or top + height > self._height:
+            self._config.clear()
+            raise ValueError("Could not set window.")
+        if self._apply("window", (left, top, width, height)):
+            self._window = (left, top, width, height)
+
+    def init_exposure(self, open_shutter: bool) -> None:
+        """Initializes an exposure."""
+        if self._apply("frame_type", not open_shutter, calls=2):
+            self._dark = not open_shutter
+
+    def set_exposure_time(self, exptime: int) -> None:
+        """Sets the exposure time in ms."""
+        if self._apply("exposure_time", exptime):
+            self._exposure_time = exptime
+
+    def start_exposure(self) -> None:
+        """Start a new exposure."""
+        self._abort_wait.clear()
+        self._abort_readout.clear()
+        self._call("start_exposure", self._status_time + self._nflushes * self._height * self._flush_row_time)
+        self._background_flush = False
+        if self._trigger is None:
+            self._exposure_end = time.monotonic() + self._exposure_time / 1000.0 + self._readout_delay
+        else:
+            # armed until triggered
+            self._exposure_end = math.inf
+
+    def is_data_ready(self) -> bool:
+        """Whether the image data is ready for readout."""
+        self._call("is_data_ready", 2 * self._status_time)
+        return self._exposure_end is None or time.monotonic() >= self._exposure_end
+
+    def wait_data_ready(self, max_wait: float, poll_interval: float = 0.001, guard: float = 0.05) -> bool:
+        """Waits until the image data is ready to be read out, for at most max_wait seconds."""
+        self._call("wait_data_ready")
+        deadline = time.monotonic() + max_wait
+        while True:
+            ready_at = time.monotonic() if self._exposure_end is None else self._exposure_end
+            # an armed exposure can be triggered any time, so look again regularly
+            until = min(ready_at, deadline, time.monotonic() + 0.01 if ready_at == math.inf else math.inf)
+            if self._abort_wait.wait(max(0.0, until - time.monotonic())):
+                return False
+            if until >= deadline or until == ready_at:
+                return self.is_data_ready()
+
+    def abort_wait(self) -> None:
+        """Aborts a running wait_data_ready()."""
+        self._abort_wait.set()
+
+    def abort_readout(self) -> None:
+        """Stops a running grab_rows() and all further ones until the next exposure is started."""
+        self._abort_readout.set()
+
+    def _update_temp(self) -> None:
+        """Move the CCD temperature towards the setpoint."""
+        now = time.monotonic()
+        target = max(self._setpoint, self._ambient_temp - self._max_cooling)
+        step = self._cooling_rate * (now - self._temp_time)
+        self._temp = max(self._temp - step, target) if self._temp > target else min(self._temp + step, target)
+        self._temp_time = now
+
+    def _cooler_power(self) -> float:
+        return float(np.clip(100.0 * (self._ambient_temp - self._temp) / self._max_cooling, 0.0, 100.0))
+
+    def get_temp(self, channel: FliTemperature) -> float:
+        """Returns the temperature of the given sensor."""
+        self._call("get_temp", self._status_time)
+        self._update_temp()
+        return self._temp if channel == FliTemperature.CCD else self._ambient_temp
+
+    def get_cooler_power(self) -> float:
+        """Get power of cooling in percent."""
+        self._call("get_cooler_power", self._status_time)
+        self._update_temp()
+        return self._cooler_power()
+
+    def get_telemetry(self) -> tuple[float, float, float]:
+        """Samples both temperature sensors and the cooler power in a single call."""
+        self._call("get_telemetry", 3 * self._status_time)
+        self._update_temp()
+        return self._temp, self._ambient_temp, self._cooler_power()
+
+    def set_temperature(self, setpoint: float) -> None:
+        """Set cooling temperature setpoint."""
+        self._call("set_temperature", self._status_time)
+        self._update_temp()
+        self._setpoint = setpoint
+
+    def _fill_rows(self, out: np.ndarray) -> None:
+        """Fill rows with the fixed pattern plus some signal, if the shutter was open."""
+        signal = 0 if self._dark else min(self._exposure_time // 10, 60000)
+        out[:] = self._pattern[: out.shape[1]] + signal
+
+    def grab_row(self, width: int) -> np.ndarray:
+        """Reads out a row from the camera."""
+        row = np.zeros((1, width), dtype=np.ushort)
+        self._call("grab_row", self._row_time * width / self._width)
+        self._fill_rows(row)
+        return row[0]
+
+    def grab_frame(self, out: np.ndarray) -> None:
+        """Reads out a whole frame from the camera into a preallocated array."""
+        self.grab_rows(out, 0, out.shape[0])
+
+    def grab_rows(self, out: np.ndarray, first: int, count: int, stats: FrameStats | None = None) -> None:
+        """Reads out the next rows from the camera into rows first..first+count of a preallocated array."""
+        if out.dtype != np.uint16 or out.ndim != 2 or not out.flags.c_contiguous:
+            raise ValueError("Buffer has wrong dtype, shape or memory layout.")
+        if first < 0 or count < 0 or first + count > out.shape[0]:
+            raise ValueError(f"Rows {first}..{first + count} are outside of frame with {out.shape[0]} rows.")
+
+        # rows only come off the camera, once the exposure has finished
+        if self._exposure_end is not None:
+            time.sleep(max(0.0, self._exposure_end - time.monotonic()))
+        try:
+            self._call("grab_rows")
+        except ValueError:
+            raise ValueError(f"Could not grab row {first} from camera.") from None
+        with self._device_lock:
+            if self._abort_readout.wait(self._row_time * count * out.shape[1] / self._width):
+                raise ValueError(f"Readout aborted at row {first}.")
+        self._fill_rows(out[first : first + count])
+        if stats is not None:
+            stats.update(out[first : first + count], first)
+
+    def iter_row_blocks(
+        self, out: np.ndarray, block_rows: int, stats: FrameStats | None = None
+    ) -> Iterator[tuple[int, np.ndarray]]:
+        """Reads out a frame into a preallocated array block by block, yielding each block once it's complete."""
+        if block_rows < 1:
+            raise ValueError("Need at least one row per block.")
+        height = out.shape[0]
+        for first in range(0, height, block_rows):
+            count = min(block_rows, height - first)
+            self.grab_rows(out, first, count, stats)
+            yield first, out[first : first + count]
+
+    def cancel_exposure(self) -> None:
+        """Cancel an exposure."""
+        self._call("cancel_exposure", self._status_time)
+        self._exposure_end = None
+
+    def set_nflushes(self, nflushes: int) -> None:
+        """Sets the number of times the CCD array is flushed before each exposure."""
+        if self._apply("nflushes", nflushes):
+            self._nflushes = nflushes
+
+    def set_background_flush(self, enabled: bool) -> None:
+        """Starts or stops flushing the CCD continuously in the background. Starting an exposure stops it."""
+        self._call("set_background_flush", self._status_time)
+        self._background_flush = enabled
+
+    def set_external_trigger(self, trigger: ExternalTrigger | None) -> None:
+        """Sets, whether exposures are armed by start_exposure() and only start on a trigger. Clearing the trigger
+        closes the shutter, so it's only sent, if a trigger was set."""
+        if trigger is None and self._trigger is None:
+            return
+        if self._apply("trigger", trigger):
+            self._trigger = trigger
+
+    def trigger_exposure(self) -> None:
+        """Starts an armed exposure that is waiting for a trigger, also simulates the external trigger input."""
+        self._call("trigger_exposure", self._status_time)
+        if not self._software_trigger:
+            raise ValueError("Could not trigger exposure, camera does not support software triggers.")
+        if self._exposure_end != math.inf:
+            raise ValueError("Could not trigger exposure.")
+        self._exposure_end = time.monotonic() + self._exposure_time / 1000.0 + self._readout_delay
+
+    def end_exposure(self) -> None:
+        """Ends the running exposure early."""
+        self._call("end_exposure", self._status_time)
+        if self._exposure_end is not None:
+            self._exposure_end = min(self._exposure_end, time.monotonic() + self._readout_delay)
+
+    def start_video_mode(self) -> None:
+        """Start continuous video mode with the current window, binning and exposure time."""
+        self._call("start_video_mode", self._status_time)
+        self._video = True
+
+    def stop_video_mode(self) -> None:
+        """Stop video mode."""
+        self._call("stop_video_mode", self._status_time)
+        self._video = False
+
+    def grab_video_frame(self, out: np.ndarray) -> None:
+        """Grab the next frame in video mode into a preallocated array."""
+        if not self._video:
+            raise ValueError("Could not grab video frame.")
+        self._call("grab_video_frame", self._exposure_time / 1000.0 + self._row_time * out.size / self._width)
+        self._fill_rows(out)
+
+    def get_model(self) -> str:
+        """Returns the model of the device."""
+        self._call("get_model", self._status_time)
+        return "Simulated " + ("MicroLine" if self._is_camera else "CenterLine")
+
+    def get_serial_string(self) -> str:
+        """Returns serial string for device."""
+        self._call("get_serial_string", self._status_time)
+        return "SIM00001"
+
+    def get_filter_pos(self) -> int:
+        """Returns current filter position."""
+        self._call("get_filter_pos", self._status_time)
+        return self._filter_pos
+
+    def _wheel_slot(self, pos: int) -> tuple[int, int] | None:
+        """Returns wheel and slot of a filter position, or None, if there is no such position."""
+        div, mod = divmod(pos, self._filter_count)
+        if pos >= 0 and div == 0:
+            return 0, mod
+        if self._filter_wheels > 1 and mod == 0 and 1 <= div <= self._filter_count:
+            return 1, div - 1
+        return None
+
+    def _slot_distance(self, start: int, end: int) -> int:
+        distance = abs(end - start)
+        return min(distance, self._filter_count - distance)
+
+    def set_filter_pos(self, pos: int) -> None:
+        """Set filter position, blocking until the wheel has arrived. Before the other wheel of a dual wheel
+        moves, the current one goes back to its first slot."""
+        target = self._wheel_slot(pos)
+        if target is None:
+            self.calls["set_filter_pos"] += 1
+            raise ValueError("Could not set filter position.")
+        wheel, slot = target
+        current_wheel, current_slot = self._filter_wheel_slot
+        distance = self._slot_distance(current_slot, slot)
+        if wheel != current_wheel:
+            distance = self._slot_distance(current_slot, 0) + self._slot_distance(0, slot)
+        self._call("set_filter_pos", distance * self._filter_move_time)
+        self._filter_pos = pos
+        self._filter_wheel_slot = target
+
+    def set_active_filter_wheel(self, wheel: int) -> None:
+        """Set active filter wheel."""
+        self._call("set_active_filter_wheel", self._status_time)
+        self._active_wheel = wheel
+
+    def get_active_filter_wheel(self) -> int:
+        """Returns active filter wheel."""
+        self._call("get_active_filter_wheel", self._status_time)
+        return self._active_wheel
+
+    def get_filter_count(self) -> int:
+        """Return filter count."""
+        self._call("get_filter_count", self._status_time)
+        return self._filter_count
+
+    def get_filter_name(self, pos: int) -> str:
+        """Get filter name."""
+        self._call("get_filter_name", self._status_time)
+        return f"Filter {pos}"
+
+    def _stepper_position(self) -> int:
+        """Current position of the stepper, interpolated along the running move."""
+        travelled = int(self._focuser_speed * (time.monotonic() - self._stepper_time))
+        distance = self._stepper_to - self._stepper_from
+        if travelled >= abs(distance):
+            return self._stepper_to
+        return self._stepper_from + travelled if distance > 0 else self._stepper_from - travelled
+
+    def step_motor_async(self, steps: int) -> None:
+        """Start moving the stepper by the given number of steps."""
+        self._call("step_motor_async", self._status_time)
+        position = self._stepper_position()
+        self._stepper_from = position
+        self._stepper_to = min(max(position + steps, 0), self._focuser_extent)
+        self._stepper_time = time.monotonic()
+
+    def get_stepper_position(self) -> int:
+        """Returns the current position of the stepper."""
+        self._call("get_stepper_position", self._status_time)
+        return self._stepper_position()
+
+    def get_steps_remaining(self) -> int:
+        """Returns the number of steps remaining in the current move."""
+        self._call("get_steps_remaining", self._status_time)
+        return abs(self._stepper_to - self._stepper_position())
+
+    def is_moving(self) -> bool:
+        """Whether the stepper is moving or homing."""
+        self._call("is_moving", 2 * self._status_time)
+        return self._stepper_position() != self._stepper_to
+
+    def home_device(self) -> None:
+        """Start homing the focuser."""
+        self._call("home_device", self._status_time)
+        self._stepper_from = self._stepper_position()
+        self._stepper_to = 0
+        self._stepper_time = time.monotonic()
+
+    def get_focuser_extent(self) -> int:
+        """Returns the maximum position of the stepper."""
+        self._call("get_focuser_extent", self._status_time)
+        return self._focuser_extent
+
+
+__all__ = ["SimulatedFliDriver"]
@@ -7,7 +7,6 @@ Unverified against real FLI hardware.
 import asyncio
 import sys
 import threading
-import time
 
 import numpy as np
 import qasync  # type: ignore[import-untyped]
@@ -130,9 +129,8 @@ class MainWindow(QtWidgets.QMainWindow):
             self._driver.set_exposure_time(int(exposure_time * 1000.0))
 
         def _readout() -> np.ndarray:
-            img = np.zeros((height, width), dtype=np.uint16)
-            for row in range(height):
-                img[row, :] = self._driver.grab_row(width)
+            img = np.empty((height, width), dtype=np.uint16)
+            self._driver.grab_frame(img)
             return img
 
         self._exposing = True
@@ -166,24 +164,22 @@ class MainWindow(QtWidgets.QMainWindow):
     async def _wait_exposure(self) -> bool:
         """Return True if the exposure was aborted, False if data is ready."""
 
-        def _wait() -> bool:
-            while True:
-                if self._abort_event.is_set():
-                    return True
-                if self._driver.is_data_ready():
-                    return False
-                time.sleep(0.01)
-
-        return await self._run_blocking(_wait)
+        # wait in short chunks, so the temperature timer gets its turn in between
+        while not self._abort_event.is_set():
+            if await self._run_blocking(lambda: self._driver.wait_data_ready(0.5)):
+                return False
+        return True
 
     def _abort_clicked(self) -> None:
         self._abort_event.set()
+        self._driver.abort_wait()
 
     def closeEvent(self, event) -> None:  # type: ignore[override]
         self._temp_timer.stop()
         # signal an in-flight exposure to stop, then wait for any SDK call in progress and close
         self._closing = True
         self._abort_event.set()
+        self._driver.abort_wait()
         with self._sdk_lock:
             self._driver.close()
         super().closeEvent(event)
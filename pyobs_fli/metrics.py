@@ -0,0 +1,86 @@
+import math
+from collections import Counter
+from typing import Any
+
+# Upper bounds in seconds of the histogram buckets for phase durations, an implicit +Inf bucket follows.
+_DURATION_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+
+class _PhaseHistogram:
+    """Duration statistics and histogram of a single phase."""
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+        self.last = 0.0
+
+    def observe(self, seconds: float) -> None:
+        index = next((i for i, bound in enumerate(self.buckets) if seconds <= bound), len(self.buckets))
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    def snapshot(self) -> dict[str, Any]:
+        # cumulative counts per upper bound, like Prometheus histograms
+        cumulative, buckets = 0, {}
+        for bound, count in zip([*map(str, self.buckets), "+Inf"], self.counts, strict=True):
+            cumulative += count
+            buckets[bound] = cumulative
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "mean": self.sum / self.count if self.count else 0.0,
+            "min": self.min if self.count else 0.0,
+            "max": self.max,
+            "last": self.last,
+            "buckets": buckets,
+        }
+
+
+class PhaseMetrics:
+    """Counters and duration histograms for named phases, e.g. of an exposure.
+
+    Only meant to be used from the event loop, so there's no locking.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = _DURATION_BUCKETS):
+        """Initializes new, empty metrics.
+
+        Args:
+            buckets: Upper bounds of histogram buckets in seconds.
+        """
+        self._buckets = buckets
+        self._phases: dict[str, _PhaseHistogram] = {}
+        self._counters: Counter[str] = Counter()
+
+    def observe(self, phase: str, seconds: float) -> None:
+        """Record the duration of a phase."""
+        if phase not in self._phases:
+            self._phases[phase] = _PhaseHistogram(self._buckets)
+        self._phases[phase].observe(seconds)
+
+    def increment(self, counter: str, value: int = 1) -> None:
+        """Increment a counter."""
+        self._counters[counter] += value
+
+    def reset(self) -> None:
+        """Clear all counters and histograms."""
+        self._phases.clear()
+        self._counters.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Returns all counters and per-phase duration statistics with cumulative histogram buckets."""
+        return {
+            "counters": dict(self._counters),
+            "phases": {name: phase.snapshot() for name, phase in self._phases.items()},
+        }
+
+
+__all__ = ["PhaseMetrics"]
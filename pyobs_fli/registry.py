@@ -0,0 +1,146 @@
+import glob
+import logging
+import os
+import threading
+from typing import Any, ClassVar
+
+from pyobs_fli.flidriver import DeviceInfo, DeviceType
+
+log = logging.getLogger(__name__)
+
+# Device files of the fliusb kernel module, libfli lists USB devices with the same pattern.
+_DEVICE_GLOB = "/dev/fliusb*"
+
+
+class DeviceRegistry:
+    """Process-wide cache of enumerated FLI devices, which can be looked up by name, path and serial.
+
+    Listing devices makes libfli probe every device on the bus, so the result is cached per device type and
+    shared between all modules using the same driver class. The cache is dropped, when the device files in
+    /dev change, i.e. a device has been plugged in or removed, when a lookup fails, or on refresh(). Serials are
+    kept for as long as the device file exists, so devices are only opened once for reading their serial.
+    """
+
+    _shared: ClassVar[dict[Any, "DeviceRegistry"]] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(self, driver_class: Any, device_glob: str = _DEVICE_GLOB):
+        """Create a new, empty registry.
+
+        Args:
+            driver_class: Driver class to enumerate and probe devices with, i.e. FliDriver or SimulatedFliDriver.
+            device_glob: Pattern for the device files to watch for hotplug events.
+        """
+        self._driver_class = driver_class
+        self._device_glob = device_glob
+        self._lock = threading.RLock()
+        self._devices: dict[DeviceType, list[DeviceInfo]] = {}
+        self._serials: dict[bytes, str] = {}
+        self._device_files: frozenset[str] | None = None
+        self.scans = 0
+
+    @classmethod
+    def shared(cls, driver_class: Any) -> "DeviceRegistry":
+        """Returns the registry shared by all modules in this process for the given driver class."""
+        with cls._shared_lock:
+            if driver_class not in cls._shared:
+                cls._shared[driver_class] = cls(driver_class)
+            return cls._shared[driver_class]
+
+    def refresh(self) -> None:
+        """Forget all devices, so that the bus is scanned again on next use, and the serials of devices, whose
+        files have gone. The others are kept, so that devices, which may be open in this process, aren't opened
+        again just for reading their serial."""
+        with self._lock:
+            self._devices.clear()
+            self._serials = {filename: serial for filename, serial in self._serials.items() if os.path.exists(filename)}
+
+    def _check_hotplug(self) -> None:
+        """Refresh, if the set of device files has changed since the last call."""
+        files = frozenset(glob.glob(self._device_glob))
+        if self._device_files is not None and files != self._device_files:
+            log.info("FLI devices have been plugged in or removed, enumerating them again.")
+            self.refresh()
+        self._device_files = files
+
+    def devices(self, device_type: DeviceType) -> list[DeviceInfo]:
+        """Returns all devices of the given type, scanning the bus only if they're not cached.
+
+        Args:
+            device_type: Type of devices to list.
+
+        Returns:
+            List of DeviceInfo tuples.
+        """
+        with self._lock:
+            self._check_hotplug()
+            if device_type not in self._devices:
+                self._devices[device_type] = list(self._driver_class.list_devices(device_type))
+                self.scans += 1
+            return list(self._devices[device_type])
+
+    def remember_serial(self, device: DeviceInfo, serial: str) -> None:
+        """Store the serial of a device, e.g. after opening it, so that it needn't be probed."""
+        with self._lock:
+            self._serials[device.filename] = serial
+
+    def _serial(self, device: DeviceInfo) -> str | None:
+        """Returns the serial of a device, opening it briefly, if it isn't known yet."""
+        if device.filename not in self._serials:
+            driver = self._driver_class(device)
+            try:
+                driver.open()
+                try:
+                    self._serials[device.filename] = driver.get_serial_string()
+                finally:
+                    driver.close()
+            except ValueError:
+                log.warning("Could not query serial of FLI device at %s.", device.filename.decode("utf-8"))
+                return None
+        return self._serials[device.filename]
+
+    def _match(
+        self, devices: list[DeviceInfo], name: str | None, path: str | None, serial: str | None
+    ) -> DeviceInfo | None:
+        if serial is not None:
+            return next((dev for dev in devices if self._serial(dev) == serial), None)
+        if name is not None or path is not None:
+            return next(
+                (dev for dev in devices if dev.name.decode("utf-8") == name or dev.filename.decode("utf-8") == path),
+                None,
+            )
+        return devices[0] if devices else None
+
+    def find(
+        self, device_type: DeviceType, name: str | None = None, path: str | None = None, serial: str | None = None
+    ) -> DeviceInfo:
+        """Find a device by serial, or by name or path. If none are given, the first device is returned.
+
+        If no device matches, the bus is scanned again once, in case it has just been plugged in.
+
+        Args:
+            device_type: Type of device to find.
+            name: Optional name of device.
+            path: Optional path of device.
+            serial: Optional serial of device, takes precedence over name and path.
+
+        Returns:
+            The matching device.
+
+        Raises:
+            ValueError: If no matching device could be found.
+        """
+        with self._lock:
+            device = self._match(self.devices(device_type), name, path, serial)
+            if device is None:
+                self.refresh()
+                devices = self.devices(device_type)
+                device = self._match(devices, name, path, serial)
+                if device is None:
+                    if len(devices) == 0:
+                        raise ValueError("No FLI device found.")
+                    raise ValueError("No matching device found, check dev_name/dev_path/dev_serial.")
+            return device
+
+
+__all__ = ["DeviceRegistry"]
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+log = logging.getLogger(__name__)
+
+# Calls that hung are left running on their (abandoned) thread, and a fresh thread takes over the queue.
+# Once this many abandoned threads are still stuck, the device is considered dead and calls are refused
+# instead of piling up more threads.
+_MAX_STUCK_THREADS = 3
+
+
+@dataclass
+class SdkWorkerStats:
+    """Counters of an SdkWorker."""
+
+    calls: int = 0
+    """Number of completed calls."""
+
+    queue_depth: int = 0
+    """Number of calls waiting to be run."""
+
+    stuck_calls: int = 0
+    """Number of calls that exceeded their timeout."""
+
+    stuck_threads: int = 0
+    """Number of abandoned threads still blocked in a hung call."""
+
+    last_latency: float = 0.0
+    """Time from submitting to completing the last call in seconds."""
+
+    mean_latency: float = 0.0
+    """Mean time from submitting to completing a call in seconds."""
+
+    max_latency: float = 0.0
+    """Maximum time from submitting to completing a call in seconds."""
+
+
+class _SdkCall:
+    """A call queued on an SdkWorker."""
+
+    def __init__(self, func: Callable[[], None], timeout: float, loop: asyncio.AbstractEventLoop):
+        self.func = func
+        self.timeout = timeout
+        self.loop = loop
+        self.future: asyncio.Future[None] = loop.create_future()
+        self.submitted = time.monotonic()
+        self.started: float | None = None
+        self.cancelled = False
+
+
+class SdkWorker:
+    """A long-lived thread running blocking SDK calls for a single device, fed by a queue.
+
+    All calls for a device are serialized on this thread, so dispatching a call costs only a queue hop
+    instead of a new thread. A call that runs longer than its timeout leaves its thread behind and a new
+    thread takes over the queue, but never more than a few such threads are kept around.
+    """
+
+    def __init__(self, name: str = "fli-sdk", max_stuck_threads: int = _MAX_STUCK_THREADS):
+        """Initializes a new worker. The thread is only started with the first call.
+
+        Args:
+            name: Name for worker thread.
+            max_stuck_threads: Maximum number of abandoned threads, before calls get refused.
+        """
+        self._name = name
+        self._max_stuck_threads = max_stuck_threads
+        self._queue: queue.SimpleQueue[_SdkCall | None] = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._abandoned: set[threading.Thread] = set()
+        self._current: _SdkCall | None = None
+        self._stats = SdkWorkerStats()
+        self._total_latency = 0.0
+
+    @property
+    def stats(self) -> SdkWorkerStats:
+        """Snapshot of the worker's counters."""
+        with self._lock:
+            stats = SdkWorkerStats(**vars(self._stats))
+            stats.stuck_threads = len(self._abandoned)
+        stats.queue_depth = self._queue.qsize()
+        return stats
+
+    @property
+    def is_dead(self) -> bool:
+        """Whether too many calls are stuck for the worker to accept new ones."""
+        return len(self._abandoned) >= self._max_stuck_threads
+
+    def _overdue(self) -> _SdkCall | None:
+        """Returns the running call, if it has been running for longer than its timeout."""
+        with self._lock:
+            current = self._current
+        if current is None or current.started is None:
+            return None
+        return current if time.monotonic() - current.started > current.timeout else None
+
+    def _start_thread(self) -> None:
+        self._thread = threading.Thread(target=self._work, name=self._name, daemon=True)
+        self._thread.start()
+
+    def _work(self) -> None:
+        """Worker thread: run queued calls until abandoned or stopped."""
+        me = threading.current_thread()
+        while True:
+            call = self._queue.get()
+            if call is None:
+                return
+            if call.cancelled:
+                continue
+
+            with self._lock:
+                self._current = call
+            call.started = time.monotonic()
+            try:
+                call.func()
+            except BaseException:
+                log.exception("Unhandled exception in FLI SDK call.")
+
+            # the call isn't current anymore before its result is passed on, so it can't get abandoned after
+            with self._lock:
+                abandoned = me in self._abandoned
+                if abandoned:
+                    # a replacement thread took over the queue while this call was hanging
+                    self._abandoned.discard(me)
+                else:
+                    self._current = None
+            self._finish(call)
+            if abandoned:
+                return
+
+    def _finish(self, call: _SdkCall) -> None:
+        latency = time.monotonic() - call.submitted
+        with self._lock:
+            self._stats.calls += 1
+            self._stats.last_latency = latency
+            self._stats.max_latency = max(self._stats.max_latency, latency)
+            self._total_latency += latency
+            self._stats.mean_latency = self._total_latency / self._stats.calls
+
+        def _complete() -> None:
+            # the caller may have given up on this call already
+            if not call.future.done():
+                call.future.set_result(None)
+
+        try:
+            call.loop.call_soon_threadsafe(_complete)
+        except RuntimeError:
+            # event loop is closed already, nobody is waiting anymore
+            pass
+
+    async def run(self, func: Callable[[], None], timeout: float) -> bool:
+        """Run func on the worker thread.
+
+        The timeout only counts the time func is actually running, not the time it's waiting in the queue
+        behind other calls. A call running ahead in the queue for longer than its own timeout gets abandoned
+        by the waiting call, even if its own caller has gone, so a queued call never waits for longer than
+        its timeout plus the timeouts of the calls ahead of it.
+
+        Args:
+            func: Blocking callable to run.
+            timeout: Seconds func may run.
+
+        Returns:
+            True if func completed within timeout, False if it's still running in the background or the
+            worker refused it because the device is unresponsive.
+        """
+        if self.is_dead:
+            return False
+
+        call = _SdkCall(func, timeout, asyncio.get_running_loop())
+        with self._lock:
+            if self._thread is None:
+                self._start_thread()
+        self._queue.put(call)
+
+        remaining = timeout
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(asyncio.shield(call.future), timeout=remaining)
+                    return True
+                except TimeoutError:
+                    if call.started is None:
+                        # still queued, behind a call that may hang with nobody left to abandon it
+                        overdue = self._overdue()
+                        if overdue is not None:
+                            self._abandon(overdue)
+                        if self.is_dead:
+                            call.cancelled = True
+                            return False
+                        remaining = timeout
+                        continue
+                    remaining = timeout - (time.monotonic() - call.started)
+                    if remaining <= 0:
+                        if self._abandon(call):
+                            return False
+                        # finished just now, result is on its way
+                        remaining = timeout
+        except asyncio.CancelledError:
+            call.cancelled = True
+            if call.started is not None and not call.future.done():
+                # nobody waits for the result anymore, but the call still needs to be abandoned if it hangs
+                elapsed = time.monotonic() - call.started
+                call.loop.call_later(max(0.0, timeout - elapsed), self._abandon, call)
+            raise
+
+    def _abandon(self, call: _SdkCall) -> bool:
+        """Leave the thread running a hung call behind, and start a new one for the rest of the queue.
+
+        Returns:
+            Whether the call was still running and its thread got abandoned.
+        """
+        with self._lock:
+            if self._current is not call or self._thread is None:
+                return False
+            self._stats.stuck_calls += 1
+            self._abandoned.add(self._thread)
+            self._current = None
+            log.warning("FLI SDK call is stuck, starting new worker thread (%d stuck).", len(self._abandoned))
+            self._start_thread()
+            return True
+
+    def stop(self) -> None:
+        """Stop the worker thread after all queued calls."""
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread = None
+
+
+__all__ = ["SdkWorker", "SdkWorkerStats"]
@@ -0,0 +1,112 @@
+import logging
+import shutil
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from .bufferpool import _lease
+
+log = logging.getLogger(__name__)
+
+# Default upper limit for the size of a spool on disk.
+_MAX_SPOOL_BYTES = 4 * 1024**3
+
+
+class FrameSpool:
+    """A bounded on-disk ring of memory-mapped frame buffers in a spool directory, e.g. on a local SSD or tmpfs.
+
+    Frames are read out straight into files, so frames queued for processing or upload are backed by the page
+    cache, which the kernel can write back and drop, instead of by anonymous memory. acquire() works like
+    ImageBufferPool.acquire(): a slot is reused once its lease has been garbage collected. Slots are reused
+    in ring order, so the files of released frames are kept as long as possible. If all slots are in use and
+    the spool is full, a frame goes to RAM instead, so that a frame still in use is never overwritten.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = _MAX_SPOOL_BYTES):
+        """Initializes a new spool. Its files are only created with the first frame.
+
+        Args:
+            directory: Directory to create the spool in, a private subdirectory is created inside.
+            max_bytes: Maximum number of bytes of all frames in the spool.
+        """
+        self._directory = Path(directory)
+        self._max_bytes = max_bytes
+        self._path: Path | None = None
+        self._slots: list[np.memmap] = []
+        self._leased: set[int] = set()
+        self._next = 0
+
+    @property
+    def path(self) -> Path | None:
+        """Directory holding the files of this spool, if created yet."""
+        return self._path
+
+    @property
+    def nbytes(self) -> int:
+        """Total number of bytes currently held by the spool."""
+        return sum(slot.nbytes for slot in self._slots)
+
+    def _in_use(self, index: int) -> bool:
+        return id(self._slots[index]) in self._leased
+
+    def _hand_out(self, index: int) -> np.memmap:
+        """Returns a lease on the given slot, which is still a memmap of the slot's file."""
+        slot = self._slots[index]
+        buf = _lease(slot, self._leased).view(np.memmap)
+        # take file name, offset and mapping from the slot, like for any other view on it
+        buf.__array_finalize__(slot)
+        return buf
+
+    def _map(self, index: int, shape: tuple[int, int]) -> np.memmap:
+        """Map the file of the given slot with the given shape, resizing it if necessary."""
+        if self._path is None:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            self._path = Path(tempfile.mkdtemp(prefix="fli-spool-", dir=self._directory))
+        return np.memmap(self._path / f"frame-{index:04d}.raw", dtype=np.uint16, mode="w+", shape=shape)
+
+    def acquire(self, shape: tuple[int, int]) -> np.ndarray:
+        """Returns a memory-mapped buffer of the given shape, reusing a released slot if possible.
+
+        The content of the returned buffer is undefined.
+
+        Args:
+            shape: Shape (height, width) of the requested buffer.
+
+        Returns:
+            C-contiguous uint16 array of the given shape.
+        """
+        nbytes = shape[0] * shape[1] * np.dtype(np.uint16).itemsize
+        total = self.nbytes
+
+        # next free slot in ring order, remapped if it has the wrong shape and there's enough room
+        for offset in range(len(self._slots)):
+            index = (self._next + offset) % len(self._slots)
+            if self._in_use(index):
+                continue
+            if self._slots[index].shape != shape:
+                if total - self._slots[index].nbytes + nbytes > self._max_bytes:
+                    continue
+                self._slots[index] = self._map(index, shape)
+            self._next = (index + 1) % len(self._slots)
+            return self._hand_out(index)
+
+        # new slot, if there's room for it
+        if total + nbytes <= self._max_bytes:
+            self._slots.append(self._map(len(self._slots), shape))
+            self._next = 0
+            return self._hand_out(len(self._slots) - 1)
+
+        log.warning("Frame spool is full, reading out %dx%d frame into memory.", shape[1], shape[0])
+        return np.empty(shape, dtype=np.uint16)
+
+    def clear(self) -> None:
+        """Drop all slots and remove the spool directory. Buffers still in use stay valid for their users."""
+        self._slots.clear()
+        self._next = 0
+        if self._path is not None:
+            shutil.rmtree(self._path, ignore_errors=True)
+            self._path = None
+
+
+__all__ = ["FrameSpool"]
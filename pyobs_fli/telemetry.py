@@ -0,0 +1,51 @@
+from collections import deque
+from typing import NamedTuple
+
+
+class TelemetrySample(NamedTuple):
+    """Temperatures and cooler power sampled at a given time."""
+
+    time: float
+    ccd_temp: float
+    base_temp: float
+    cooler_power: float
+
+
+class TelemetryHistory:
+    """Fixed-size in-memory history of telemetry samples, the oldest ones are dropped first."""
+
+    def __init__(self, size: int = 360):
+        """Initializes a new, empty history.
+
+        Args:
+            size: Maximum number of samples to keep.
+        """
+        self._samples: deque[TelemetrySample] = deque(maxlen=size)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def append(self, sample: TelemetrySample) -> None:
+        """Add a new sample, dropping the oldest one if the history is full."""
+        self._samples.append(sample)
+
+    @property
+    def latest(self) -> TelemetrySample | None:
+        """The most recent sample, if any."""
+        return self._samples[-1] if self._samples else None
+
+    def samples(self, since: float | None = None) -> list[TelemetrySample]:
+        """Returns samples in chronological order.
+
+        Args:
+            since: Only return samples taken after this time.
+
+        Returns:
+            List of samples.
+        """
+        if since is None:
+            return list(self._samples)
+        return [s for s in self._samples if s.time > since]
+
+
+__all__ = ["TelemetryHistory", "TelemetrySample"]
@@ -0,0 +1,102 @@
+import threading
+import time
+from typing import NamedTuple
+
+import numpy as np
+
+
+class VideoFrame(NamedTuple):
+    """A frame taken from the video ring buffer."""
+
+    number: int
+    timestamp: float
+    data: np.ndarray
+
+
+class VideoRingBuffer:
+    """Fixed-size, preallocated ring buffer of video frames, written by one producer thread.
+
+    The producer always writes into the slot following the latest complete frame, so with at least two
+    slots it never touches the frame a consumer is copying. Consumers only ever get the latest frame,
+    everything they were too slow to take is dropped and counted.
+    """
+
+    def __init__(self, shape: tuple[int, int], slots: int = 4):
+        """Initializes a new ring buffer.
+
+        Args:
+            shape: Shape (height, width) of a single frame.
+            slots: Number of frames in the ring, at least 2.
+        """
+        if slots < 2:
+            raise ValueError("Video ring buffer needs at least two slots.")
+        self._frames = np.empty((slots, *shape), dtype=np.uint16)
+        self._numbers = [0] * slots
+        self._timestamps = [0.0] * slots
+        self._lock = threading.Lock()
+        self._latest: int | None = None
+        self._count = 0
+        self._last_taken = 0
+        self._dropped = 0
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """Shape of a single frame."""
+        return self._frames.shape[1], self._frames.shape[2]
+
+    @property
+    def frame_count(self) -> int:
+        """Number of frames written so far."""
+        return self._count
+
+    @property
+    def dropped(self) -> int:
+        """Number of frames that were overwritten or skipped before a consumer took them."""
+        return self._dropped
+
+    def write_slot(self) -> np.ndarray:
+        """Returns the slot the producer should write the next frame into, to be committed with commit()."""
+        index = 0 if self._latest is None else (self._latest + 1) % len(self._frames)
+        return self._frames[index]
+
+    def commit(self, timestamp: float | None = None) -> None:
+        """Mark the frame written into write_slot() as the latest one.
+
+        Args:
+            timestamp: Time the frame was taken, defaults to now.
+        """
+        index = 0 if self._latest is None else (self._latest + 1) % len(self._frames)
+        with self._lock:
+            self._count += 1
+            self._numbers[index] = self._count
+            self._timestamps[index] = time.time() if timestamp is None else timestamp
+            self._latest = index
+
+    def latest(self, out: np.ndarray | None = None, newer_than: int = 0) -> VideoFrame | None:
+        """Returns a copy of the latest frame.
+
+        Args:
+            out: Optional array to copy the frame into, a new one is allocated otherwise.
+            newer_than: Only return a frame, if its number is larger than this, e.g. the last one taken.
+
+        Returns:
+            The latest frame or None, if there is no (new) frame.
+        """
+        with self._lock:
+            if self._latest is None or self._numbers[self._latest] <= newer_than:
+                return None
+            number = self._numbers[self._latest]
+            if out is None:
+                out = self._frames[self._latest].copy()
+            else:
+                np.copyto(out, self._frames[self._latest])
+            timestamp = self._timestamps[self._latest]
+
+            # everything between the last frame taken and this one was never seen by any consumer
+            if number > self._last_taken:
+                self._dropped += number - self._last_taken - 1
+                self._last_taken = number
+        return VideoFrame(number=number, timestamp=timestamp, data=out)
+
+
+__all__ = ["VideoRingBuffer", "VideoFrame"]
@@ -0,0 +1,58 @@
+"""Unit tests for ImageBufferPool: recycling of released buffers, and LRU eviction under the memory cap."""
+
+import numpy as np
+from pyobs.images import Image
+
+from pyobs_fli.bufferpool import ImageBufferPool
+
+
+def test_released_buffer_is_recycled() -> None:
+    pool = ImageBufferPool()
+    buf = pool.acquire((4, 8))
+    address = buf.ctypes.data
+    assert buf.shape == (4, 8)
+    assert buf.dtype == np.uint16
+    del buf
+    assert pool.acquire((4, 8)).ctypes.data == address
+
+
+def test_buffer_in_use_is_not_recycled() -> None:
+    pool = ImageBufferPool()
+    image = Image(pool.acquire((4, 8)))
+    view = image.data[1:, :]
+    del image
+    other = pool.acquire((4, 8))
+    assert not np.shares_memory(other, view)
+
+
+def test_buffer_is_returned_when_image_is_released() -> None:
+    pool = ImageBufferPool()
+    image = Image(pool.acquire((4, 8)))
+    address = image.data.ctypes.data
+    del image
+    assert pool.acquire((4, 8)).ctypes.data == address
+    assert pool.nbytes == 4 * 8 * 2
+
+
+def test_least_recently_used_shape_is_evicted() -> None:
+    pool = ImageBufferPool(max_bytes=2 * 4 * 8 * 2)
+    pool.acquire((4, 8))
+    pool.acquire((8, 4))
+    pool.acquire((4, 8))
+    pool.acquire((2, 16))
+    assert pool.nbytes == 2 * 4 * 8 * 2
+    assert sorted(pool._buffers) == [(2, 16), (4, 8)]
+
+
+def test_buffers_in_use_are_not_evicted_and_cap_holds() -> None:
+    pool = ImageBufferPool(max_bytes=4 * 8 * 2)
+    first = pool.acquire((4, 8))
+    second = pool.acquire((4, 8))
+    assert not np.shares_memory(first, second)
+    assert pool.nbytes == 4 * 8 * 2
+
+
+def test_disabled_pool_always_allocates() -> None:
+    pool = ImageBufferPool(max_bytes=0)
+    assert pool.acquire((4, 8)).shape == (4, 8)
+    assert pool.nbytes == 0
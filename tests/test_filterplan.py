@@ -0,0 +1,77 @@
+"""Unit tests for the filter sequence planner: the learned move time model and the order planning."""
+
+import itertools
+import random
+
+import pytest
+
+from pyobs_fli.filterplan import MoveTimeModel, plan_order
+
+
+def _brute_force(start: int | None, positions: list[int], cost: dict[tuple[int, int], float]) -> float:
+    def total(order: tuple[int, ...]) -> float:
+        path = order if start is None else (start, *order)
+        return sum(cost[a, b] for a, b in itertools.pairwise(path))
+
+    return min(total(order) for order in itertools.permutations(positions))
+
+
+def _random_costs(n: int, seed: int) -> dict[tuple[int, int], float]:
+    rng = random.Random(seed)
+    return {(a, b): 0.0 if a == b else rng.uniform(0.1, 5.0) for a in range(n) for b in range(n)}
+
+
+def test_model_learns_per_move() -> None:
+    model = MoveTimeModel(slot_time=1.0)
+    assert model.estimate(0, 3) == 3.0
+    model.observe(0, 2, 1.0)
+    model.observe(0, 2, 2.0)
+    model.observe(2, 0, 5.0)
+    assert model.estimate(0, 2) == pytest.approx(1.5)
+    assert model.estimate(2, 0) == pytest.approx(5.0)
+    assert model.estimate(3, 3) == 0.0
+
+    # unmeasured moves use the mean time per slot of all measured moves
+    assert model.estimate(1, 3) == pytest.approx(8.0 / 6.0 * 2)
+    assert model.snapshot() == {(0, 0, 2): (2, 1.5), (0, 2, 0): (1, 5.0)}
+
+
+def test_model_wraps_around_wheel() -> None:
+    model = MoveTimeModel(slot_time=1.0, filter_count=7)
+    assert model.estimate(6, 0) == 1.0
+    assert model.estimate(1, 6) == 2.0
+    model.observe(6, 1, 2.0)
+    assert model.estimate(5, 0) == pytest.approx(2.0)
+
+
+def test_model_splits_moves_between_wheels() -> None:
+    model = MoveTimeModel(slot_time=1.0)
+    # slot 2 of the second wheel is encoded as 21, so this moves the first wheel from 3 to 0 and then the second
+    # one from 0 to 2
+    assert model.estimate(3, 21) == 5.0
+    assert model.estimate(7, 14) == 1.0
+    model.observe(3, 21, 10.0)
+    assert model.snapshot() == {}
+    assert model.estimate(0, 1) == pytest.approx(2.0)
+
+
+@pytest.mark.parametrize("start", [None, 0])
+def test_plan_order_is_optimal(start: int | None) -> None:
+    for seed in range(5):
+        cost = _random_costs(7, seed)
+        order = plan_order(start, [1, 2, 3, 4, 5, 6], lambda a, b: cost[a, b])
+        path = order if start is None else [start, *order]
+        assert sorted(order) == [1, 2, 3, 4, 5, 6]
+        assert sum(cost[a, b] for a, b in itertools.pairwise(path)) == pytest.approx(
+            _brute_force(start, [1, 2, 3, 4, 5, 6], cost)
+        )
+
+
+def test_plan_order_visits_duplicates_once() -> None:
+    assert plan_order(0, [3, 1, 3, 1], lambda a, b: abs(a - b)) == [1, 3]
+    assert plan_order(0, [], lambda a, b: abs(a - b)) == []
+
+
+def test_plan_order_for_many_positions() -> None:
+    order = plan_order(0, list(range(14, 0, -1)), lambda a, b: abs(a - b))
+    assert order == list(range(1, 15))
@@ -0,0 +1,93 @@
+"""Unit tests for CompressedFitsWriter: lossless round trip, frames from a spool, and waiting for or dropping
+frames when too many are pending.
+"""
+
+import asyncio
+from pathlib import Path
+
+import numpy as np
+import pytest
+from astropy.io import fits
+
+from pyobs_fli.fitswriter import CompressedFitsWriter
+from pyobs_fli.spool import FrameSpool
+
+
+def _frame() -> np.ndarray:
+    rng = np.random.default_rng(42)
+    return rng.poisson(1000, size=(64, 128)).astype(np.uint16)
+
+
+@pytest.mark.asyncio
+async def test_writer_compresses_losslessly(tmp_path: Path) -> None:
+    writer = CompressedFitsWriter(str(tmp_path))
+    data = _frame()
+    header = fits.Header({"EXPTIME": 1.0})
+    try:
+        assert await writer.submit(data, header, "frame.fits.fz")
+        await writer.drain()
+    finally:
+        await writer.close()
+
+    with fits.open(tmp_path / "frame.fits.fz") as hdus:
+        assert isinstance(hdus[1], fits.CompImageHDU)
+        assert hdus[1].header["EXPTIME"] == 1.0
+        np.testing.assert_array_equal(hdus[1].data, data)
+    metrics = writer.snapshot()
+    assert metrics["counters"]["written"] == 1
+    assert metrics["phases"]["encode"]["count"] == 1
+    assert metrics["ratio"]["last"] > 1.0
+
+
+@pytest.mark.asyncio
+async def test_writer_maps_spooled_frames(tmp_path: Path) -> None:
+    spool = FrameSpool(str(tmp_path / "spool"))
+    writer = CompressedFitsWriter(str(tmp_path / "out"))
+    data = spool.acquire((64, 128))
+    data[:] = _frame()
+    try:
+        await writer.submit(data, fits.Header(), "frame.fits.fz")
+        del data
+        # the frame is still referenced by the writer, so its slot must not be reused
+        assert spool.acquire((64, 128)) is not None and spool.nbytes == 2 * 64 * 128 * 2
+        await writer.drain()
+    finally:
+        await writer.close()
+        spool.clear()
+    with fits.open(tmp_path / "out" / "frame.fits.fz") as hdus:
+        hdu = hdus[1]
+        assert isinstance(hdu, fits.CompImageHDU)
+        np.testing.assert_array_equal(hdu.data, _frame())
+
+
+@pytest.mark.asyncio
+async def test_writer_drops_frames_when_full(tmp_path: Path) -> None:
+    writer = CompressedFitsWriter(str(tmp_path), max_pending=1, drop_when_full=True)
+    try:
+        assert await writer.submit(_frame(), fits.Header(), "a.fits.fz")
+        assert not await writer.submit(_frame(), fits.Header(), "b.fits.fz")
+        assert writer.pending == 1
+        await writer.drain()
+        assert await writer.submit(_frame(), fits.Header(), "c.fits.fz")
+        await asyncio.wait_for(writer.drain(), 30)
+    finally:
+        await writer.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.fits.fz", "c.fits.fz"]
+    assert writer.snapshot()["counters"]["dropped"] == 1
+
+
+@pytest.mark.asyncio
+async def test_writer_waits_for_free_slot_when_full(tmp_path: Path) -> None:
+    writer = CompressedFitsWriter(str(tmp_path), max_pending=1)
+    try:
+        assert await writer.submit(_frame(), fits.Header(), "a.fits.fz")
+        assert writer.full
+        assert await asyncio.wait_for(writer.submit(_frame(), fits.Header(), "b.fits.fz"), 30)
+        assert writer.pending == 1
+        await asyncio.wait_for(writer.drain(), 30)
+    finally:
+        await writer.close()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.fits.fz", "b.fits.fz"]
+    metrics = writer.snapshot()
+    assert metrics["phases"]["wait"]["count"] == 1
+    assert "dropped" not in metrics["counters"]
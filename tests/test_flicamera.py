@@ -1,17 +1,22 @@
 """Unit tests for the non-hardware logic in FliCamera: constructor defaults, the
-window/binning setters, and the _run_blocking/_run_blocking_or_raise thread wrappers.
+window/binning setters, the _run_blocking/_run_blocking_or_raise thread wrappers, and the block-wise
+readout loop, video mode, pipelined sequences and telemetry publishing (against a mocked driver).
 
 Hardware I/O (opening, exposing, reading out) is out of scope here.
 """
 
 import asyncio
 import threading
-from unittest.mock import AsyncMock
+import time
+from unittest.mock import AsyncMock, MagicMock
 
+import numpy as np
 import pytest
 from pyobs.interfaces import IBinning, IWindow
+from pyobs.utils import exceptions as exc
 
-from pyobs_fli import FliCamera
+from pyobs_fli import FliCamera, flicamera
+from pyobs_fli.flidriver import DeviceProperties, FrameStats
 
 
 def test_constructor_defaults() -> None:
@@ -104,3 +109,297 @@ async def test_run_blocking_or_raise_reraises() -> None:
 
     with pytest.raises(ValueError):
         await camera._run_blocking_or_raise(boom)
+
+
+@pytest.mark.asyncio
+async def test_readout_blocks_yields_blocks_and_publishes_progress() -> None:
+    camera = FliCamera(readout_block_rows=3)
+    camera.comm.set_state = AsyncMock()  # type: ignore[method-assign]
+
+    def iter_row_blocks(out: np.ndarray, block_rows: int, stats: FrameStats | None):  # type: ignore[no-untyped-def]
+        for first in range(0, out.shape[0], block_rows):
+            out[first : first + block_rows] = first
+            yield first, out[first : first + block_rows]
+
+    camera._driver = MagicMock()
+    camera._driver.iter_row_blocks = iter_row_blocks
+
+    img = np.empty((8, 4), dtype=np.uint16)
+    blocks = [(first, rows.copy()) async for first, rows in camera._readout_blocks(img)]
+
+    assert [first for first, _ in blocks] == [0, 3, 6]
+    assert [len(rows) for _, rows in blocks] == [3, 3, 2]
+    assert (img[3:6] == 3).all()
+    progress = [call.args[1].progress for call in camera.comm.set_state.await_args_list]
+    assert progress == pytest.approx([37.5, 75.0, 100.0])
+
+
+def test_readout_consumers_can_be_added_and_removed() -> None:
+    camera = FliCamera()
+
+    def consumer(first_row: int, block: np.ndarray) -> None:
+        pass
+
+    camera.add_readout_consumer(consumer)
+    assert camera._readout_consumers == [consumer]
+    camera.remove_readout_consumer(consumer)
+    assert camera._readout_consumers == []
+
+
+@pytest.mark.asyncio
+async def test_video_mode_fills_ring_buffer_until_stopped() -> None:
+    camera = FliCamera()
+    camera._window = (0, 0, 8, 4)
+    camera._binning = (2, 2)
+    camera._driver = MagicMock()
+
+    def grab_video_frame(out: np.ndarray) -> None:
+        out[:] = 7
+        time.sleep(0.001)
+
+    camera._driver.grab_video_frame = grab_video_frame
+
+    await camera.start_video(exposure_time=0.001, slots=3)
+    camera._driver.start_video_mode.assert_called_once()
+    with pytest.raises(exc.DeviceBusyError):
+        await camera.start_video()
+    await asyncio.sleep(0.05)
+    await camera.stop_video()
+    camera._driver.stop_video_mode.assert_called_once()
+
+    frame = camera.get_video_frame()
+    assert frame is not None
+    assert frame.data.shape == (2, 4)
+    assert (frame.data == 7).all()
+    assert camera._video_thread is None
+
+
+@pytest.mark.asyncio
+async def test_video_mode_stops_when_grab_fails() -> None:
+    camera = FliCamera()
+    camera._window = (0, 0, 8, 4)
+    camera._driver = MagicMock()
+    camera._driver.grab_video_frame.side_effect = ValueError("Could not grab video frame.")
+
+    await camera.start_video(exposure_time=0.001)
+    for _ in range(100):
+        if camera._video_thread is None:
+            break
+        await asyncio.sleep(0.01)
+    assert camera._video_thread is None
+    assert not camera._is_busy()
+    camera._driver.stop_video_mode.assert_called_once()
+
+    # camera is usable again
+    camera._driver.grab_video_frame.side_effect = None
+    await camera.start_video(exposure_time=0.001)
+    await camera.stop_video()
+
+
+@pytest.mark.asyncio
+async def test_slow_video_frame_keeps_camera_busy_until_grab_finishes(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(flicamera, "_READOUT_BLOCK_TIMEOUT", 0.05)
+    camera = FliCamera()
+    camera._window = (0, 0, 8, 4)
+    camera._driver = MagicMock()
+    release = threading.Event()
+    camera._driver.grab_video_frame.side_effect = lambda out: release.wait()
+
+    await camera.start_video(exposure_time=0.0)
+    await camera.stop_video()
+    assert camera._is_busy()
+    camera._driver.stop_video_mode.assert_not_called()
+    assert camera.sdk_stats.stuck_calls == 0
+
+    # video mode is stopped by the grab thread, once the frame is done
+    release.set()
+    for _ in range(100):
+        if camera._video_thread is None:
+            break
+        await asyncio.sleep(0.01)
+    assert not camera._is_busy()
+    camera._driver.stop_video_mode.assert_called_once()
+
+
+def _mock_exposure_driver() -> MagicMock:
+    driver = MagicMock()
+    driver.name = "cam"
+    driver.is_data_ready.return_value = True
+    driver.wait_data_ready.return_value = True
+    driver.get_temp.return_value = -20.0
+    driver.get_cooler_power.return_value = 50.0
+    driver.get_properties.return_value = DeviceProperties(
+        serial="ML0001",
+        model="MicroLine",
+        hw_revision=1,
+        fw_revision=2,
+        full_frame=(0, 0, 8, 4),
+        visible_frame=(0, 0, 8, 4),
+        pixel_size=(9e-6, 9e-6),
+    )
+
+    def iter_row_blocks(out: np.ndarray, block_rows: int, stats: FrameStats | None):  # type: ignore[no-untyped-def]
+        out[:] = 1
+        out[0, 0] = 1000
+        if stats is not None:
+            stats.update(out)
+        yield 0, out
+
+    driver.iter_row_blocks = iter_row_blocks
+    return driver
+
+
+def _mock_comm(camera: FliCamera) -> AsyncMock:
+    """Mocks the comm of a camera and returns the mocked set_state()."""
+    set_state = AsyncMock()
+    camera.comm.set_state = set_state  # type: ignore[method-assign]
+    camera.comm.send_event = AsyncMock()  # type: ignore[method-assign]
+    return set_state
+
+
+@pytest.mark.asyncio
+async def test_sequence_starts_next_exposure_right_after_readout() -> None:
+    camera = FliCamera()
+    _mock_comm(camera)
+    camera._window = (0, 0, 8, 4)
+    camera._driver = driver = _mock_exposure_driver()
+    camera._sequence_count_left = 2
+
+    first = await camera._expose(1.0, True, asyncio.Event())
+    assert driver.start_exposure.call_count == 2
+    assert camera._armed is not None
+    assert "DEADTIME" not in first.header
+
+    camera._sequence_count_left = 1
+    second = await camera._expose(1.0, True, asyncio.Event())
+    assert driver.start_exposure.call_count == 2
+    assert driver.set_exposure_time.call_count == 1
+    assert camera._armed is None
+    assert second.header["DEADTIME"] >= 0.0
+
+
+@pytest.mark.asyncio
+async def test_single_exposure_is_not_pipelined() -> None:
+    camera = FliCamera()
+    _mock_comm(camera)
+    camera._window = (0, 0, 8, 4)
+    camera._driver = driver = _mock_exposure_driver()
+
+    await camera._expose(1.0, True, asyncio.Event())
+    assert driver.start_exposure.call_count == 1
+    assert camera._armed is None
+
+
+@pytest.mark.asyncio
+async def test_sequence_is_not_pipelined_with_headers_from_before_exposure() -> None:
+    camera = FliCamera()
+    _mock_comm(camera)
+    camera.comm.clients_with_interface = AsyncMock(return_value=["telescope"])  # type: ignore[method-assign]
+    camera._window = (0, 0, 8, 4)
+    camera._driver = driver = _mock_exposure_driver()
+    camera._sequence_count_left = 2
+
+    await camera._expose(1.0, True, asyncio.Event())
+    assert driver.start_exposure.call_count == 1
+    assert camera._armed is None
+
+
+@pytest.mark.asyncio
+async def test_armed_exposure_with_changed_settings_is_restarted() -> None:
+    camera = FliCamera()
+    _mock_comm(camera)
+    camera._window = (0, 0, 8, 4)
+    camera._driver = driver = _mock_exposure_driver()
+    camera._sequence_count_left = 2
+
+    await camera._expose(1.0, True, asyncio.Event())
+    camera._sequence_count_left = 1
+    await camera._expose(2.0, True, asyncio.Event())
+    driver.cancel_exposure.assert_called_once()
+    assert driver.start_exposure.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_wait_exposure_waits_in_chunks_until_data_is_ready() -> None:
+    camera = FliCamera()
+    camera._driver = driver = MagicMock()
+    driver.wait_data_ready.side_effect = [False, False, True]
+
+    await camera._wait_exposure(asyncio.Event(), 1.0, True)
+    assert driver.wait_data_ready.call_count == 3
+    driver.abort_wait.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_abort_releases_native_wait() -> None:
+    camera = FliCamera()
+    _mock_comm(camera)
+    camera._driver = driver = MagicMock()
+    aborted = threading.Event()
+    driver.abort_wait.side_effect = aborted.set
+    driver.wait_data_ready.side_effect = lambda max_wait: aborted.wait(max_wait) and False
+
+    abort_event = asyncio.Event()
+    asyncio.get_running_loop().call_later(0.05, abort_event.set)
+    with pytest.raises(exc.AbortedError):
+        await camera._wait_exposure(abort_event, 10.0, True)
+    driver.abort_wait.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_frame_statistics_are_taken_from_readout() -> None:
+    camera = FliCamera(saturation_level=1000, histogram_bins=4)
+    _mock_comm(camera)
+    camera._window = (0, 0, 8, 4)
+    camera._driver = _mock_exposure_driver()
+
+    image = await camera._expose(1.0, True, asyncio.Event())
+    assert image.header["DATAMIN"] == 1.0
+    assert image.header["DATAMAX"] == 1000.0
+    assert image.header["DATAMEAN"] == pytest.approx((31 + 1000) / 32)
+    assert image.header["NSATPIX"] == 1
+    assert "STATSTEP" not in image.header
+    assert camera.frame_stats is not None
+    assert camera.frame_stats.histogram.tolist() == [32, 0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_frame_without_statistics_gets_no_data_headers() -> None:
+    camera = FliCamera()
+    _mock_comm(camera)
+    camera._window = (0, 0, 8, 4)
+    camera._driver = driver = _mock_exposure_driver()
+
+    def iter_row_blocks(out: np.ndarray, block_rows: int, stats: FrameStats | None):  # type: ignore[no-untyped-def]
+        yield 0, out
+
+    driver.iter_row_blocks = iter_row_blocks
+    image = await camera._expose(1.0, True, asyncio.Event())
+    assert "DATAMEAN" not in image.header
+    assert "DATAMIN" not in image.header
+
+
+@pytest.mark.asyncio
+async def test_telemetry_is_only_published_on_change() -> None:
+    camera = FliCamera(setpoint=-20.0)
+    set_state = _mock_comm(camera)
+    driver = MagicMock()
+    driver.get_telemetry.side_effect = [(-20.0, 15.0, 50.0), (-20.05, 15.0, 50.4), (-20.2, 15.0, 50.4)]
+
+    for _ in range(3):
+        await camera._sample_telemetry(driver)
+    assert set_state.await_count == 4
+    assert len(camera.get_telemetry_history()) == 3
+
+
+@pytest.mark.asyncio
+async def test_telemetry_is_polled_fast_while_cooling_down() -> None:
+    camera = FliCamera(setpoint=-20.0, poll_interval_fast=1.0, poll_interval_slow=30.0)
+    _mock_comm(camera)
+    camera._cooling_enabled = True
+    driver = MagicMock()
+    driver.get_telemetry.side_effect = [(-5.0, 15.0, 100.0), (-19.9, 15.0, 60.0), (-20.0, 15.0, 60.0)]
+
+    assert await camera._sample_telemetry(driver) == 1.0
+    assert await camera._sample_telemetry(driver) == 1.0
+    assert await camera._sample_telemetry(driver) == 30.0
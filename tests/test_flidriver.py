@@ -0,0 +1,110 @@
+"""Unit tests for the parts of FliDriver that can be exercised without hardware: argument
+validation and error reporting of calls made on a device that was never opened, and FrameStats.
+"""
+
+import numpy as np
+import pytest
+
+from pyobs_fli.flidriver import DeviceInfo, ExternalTrigger, FliDriver, FrameStats
+
+
+def _unopened_driver() -> FliDriver:
+    return FliDriver(DeviceInfo(domain=0, filename=b"/dev/null", name=b"none"))
+
+
+def test_grab_frame_rejects_wrong_dtype() -> None:
+    with pytest.raises(ValueError):
+        _unopened_driver().grab_frame(np.empty((4, 8), dtype=np.float32))
+
+
+def test_grab_frame_rejects_non_contiguous_buffer() -> None:
+    out = np.empty((4, 16), dtype=np.uint16)[:, ::2]
+    with pytest.raises(ValueError):
+        _unopened_driver().grab_frame(out)
+
+
+def test_grab_frame_raises_on_unopened_device() -> None:
+    with pytest.raises(ValueError, match="row 0"):
+        _unopened_driver().grab_frame(np.empty((4, 8), dtype=np.uint16))
+
+
+def test_grab_rows_rejects_rows_outside_of_frame() -> None:
+    with pytest.raises(ValueError, match="outside"):
+        _unopened_driver().grab_rows(np.empty((4, 8), dtype=np.uint16), 2, 3)
+
+
+def test_iter_row_blocks_raises_on_unopened_device() -> None:
+    blocks = _unopened_driver().iter_row_blocks(np.empty((4, 8), dtype=np.uint16), 2)
+    with pytest.raises(ValueError, match="row 0"):
+        next(blocks)
+
+
+def test_wait_data_ready_raises_on_unopened_device() -> None:
+    with pytest.raises(ValueError, match="exposure status"):
+        _unopened_driver().wait_data_ready(0.1)
+
+
+def test_ping_raises_on_unopened_device() -> None:
+    with pytest.raises(ValueError, match="device status"):
+        _unopened_driver().ping()
+
+
+def test_aborted_wait_data_ready_returns_immediately() -> None:
+    driver = _unopened_driver()
+    driver.abort_wait()
+    assert driver.wait_data_ready(10.0) is False
+
+
+def test_frame_stats_match_numpy() -> None:
+    data = np.random.default_rng(42).integers(0, 65536, (50, 33), dtype=np.uint16)
+    stats = FrameStats(saturation=60000, histogram_bins=16)
+    stats.update(data[:20])
+    stats.update(data[20:], first_row=20)
+    assert (stats.min, stats.max) == (data.min(), data.max())
+    assert stats.mean == pytest.approx(data.mean())
+    assert stats.saturated == (data >= 60000).sum()
+    assert stats.histogram.tolist() == np.histogram(data, 16, (0, 65536))[0].tolist()
+
+
+def test_frame_stats_with_stride_use_subsample() -> None:
+    data = np.random.default_rng(42).integers(0, 65536, (50, 33), dtype=np.uint16)
+    stats = FrameStats(stride=4)
+    stats.update(data[:21])
+    stats.update(data[21:], first_row=21)
+    assert stats.count == data[::4, ::4].size
+    assert stats.mean == pytest.approx(data[::4, ::4].mean())
+    assert stats.histogram is None
+
+
+def test_failed_properties_query_is_not_cached() -> None:
+    driver = _unopened_driver()
+    for _ in range(2):
+        with pytest.raises(ValueError, match="revision"):
+            driver.get_properties()
+
+
+def test_failed_setting_is_sent_again() -> None:
+    driver = _unopened_driver()
+    for _ in range(2):
+        with pytest.raises(ValueError, match="binning"):
+            driver.set_binning(2, 2)
+        with pytest.raises(ValueError, match="exposure time"):
+            driver.set_exposure_time(1000)
+
+
+def test_flush_calls_raise_on_unopened_device() -> None:
+    driver = _unopened_driver()
+    with pytest.raises(ValueError, match="flushes"):
+        driver.set_nflushes(1)
+    with pytest.raises(ValueError, match="background flush"):
+        driver.set_background_flush(True)
+
+
+def test_trigger_calls_raise_on_unopened_device() -> None:
+    driver = _unopened_driver()
+    with pytest.raises(ValueError, match="trigger mode"):
+        driver.set_external_trigger(ExternalTrigger.LOW)
+    with pytest.raises(ValueError, match="trigger exposure"):
+        driver.trigger_exposure()
+    with pytest.raises(ValueError, match="end exposure"):
+        driver.end_exposure()
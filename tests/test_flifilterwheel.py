@@ -4,10 +4,12 @@ position <-> name mapping, and set_filter position computation.
 Hardware I/O (moving the wheel) is mocked out.
 """
 
+import asyncio
 from unittest.mock import MagicMock
 
 import pytest
 from pyobs.utils import exceptions as exc
+from pyobs.utils.enums import MotionStatus
 
 from pyobs_fli import FliFilterWheel
 
@@ -92,6 +94,24 @@ async def test_set_filter_second_wheel() -> None:
     assert wheel._current_filter == "H"
 
 
+@pytest.mark.asyncio
+async def test_failed_background_move_is_logged(caplog: pytest.LogCaptureFixture) -> None:
+    wheel = FliFilterWheel(filter_names=_TWO_WHEELS)
+    wheel._driver = MagicMock()
+    wheel._driver.set_filter_pos = MagicMock(side_effect=ValueError("Could not set filter position."))
+
+    async def fake_run(func, timeout: float | None = None) -> object:
+        return func()
+
+    wheel._run_blocking_or_raise = fake_run  # type: ignore[method-assign]
+
+    await wheel.start_move("B")
+    assert wheel._move is not None and wheel._move.task is not None
+    await asyncio.wait({wheel._move.task})
+    assert "Could not set filter position." in caplog.text
+    assert wheel.motion_status() == MotionStatus.ERROR
+
+
 @pytest.mark.asyncio
 async def test_set_filter_unknown_filter() -> None:
     wheel = FliFilterWheel(filter_names=_TWO_WHEELS)
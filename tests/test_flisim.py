@@ -0,0 +1,526 @@
+"""End-to-end tests of FliCamera and FliFilterWheel against the simulated backend: opening, exposing
+and reading out, and moving the filter wheel, without any hardware.
+"""
+
+import asyncio
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from pyobs.utils import exceptions as exc
+from pyobs.utils.enums import ExposureStatus, MotionStatus
+
+from pyobs_fli import FliCamera, FliFilterWheel, FliFocuser, flibase
+from pyobs_fli.flicamera import trigger_exposures
+from pyobs_fli.flidriver import DeviceType, ExternalTrigger
+from pyobs_fli.flisim import SimulatedFliDriver
+
+_FAST = {"width": 64, "height": 32, "row_time": 1e-4, "status_time": 0.0, "readout_delay": 0.01}
+
+
+def _open_driver(status_time: float = 0.0, cooling_rate: float = 1.0) -> SimulatedFliDriver:
+    driver = SimulatedFliDriver(
+        SimulatedFliDriver.list_devices(DeviceType.CAMERA)[0],
+        width=64,
+        height=32,
+        row_time=1e-4,
+        status_time=status_time,
+        readout_delay=0.01,
+        cooling_rate=cooling_rate,
+    )
+    driver.open()
+    return driver
+
+
+@pytest.mark.asyncio
+async def test_camera_exposes_and_reads_out_simulated_frame() -> None:
+    camera = FliCamera(simulation=_FAST, setpoint=None)
+    await camera.open()
+    try:
+        assert camera._full_frame == (0, 0, 64, 32)
+        start = time.monotonic()
+        image = await camera._expose(0.1, True, asyncio.Event())
+        assert time.monotonic() - start >= 0.1
+        assert image.data.shape == (32, 64)
+        assert image.header["DATAMIN"] > 0
+        assert image.header["INSTRUME"] == "FLI Simulated Camera"
+    finally:
+        await camera.close()
+
+
+@pytest.mark.asyncio
+async def test_camera_only_sends_changed_settings() -> None:
+    camera = FliCamera(simulation=_FAST, setpoint=None)
+    await camera.open()
+    try:
+        await camera._expose(0.01, True, asyncio.Event())
+        await camera._expose(0.01, True, asyncio.Event())
+        assert camera._driver is not None
+        assert camera._driver.calls["set_exposure_time"] == 1
+        assert camera._driver.calls["start_exposure"] == 2
+    finally:
+        await camera.close()
+
+
+@pytest.mark.asyncio
+async def test_camera_records_phase_timings() -> None:
+    camera = FliCamera(simulation=_FAST, setpoint=None, timing_headers=True)
+    await camera.open()
+    try:
+        image = await camera._expose(0.05, True, asyncio.Event())
+        assert image.header["TIM-WAIT"] >= 0.05
+        assert image.header["TIM-READ"] > 0
+        metrics = camera.get_metrics()
+        assert metrics["counters"]["frames"] == 1
+        assert set(metrics["phases"]) == {"prepare", "start", "wait", "latency", "readout", "headers", "statistics"}
+        assert metrics["phases"]["latency"]["last"] >= 0.0
+        assert metrics["sdk"]["calls"] > 0
+    finally:
+        await camera.close()
+
+
+@pytest.mark.asyncio
+async def test_filter_wheel_moves_in_simulated_time() -> None:
+    wheel = FliFilterWheel(filter_names=["A", "B", "C"], simulation={"filter_move_time": 0.05, "status_time": 0.0})
+    await wheel.open()
+    try:
+        start = time.monotonic()
+        await wheel.set_filter("C")
+        assert time.monotonic() - start >= 0.1
+        assert wheel._current_filter == "C"
+    finally:
+        await wheel.close()
+
+
+@pytest.mark.asyncio
+async def test_filter_wheel_move_runs_in_background() -> None:
+    wheel = FliFilterWheel(filter_names=["A", "B", "C"], simulation={"filter_move_time": 0.05, "status_time": 0.0})
+    await wheel.open()
+    try:
+        start = time.monotonic()
+        await wheel.start_move("C")
+        assert time.monotonic() - start < 0.05
+        await asyncio.sleep(0.05)
+        assert wheel.motion_status() == MotionStatus.SLEWING
+
+        await wheel.wait_for_move()
+        assert time.monotonic() - start >= 0.1
+        assert wheel.motion_status() == MotionStatus.POSITIONED
+        assert wheel._current_filter == "C"
+    finally:
+        await wheel.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_wait_does_not_stop_filter_move() -> None:
+    wheel = FliFilterWheel(filter_names=["A", "B", "C"], simulation={"filter_move_time": 0.05, "status_time": 0.0})
+    await wheel.open()
+    try:
+        waiter = asyncio.create_task(wheel.set_filter("C"))
+        await asyncio.sleep(0.05)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        # the wheel can't be stopped, so it still arrives and its position is published
+        await wheel.wait_for_move()
+        assert wheel._current_filter == "C"
+    finally:
+        await wheel.close()
+
+
+@pytest.mark.asyncio
+async def test_filter_wheel_runs_planned_sequence_and_learns_move_times() -> None:
+    wheel = FliFilterWheel(
+        filter_names=["A", "B", "C", "D", "E", "F", "G"], simulation={"filter_move_time": 0.02, "status_time": 0.0}
+    )
+    await wheel.open()
+    try:
+        visited: list[str] = []
+
+        async def _step(filter_name: str) -> None:
+            assert wheel._current_filter == filter_name
+            visited.append(filter_name)
+
+        order = await wheel.run_filter_sequence(["E", "B", "G", "B"], _step)
+        assert visited == order
+        assert sorted(order) == ["B", "E", "G"]
+
+        # moves have been measured and are used for estimates
+        assert wheel._move_model.snapshot()
+        assert wheel.estimate_move_time([order[0]]) > 0
+        assert wheel.plan_filters(["A"]) == ["A"]
+    finally:
+        await wheel.close()
+
+
+@pytest.mark.asyncio
+async def test_filter_wheel_moves_between_simulated_dual_wheels() -> None:
+    wheel = FliFilterWheel(
+        filter_names=[["A", "B", "C", "D", "E", "F", "G"], ["H", "I", "J"]],
+        simulation={"filter_wheels": 2, "filter_move_time": 0.02, "status_time": 0.0},
+    )
+    await wheel.open()
+    try:
+        # from B on the first wheel back to its first slot, then to J on the second wheel
+        start = time.monotonic()
+        await wheel.set_filter("B")
+        await wheel.set_filter("J")
+        assert time.monotonic() - start >= 0.02 * (1 + 1 + 2)
+        assert wheel._current_filter == "J"
+        assert wheel._move_model.estimate(wheel._filter_position("J"), wheel._filter_position("A")) > 0
+
+        order = await wheel.run_filter_sequence(["H", "C", "I"], lambda name: asyncio.sleep(0))
+        assert sorted(order) == ["C", "H", "I"]
+    finally:
+        await wheel.close()
+
+
+def _focuser() -> FliFocuser:
+    # 1000 steps per second and 100 steps per mm make 0.1s per mm
+    return FliFocuser(steps_per_mm=100.0, poll_interval=0.01, simulation={"status_time": 0.0})
+
+
+@pytest.mark.asyncio
+async def test_focuser_moves_in_background_and_caches_position() -> None:
+    focuser = _focuser()
+    await focuser.open()
+    try:
+        assert focuser.position == 0
+        await focuser.start_focus_move(2.0)
+        assert focuser.motion_status() == MotionStatus.SLEWING
+        await focuser.wait_for_move()
+        assert focuser.position == 200
+        assert focuser.motion_status() == MotionStatus.POSITIONED
+
+        await focuser.set_focus_offset(0.5)
+        assert focuser.position == 250
+        with pytest.raises(exc.InvalidArgumentError):
+            await focuser.set_focus(1000.0)
+    finally:
+        await focuser.close()
+
+
+@pytest.mark.asyncio
+async def test_focuser_move_can_be_aborted() -> None:
+    focuser = _focuser()
+    await focuser.open()
+    try:
+        waiter = asyncio.create_task(focuser.set_focus(5.0))
+        await asyncio.sleep(0.1)
+        await focuser.stop_motion()
+        with pytest.raises(exc.AbortedError):
+            await asyncio.wait_for(waiter, 0.1)
+        assert focuser.position is None
+
+        # the stepper can't be halted, so it still arrives at its target
+        assert focuser._move_task is not None
+        await focuser._move_task
+        assert focuser.position == 500
+        assert focuser._focus == pytest.approx(5.0)
+
+        await focuser.init()
+        assert focuser.position == 0
+    finally:
+        await focuser.close()
+
+
+@pytest.mark.asyncio
+async def test_focus_sweep_overlaps_moves_with_steps() -> None:
+    focuser = _focuser()
+    await focuser.open()
+    try:
+        await focuser.set_focus(1.0)
+
+        async def _step(focus: float, exposed: asyncio.Event) -> float:
+            # exposure, during which the focuser must stand still, followed by readout
+            assert focuser.position == round(focus * 100)
+            await asyncio.sleep(0.05)
+            exposed.set()
+            await asyncio.sleep(0.1)
+            return focus
+
+        start = time.monotonic()
+        results = await focuser.focus_sweep([1.0, 2.0, 3.0, 4.0], _step)
+        assert results == [1.0, 2.0, 3.0, 4.0]
+
+        # strictly alternating would take 4 * 0.15s for the steps plus 3 * 0.1s for the moves
+        assert time.monotonic() - start < 0.8
+    finally:
+        await focuser.close()
+
+
+def test_simulated_driver_requires_open_device() -> None:
+    driver = SimulatedFliDriver(SimulatedFliDriver.list_devices(DeviceType.CAMERA)[0])
+    with pytest.raises(ValueError):
+        driver.get_serial_string()
+
+
+def test_simulated_cooling_approaches_setpoint() -> None:
+    driver = _open_driver(cooling_rate=1000.0)
+    driver.set_temperature(-10.0)
+    time.sleep(0.1)
+    ccd, base, power = driver.get_telemetry()
+    assert ccd == pytest.approx(-10.0)
+    assert base == 20.0
+    assert power == pytest.approx(60.0)
+
+
+def test_simulated_wait_data_ready_can_be_aborted() -> None:
+    driver = _open_driver()
+    driver.set_exposure_time(10000)
+    driver.start_exposure()
+    driver.abort_wait()
+    assert driver.wait_data_ready(5.0) is False
+    driver.cancel_exposure()
+    driver.set_exposure_time(10)
+    driver.start_exposure()
+    assert driver.wait_data_ready(5.0) is True
+    out = np.empty((32, 64), dtype=np.uint16)
+    driver.grab_frame(out)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_readout_is_stopped_on_device() -> None:
+    camera = FliCamera(simulation={**_FAST, "row_time": 0.5}, setpoint=None)
+    await camera.open()
+    try:
+        driver = camera._driver
+        assert isinstance(driver, SimulatedFliDriver)
+        task = asyncio.create_task(camera._expose(0.01, True, asyncio.Event()))
+        await asyncio.sleep(0.2)
+        start = time.monotonic()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # the readout of the whole frame would take 16s
+        assert time.monotonic() - start < 1.0
+        assert driver.calls["cancel_exposure"] == 1
+        with pytest.raises(ValueError, match="aborted"):
+            driver.grab_rows(np.empty((32, 64), dtype=np.uint16), 0, 1)
+    finally:
+        await camera.close()
+
+
+@pytest.mark.asyncio
+async def test_cameras_expose_in_parallel() -> None:
+    # readout of 32 rows takes about 0.2s, so two sequential frames would take at least 0.4s
+    simulation = {**_FAST, "row_time": 0.00625}
+    cameras = [FliCamera(simulation=simulation, setpoint=None) for _ in range(2)]
+    await asyncio.gather(*(camera.open() for camera in cameras))
+    try:
+        start = time.monotonic()
+        images = await asyncio.gather(*(camera._expose(0.0, True, asyncio.Event()) for camera in cameras))
+        assert time.monotonic() - start < 0.35
+        assert all(image.data.shape == (32, 64) for image in images)
+    finally:
+        await asyncio.gather(*(camera.close() for camera in cameras))
+
+
+def test_simulated_calls_on_same_device_are_serialized() -> None:
+    driver = _open_driver(status_time=0.1)
+    threads = [threading.Thread(target=driver.get_filter_pos) for _ in range(2)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - start >= 0.2
+
+
+@pytest.mark.asyncio
+async def test_keep_alive_only_pings_idle_device() -> None:
+    camera = FliCamera(simulation=_FAST, setpoint=None, keep_alive_ping=0.1)
+    await camera.open()
+    try:
+        driver = camera._driver
+        assert driver is not None
+        await asyncio.sleep(0.3)
+        assert driver.calls["ping"] >= 1
+
+        # no pings while exposing
+        pings = driver.calls["ping"]
+        camera._camera_status = ExposureStatus.EXPOSING
+        await asyncio.sleep(0.2)
+        assert driver.calls["ping"] == pings
+
+        # nor while other calls succeed
+        await camera._run_blocking_or_raise(driver.get_filter_pos)
+        camera._camera_status = ExposureStatus.IDLE
+        for _ in range(20):
+            await camera._run_blocking_or_raise(driver.get_filter_pos)
+            await asyncio.sleep(0.01)
+        assert driver.calls["ping"] == pings
+    finally:
+        await camera.close()
+
+
+@pytest.mark.asyncio
+async def test_reconnect_backs_off_exponentially(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(flibase, "_RECONNECT_DELAY", 0.01)
+    monkeypatch.setattr(flibase, "_RECONNECT_MAX_DELAY", 0.04)
+    camera = FliCamera(simulation=_FAST, setpoint=None)
+    await camera.open()
+    old_driver = camera._driver
+    open_device = camera._open_device
+    attempts: list[float] = []
+
+    def _open_device(serial: str | None) -> None:
+        attempts.append(time.monotonic())
+        if len(attempts) < 5:
+            raise ValueError("Could not open device.")
+        open_device(serial)
+
+    monkeypatch.setattr(camera, "_open_device", _open_device)
+    try:
+        await camera._reconnect()
+        gaps = [b - a for a, b in zip(attempts, attempts[1:], strict=False)]
+        assert len(attempts) == 5
+        assert all(gap >= delay for gap, delay in zip(gaps, [0.01, 0.02, 0.04, 0.04], strict=True))
+        assert camera._driver is not None and camera._driver is not old_driver
+    finally:
+        await camera.close()
+
+
+@pytest.mark.asyncio
+async def test_camera_reads_out_into_spool(tmp_path: Path) -> None:
+    camera = FliCamera(simulation=_FAST, setpoint=None, spool_dir=str(tmp_path))
+    await camera.open()
+    try:
+        image = await camera._expose(0.01, True, asyncio.Event())
+        assert isinstance(image.data, np.memmap)
+        assert image.header["DATAMIN"] == image.data.min()
+        assert len(list(tmp_path.glob("fli-spool-*/frame-*.raw"))) == 1
+    finally:
+        await camera.close()
+    assert not list(tmp_path.glob("fli-spool-*"))
+
+
+@pytest.mark.asyncio
+async def test_camera_writes_compressed_fits(tmp_path: Path) -> None:
+    camera = FliCamera(simulation=_FAST, setpoint=None, filenames=None, fits_dir=str(tmp_path))
+    await camera.open()
+    try:
+        image = await camera._expose(0.01, True, asyncio.Event())
+        assert await camera._run_data_pipeline(image, None) is image
+        assert camera.get_metrics()["fits_writer"]["pending"] == 1
+    finally:
+        await camera.close()
+    (path,) = tmp_path.glob("*.fits.fz")
+    assert path.name == image.header["DATE-OBS"].replace(":", "-") + ".fits.fz"
+    assert camera.get_metrics()["fits_writer"]["counters"]["written"] == 1
+
+
+@pytest.mark.asyncio
+async def test_background_flush_while_idle_shortens_exposure_start() -> None:
+    simulation = {**_FAST, "height": 256, "flush_row_time": 1e-4}
+    camera = FliCamera(simulation=simulation, setpoint=None, nflushes=2, background_flush=True)
+    await camera.open()
+    try:
+        driver = camera._driver
+        assert driver is not None and driver._background_flush
+
+        # starting from background flushing skips the flushes before the exposure
+        await camera._expose(0.0, True, asyncio.Event())
+        assert driver._nflushes == 0 and not driver._background_flush
+        clean_start = camera.get_metrics()["phases"]["start_background_flush"]["last"]
+
+        # without being idle in between, the sensor gets flushed as usual
+        await camera._expose(0.0, True, asyncio.Event())
+        assert driver._nflushes == 2
+        assert camera.get_metrics()["phases"]["start"]["last"] > clean_start + 0.04
+
+        await camera._change_exposure_status(ExposureStatus.IDLE)
+        assert driver._background_flush
+    finally:
+        await camera.close()
+
+
+async def _wait_until_armed(camera: FliCamera) -> None:
+    while camera._trigger_armed_at is None:
+        await asyncio.sleep(0.001)
+
+
+@pytest.mark.asyncio
+async def test_armed_exposures_start_together_on_software_trigger() -> None:
+    cameras = [FliCamera(simulation=_FAST, setpoint=None, trigger="low") for _ in range(2)]
+    try:
+        for camera in cameras:
+            await camera.open()
+        with pytest.raises(ValueError, match="No exposure waiting"):
+            await cameras[0].trigger_exposure()
+
+        exposures = [asyncio.create_task(camera._expose(0.05, True, asyncio.Event())) for camera in cameras]
+        await asyncio.gather(*(_wait_until_armed(camera) for camera in cameras))
+        await asyncio.sleep(0.1)
+        assert not any(exposure.done() for exposure in exposures)
+
+        offsets = await trigger_exposures(cameras)
+        images = await asyncio.gather(*exposures)
+        assert offsets[0] == 0.0 and 0.0 <= offsets[1] < 0.05
+        for camera, image in zip(cameras, images, strict=True):
+            assert image.header["TRIGGER"] == "software"
+            phases = camera.get_metrics()["phases"]
+            assert phases["trigger"]["count"] == 1
+            assert phases["trigger_wait"]["last"] >= 0.1
+        assert cameras[0]._driver._trigger is ExternalTrigger.LOW
+    finally:
+        await asyncio.gather(*(camera.close() for camera in cameras))
+
+
+@pytest.mark.asyncio
+async def test_software_trigger_fails_clearly_on_unsupported_camera() -> None:
+    camera = FliCamera(simulation={**_FAST, "software_trigger": False}, setpoint=None, trigger="low")
+    await camera.open()
+    try:
+        exposure = asyncio.create_task(camera._expose(0.01, True, asyncio.Event()))
+        await _wait_until_armed(camera)
+        with pytest.raises(ValueError, match="does not support software triggers"):
+            await camera.trigger_exposure()
+        await camera._abort_exposure()
+        exposure.cancel()
+        with pytest.raises((asyncio.CancelledError, exc.AbortedError)):
+            await exposure
+    finally:
+        await camera.close()
+
+
+def test_clearing_trigger_only_closes_shutter_if_trigger_was_set() -> None:
+    driver = _open_driver()
+    driver.set_external_trigger(None)
+    assert driver.calls["set_trigger"] == 0
+    driver.set_external_trigger(ExternalTrigger.LOW)
+    driver.set_external_trigger(None)
+    driver.set_external_trigger(None)
+    assert driver.calls["set_trigger"] == 2
+
+
+@pytest.mark.asyncio
+async def test_armed_exposure_starts_on_external_trigger_or_aborts() -> None:
+    camera = FliCamera(simulation=_FAST, setpoint=None, trigger="high", trigger_timeout=5.0, timing_headers=True)
+    await camera.open()
+    try:
+        driver = camera._driver
+        assert driver is not None
+        exposure = asyncio.create_task(camera._expose(0.01, True, asyncio.Event()))
+        await _wait_until_armed(camera)
+        driver.trigger_exposure()
+        image = await exposure
+        assert image.header["TRIGGER"] == "external"
+
+        # the start of the exposure isn't known, so neither is the latency of detecting its end
+        assert "TIM-LAT" not in image.header
+        assert "latency" not in camera.get_metrics()["phases"]
+
+        abort = asyncio.Event()
+        exposure = asyncio.create_task(camera._expose(0.01, True, abort))
+        await _wait_until_armed(camera)
+        abort.set()
+        with pytest.raises(exc.AbortedError):
+            await exposure
+        assert camera._trigger_armed_at is None
+    finally:
+        await camera.close()
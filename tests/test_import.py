@@ -6,10 +6,10 @@ install, but device enumeration/opening only happens inside open(), so instantia
 is safe with no FLI hardware attached.
 """
 
-from pyobs.interfaces import IAbortable, IBinning, ICamera, ICooling, IFilters, ITemperatures, IWindow
+from pyobs.interfaces import IAbortable, IBinning, ICamera, ICooling, IFilters, IFocuser, ITemperatures, IWindow
 from pyobs.modules import Module
 
-from pyobs_fli import FliCamera, FliFilterWheel
+from pyobs_fli import FliCamera, FliFilterWheel, FliFocuser
 
 
 def test_instantiate_camera() -> None:
@@ -27,3 +27,9 @@ def test_instantiate_filter_wheel() -> None:
     wheel = FliFilterWheel(filter_names=["A", "B", "C"])
     assert isinstance(wheel, Module)
     assert isinstance(wheel, IFilters)
+
+
+def test_instantiate_focuser() -> None:
+    focuser = FliFocuser(steps_per_mm=1000.0)
+    assert isinstance(focuser, Module)
+    assert isinstance(focuser, IFocuser)
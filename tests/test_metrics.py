@@ -0,0 +1,24 @@
+"""Unit tests for PhaseMetrics: counters, duration statistics and cumulative histogram buckets."""
+
+from pyobs_fli.metrics import PhaseMetrics
+
+
+def test_phase_durations_are_binned_cumulatively() -> None:
+    metrics = PhaseMetrics(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.7, 3.0):
+        metrics.observe("readout", seconds)
+    readout = metrics.snapshot()["phases"]["readout"]
+    assert readout["count"] == 4
+    assert readout["min"] == 0.05
+    assert readout["max"] == 3.0
+    assert readout["last"] == 3.0
+    assert readout["buckets"] == {"0.1": 1, "1.0": 3, "+Inf": 4}
+
+
+def test_counters_and_reset() -> None:
+    metrics = PhaseMetrics()
+    metrics.increment("frames")
+    metrics.increment("frames", 2)
+    assert metrics.snapshot()["counters"] == {"frames": 3}
+    metrics.reset()
+    assert metrics.snapshot() == {"counters": {}, "phases": {}}
@@ -0,0 +1,124 @@
+"""Unit tests for DeviceRegistry: caching of the device list, lookup by name, path and serial, and
+re-enumeration on hotplug events and failed lookups.
+"""
+
+import asyncio
+from pathlib import Path
+from typing import ClassVar
+
+import pytest
+
+from pyobs_fli import FliCamera
+from pyobs_fli.flidriver import DeviceInfo, DeviceType
+from pyobs_fli.registry import DeviceRegistry
+
+
+class _FakeDriver:
+    """Minimal driver class with a mutable list of devices, serials are derived from the path."""
+
+    devices: ClassVar[list[DeviceInfo]] = []
+    scans = 0
+    probes = 0
+
+    @classmethod
+    def list_devices(cls, device_type: DeviceType) -> list[DeviceInfo]:
+        cls.scans += 1
+        return list(cls.devices)
+
+    def __init__(self, device: DeviceInfo):
+        self._device = device
+
+    def open(self) -> None:
+        _FakeDriver.probes += 1
+
+    def close(self) -> None:
+        pass
+
+    def get_serial_string(self) -> str:
+        return "SN-" + self._device.filename.decode("utf-8")[-1]
+
+
+def _device(index: int) -> DeviceInfo:
+    return DeviceInfo(domain=0x102, filename=f"/dev/fliusb{index}".encode(), name=f"Camera {index}".encode())
+
+
+@pytest.fixture
+def registry(tmp_path: Path) -> DeviceRegistry:
+    _FakeDriver.devices = [_device(0), _device(1)]
+    _FakeDriver.scans = _FakeDriver.probes = 0
+    return DeviceRegistry(_FakeDriver, device_glob=str(tmp_path / "fliusb*"))
+
+
+def test_registry_scans_bus_only_once(registry: DeviceRegistry) -> None:
+    assert registry.find(DeviceType.CAMERA) == _device(0)
+    assert registry.find(DeviceType.CAMERA, name="Camera 1") == _device(1)
+    assert registry.find(DeviceType.CAMERA, path="/dev/fliusb0") == _device(0)
+    assert _FakeDriver.scans == 1
+
+
+def test_registry_finds_device_by_serial(registry: DeviceRegistry) -> None:
+    registry.remember_serial(_device(0), "SN-0")
+    assert registry.find(DeviceType.CAMERA, serial="SN-1") == _device(1)
+    assert _FakeDriver.probes == 1
+    assert registry.find(DeviceType.CAMERA, serial="SN-1") == _device(1)
+    assert _FakeDriver.probes == 1
+
+
+def test_registry_rescans_on_hotplug(registry: DeviceRegistry, tmp_path: Path) -> None:
+    registry.find(DeviceType.CAMERA)
+    _FakeDriver.devices.append(_device(2))
+    registry.find(DeviceType.CAMERA)
+    assert _FakeDriver.scans == 1
+
+    (tmp_path / "fliusb2").touch()
+    assert registry.devices(DeviceType.CAMERA)[-1] == _device(2)
+    assert _FakeDriver.scans == 2
+
+
+def test_registry_keeps_serials_of_present_devices_on_hotplug(registry: DeviceRegistry, tmp_path: Path) -> None:
+    devices = [
+        DeviceInfo(domain=0x102, filename=str(tmp_path / f"fliusb{i}").encode(), name=f"Camera {i}".encode())
+        for i in range(2)
+    ]
+    _FakeDriver.devices = devices[:1]
+    (tmp_path / "fliusb0").touch()
+    assert registry.find(DeviceType.CAMERA, serial="SN-0") == devices[0]
+    assert _FakeDriver.probes == 1
+
+    # plugging in another device doesn't open the first one again
+    _FakeDriver.devices = devices
+    (tmp_path / "fliusb1").touch()
+    assert registry.find(DeviceType.CAMERA, serial="SN-1") == devices[1]
+    assert _FakeDriver.probes == 2
+
+    # but its serial is forgotten once it's gone
+    (tmp_path / "fliusb0").unlink()
+    registry.devices(DeviceType.CAMERA)
+    assert registry._serials == {devices[1].filename: "SN-1"}
+
+
+def test_registry_rescans_once_on_failed_lookup(registry: DeviceRegistry) -> None:
+    registry.find(DeviceType.CAMERA)
+    _FakeDriver.devices.append(_device(2))
+    assert registry.find(DeviceType.CAMERA, name="Camera 2") == _device(2)
+    assert _FakeDriver.scans == 2
+
+    with pytest.raises(ValueError, match="No matching device"):
+        registry.find(DeviceType.CAMERA, name="Camera 3")
+    assert _FakeDriver.scans == 3
+
+
+@pytest.mark.asyncio
+async def test_modules_share_registry_and_remember_serial() -> None:
+    cameras = [FliCamera(simulation={"width": 64, "height": 32}, setpoint=None) for _ in range(2)]
+    registry = cameras[0]._registry()
+    registry.refresh()
+    scans = registry.scans
+    try:
+        for camera in cameras:
+            await camera.open()
+        assert registry.scans == scans + 1
+        assert cameras[0]._serial == "SIM00001"
+        assert registry.find(DeviceType.CAMERA, serial="SIM00001") == cameras[1]._device
+    finally:
+        await asyncio.gather(*(camera.close() for camera in cameras))
@@ -0,0 +1,129 @@
+"""Unit tests for SdkWorker: serialized calls on one long-lived thread, timeouts that only count the
+running time of a call, replacement of stuck threads and the stats counters."""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from pyobs_fli.sdkworker import SdkWorker, _SdkCall
+
+
+@pytest.mark.asyncio
+async def test_calls_run_on_one_thread() -> None:
+    worker = SdkWorker()
+    threads: list[int] = []
+
+    for _ in range(3):
+        assert await worker.run(lambda: threads.append(threading.get_ident()), timeout=1.0)
+    assert len(set(threads)) == 1
+    assert threads[0] != threading.get_ident()
+    assert worker.stats.calls == 3
+    worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_time_in_queue_does_not_count_towards_timeout() -> None:
+    worker = SdkWorker()
+    order: list[str] = []
+
+    def slow() -> None:
+        time.sleep(0.1)
+        order.append("slow")
+
+    results = await asyncio.gather(
+        worker.run(slow, timeout=1.0),
+        worker.run(lambda: order.append("fast"), timeout=0.05),
+    )
+    assert results == [True, True]
+    assert order == ["slow", "fast"]
+    worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_stuck_call_is_abandoned_and_queue_keeps_going() -> None:
+    worker = SdkWorker()
+    release = threading.Event()
+
+    def hang() -> None:
+        release.wait()
+
+    assert not await worker.run(hang, timeout=0.05)
+    assert worker.stats.stuck_calls == 1
+    assert worker.stats.stuck_threads == 1
+
+    ran: list[bool] = []
+    assert await worker.run(lambda: ran.append(True), timeout=1.0)
+    assert ran == [True]
+
+    # once the hung call returns, its thread goes away
+    release.set()
+    await asyncio.sleep(0.05)
+    assert worker.stats.stuck_threads == 0
+    worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_worker_refuses_calls_when_too_many_are_stuck() -> None:
+    worker = SdkWorker(max_stuck_threads=2)
+    release = threading.Event()
+
+    def hang() -> None:
+        release.wait()
+
+    assert not await worker.run(hang, timeout=0.01)
+    assert not await worker.run(hang, timeout=0.01)
+    assert worker.is_dead
+
+    ran: list[bool] = []
+    assert not await worker.run(lambda: ran.append(True), timeout=1.0)
+    assert ran == []
+
+    release.set()
+    await asyncio.sleep(0.05)
+    assert not worker.is_dead
+    worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_hung_call_of_cancelled_caller_does_not_block_queue() -> None:
+    worker = SdkWorker()
+    release = threading.Event()
+
+    def hang() -> None:
+        release.wait()
+
+    # the caller of the hanging call goes away, before the call exceeds its timeout
+    task = asyncio.create_task(worker.run(hang, timeout=0.1))
+    await asyncio.sleep(0.02)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    ran: list[bool] = []
+    start = time.monotonic()
+    assert await worker.run(lambda: ran.append(True), timeout=0.1)
+    assert ran == [True]
+    assert time.monotonic() - start < 1.0
+    assert worker.stats.stuck_calls == 1
+
+    release.set()
+    worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_finished_call_is_not_abandoned() -> None:
+    abandoned: list[bool] = []
+
+    class _Worker(SdkWorker):
+        def _finish(self, call: _SdkCall) -> None:
+            # a waiting caller times out right after the call has finished
+            abandoned.append(self._abandon(call))
+            super()._finish(call)
+
+    worker = _Worker()
+    assert await worker.run(lambda: None, timeout=1.0)
+    assert abandoned == [False]
+    assert worker.stats.stuck_calls == 0
+    worker.stop()
@@ -0,0 +1,56 @@
+"""Unit tests for FrameSpool: memory-mapped slots, reuse of released slots in ring order, the size cap and
+cleanup of the spool directory."""
+
+from pathlib import Path
+
+import numpy as np
+from pyobs.images import Image
+
+from pyobs_fli.spool import FrameSpool
+
+
+def test_frames_are_memory_mapped_files(tmp_path: Path) -> None:
+    spool = FrameSpool(str(tmp_path))
+    buf = spool.acquire((4, 8))
+    assert isinstance(buf, np.memmap)
+    assert buf.shape == (4, 8) and buf.dtype == np.uint16 and buf.flags.c_contiguous
+    assert spool.path is not None and spool.path.parent == tmp_path
+    assert (spool.path / "frame-0000.raw").stat().st_size == 4 * 8 * 2
+
+
+def test_released_slots_are_reused_in_ring_order(tmp_path: Path) -> None:
+    spool = FrameSpool(str(tmp_path))
+    first = spool.acquire((4, 8))
+    second = spool.acquire((4, 8))
+    first_address, second_address = first.ctypes.data, second.ctypes.data
+    del first, second
+    assert spool.acquire((4, 8)).ctypes.data == first_address
+    assert spool.acquire((4, 8)).ctypes.data == second_address
+
+
+def test_slot_in_use_is_not_reused(tmp_path: Path) -> None:
+    spool = FrameSpool(str(tmp_path), max_bytes=4 * 8 * 2)
+    image = Image(spool.acquire((4, 8)))
+    view = image.data[1:, :]
+    del image
+    other = spool.acquire((4, 8))
+    assert not isinstance(other, np.memmap)
+    assert not np.shares_memory(other, view)
+    assert spool.nbytes == 4 * 8 * 2
+
+
+def test_released_slot_is_resized_for_new_shape(tmp_path: Path) -> None:
+    spool = FrameSpool(str(tmp_path), max_bytes=8 * 8 * 2)
+    spool.acquire((4, 8))
+    assert spool.acquire((8, 8)).shape == (8, 8)
+    assert spool.nbytes == 8 * 8 * 2
+
+
+def test_clear_removes_spool_directory(tmp_path: Path) -> None:
+    spool = FrameSpool(str(tmp_path))
+    buf = spool.acquire((4, 8))
+    buf[:] = 42
+    path = spool.path
+    spool.clear()
+    assert path is not None and not path.exists()
+    assert buf.sum() == 42 * 4 * 8
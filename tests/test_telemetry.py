@@ -0,0 +1,24 @@
+"""Unit tests for TelemetryHistory: bounded size and time filtering."""
+
+from pyobs_fli.telemetry import TelemetryHistory, TelemetrySample
+
+
+def _sample(t: float) -> TelemetrySample:
+    return TelemetrySample(time=t, ccd_temp=-20.0, base_temp=15.0, cooler_power=50.0)
+
+
+def test_history_drops_oldest_samples() -> None:
+    history = TelemetryHistory(size=3)
+    assert history.latest is None
+    for t in range(5):
+        history.append(_sample(t))
+    assert len(history) == 3
+    assert [s.time for s in history.samples()] == [2, 3, 4]
+    assert history.latest == _sample(4)
+
+
+def test_history_returns_samples_since() -> None:
+    history = TelemetryHistory()
+    for t in range(5):
+        history.append(_sample(t))
+    assert [s.time for s in history.samples(since=2)] == [3, 4]
@@ -0,0 +1,59 @@
+"""Unit tests for VideoRingBuffer: latest-frame semantics, dropped-frame accounting and slot reuse."""
+
+import numpy as np
+import pytest
+
+from pyobs_fli.videobuffer import VideoRingBuffer
+
+
+def _write(ring: VideoRingBuffer, value: int) -> None:
+    ring.write_slot()[:] = value
+    ring.commit(timestamp=float(value))
+
+
+def test_empty_ring_has_no_frame() -> None:
+    assert VideoRingBuffer((2, 3)).latest() is None
+
+
+def test_latest_returns_copy_of_newest_frame() -> None:
+    ring = VideoRingBuffer((2, 3), slots=3)
+    _write(ring, 1)
+    _write(ring, 2)
+    frame = ring.latest()
+    assert frame is not None
+    assert frame.number == 2
+    assert frame.timestamp == 2.0
+    assert (frame.data == 2).all()
+
+    # the copy must not change when the producer wraps around
+    for value in range(3, 7):
+        _write(ring, value)
+    assert (frame.data == 2).all()
+
+
+def test_frames_not_taken_are_counted_as_dropped() -> None:
+    ring = VideoRingBuffer((2, 3), slots=2)
+    for value in range(1, 6):
+        _write(ring, value)
+    frame = ring.latest()
+    assert frame is not None and frame.number == 5
+    assert ring.dropped == 4
+    assert ring.latest(newer_than=frame.number) is None
+
+    _write(ring, 6)
+    out = np.empty((2, 3), dtype=np.uint16)
+    frame = ring.latest(out=out, newer_than=5)
+    assert frame is not None and frame.data is out and (out == 6).all()
+    assert ring.dropped == 4
+    assert ring.frame_count == 6
+
+
+def test_producer_never_writes_into_latest_slot() -> None:
+    ring = VideoRingBuffer((2, 3), slots=2)
+    _write(ring, 1)
+    assert not np.shares_memory(ring.write_slot(), ring._frames[ring._latest])
+
+
+def test_ring_needs_two_slots() -> None:
+    with pytest.raises(ValueError):
+        VideoRingBuffer((2, 3), slots=1)